@@ -0,0 +1,184 @@
+"""
+Micro-batched OpenAI answer verification.
+Uncertain answers for the same clue are collected for a few milliseconds and
+judged with a single prompt, then each verdict is handed back to the request
+waiting for it. During bursts this turns dozens of model calls into one.
+"""
+
+import json
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from answer_matcher import normalize
+from llm_client import LLMError
+
+VERDICT_LINE = re.compile(r"^\s*(\d+)\s*[:.)\-]\s*(CORRECT|INCORRECT)\b", re.IGNORECASE | re.MULTILINE)
+
+
+class _Batch:
+    """Answers waiting to be judged against one clue's expected answers."""
+    __slots__ = ("hunt_name", "expected_answers", "answers", "deadline")
+
+    def __init__(self, hunt_name: str, expected_answers: Sequence[str], deadline: float):
+        self.hunt_name = hunt_name
+        self.expected_answers = expected_answers
+        self.answers = {}  # normalized answer -> (original answer, [futures])
+        self.deadline = deadline
+
+
+class AnswerBatcher:
+    """Collects uncertain answers per clue and verifies each group with one prompt."""
+
+    def __init__(self, client, max_batch: int = 20, max_wait: float = 0.01, workers: int = 4):
+        """
+        Args:
+            client: chat client with complete(prompt, max_tokens) -> str and a per-call `timeout`
+            max_batch: distinct answers per prompt; a full batch is sent immediately
+            max_wait: seconds the first answer in a batch waits for company
+            workers: batches being judged at the same time
+        """
+        self.client = client
+        # How long a caller waits for its verdict: the batch's wait plus the model call's deadline
+        self.result_timeout = client.timeout + max_wait
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.workers = workers
+        self.batches_sent = 0
+        self.answers_judged = 0
+        self._pending = {}  # clue key -> _Batch
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._executor = None
+        self._thread = None
+
+    def verify(self, clue_key: str, expected_answers: Sequence[str], user_answer: str,
+               hunt_name: str = "scavenger hunt") -> "Future[bool]":
+        """Queue an answer for verification; the future resolves to the model's verdict.
+
+        Raises LLMError through the future if the model call fails or its
+        reply has no verdict for this answer. Callers wait at most
+        `result_timeout` seconds for it.
+        """
+        future = Future()
+        answer_key = normalize(user_answer)
+        full = None
+        with self._lock:
+            self._ensure_started()
+            batch = self._pending.get(clue_key)
+            if batch is None:
+                batch = _Batch(hunt_name, expected_answers, time.monotonic() + self.max_wait)
+                self._pending[clue_key] = batch
+                self._wakeup.notify()
+            # Identical answers in one batch share a single slot in the prompt
+            batch.answers.setdefault(answer_key, (user_answer, []))[1].append(future)
+            if len(batch.answers) >= self.max_batch:
+                full = self._pending.pop(clue_key)
+        if full is not None:
+            self._executor.submit(self._judge, full)
+        return future
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        """Judge whatever is pending and stop the background threads.
+
+        With a timeout, batches still being judged when it runs out are left
+        to finish on their own (each model call has its own deadline).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            batches = list(self._pending.values())
+            self._pending.clear()
+            thread, self._thread = self._thread, None
+            self._wakeup.notify()
+        for batch in batches:
+            self._judge(batch)
+        if thread is not None:
+            thread.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+        if self._executor is not None:
+            self._executor.shutdown(wait=deadline is None)
+            self._executor = None
+
+    def _ensure_started(self) -> None:
+        # Started lazily (under the lock) so threads are created after a gunicorn fork
+        if self._thread is not None:
+            return
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="answer-batch")
+        self._thread = threading.Thread(target=self._run, name="answer-batcher", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        me = threading.current_thread()
+        while True:
+            with self._lock:
+                if self._thread is not me:
+                    return
+                now = time.monotonic()
+                due = [key for key, batch in self._pending.items() if batch.deadline <= now]
+                ready = [self._pending.pop(key) for key in due]
+                if not ready:
+                    next_deadline = min((b.deadline for b in self._pending.values()), default=None)
+                    self._wakeup.wait(None if next_deadline is None else next_deadline - now)
+                    continue
+            for batch in ready:
+                self._executor.submit(self._judge, batch)
+
+    def _judge(self, batch: _Batch) -> None:
+        entries = list(batch.answers.values())
+        try:
+            verdicts = self._ask([answer for answer, _ in entries], batch)
+        except Exception as e:
+            error = e if isinstance(e, LLMError) else LLMError(str(e))
+            for _, futures in entries:
+                for future in futures:
+                    future.set_exception(error)
+            return
+
+        self.batches_sent += 1
+        self.answers_judged += len(verdicts)
+        for n, (_, futures) in enumerate(entries, 1):
+            is_correct = verdicts.get(n)
+            for future in futures:
+                if is_correct is None:
+                    # The model skipped this answer: fail it like a model error, so it isn't cached
+                    future.set_exception(LLMError(f"No verdict for answer {n} of {len(entries)} in the model's reply"))
+                else:
+                    future.set_result(is_correct)
+
+    def _ask(self, answers: List[str], batch: _Batch) -> Dict[int, bool]:
+        numbered = "\n".join(f"{n}. {quote_answer(answer)}" for n, answer in enumerate(answers, 1))
+        prompt = f"""
+You are helping with a {batch.hunt_name}. For each numbered user answer, determine if it matches any of the expected answers.
+
+Expected answers: {", ".join(batch.expected_answers)}
+
+User answers:
+{numbered}
+
+An answer should be considered correct if it:
+1. Contains the main name/location mentioned in the expected answers
+2. Is clearly referring to the same place, even with different wording
+3. Has minor spelling variations or abbreviations
+
+Respond with one line per answer, in the form "<number>: CORRECT" or "<number>: INCORRECT".
+"""
+        reply = self.client.complete(prompt, max_tokens=8 * len(answers) + 10)
+        verdicts = {int(n): verdict.upper() == "CORRECT" for n, verdict in VERDICT_LINE.findall(reply)}
+        bare = reply.strip().rstrip(".!").upper()
+        if not verdicts and len(answers) == 1 and bare in ("CORRECT", "INCORRECT"):
+            # A lone answer is sometimes judged with a bare verdict
+            verdicts[1] = bare == "CORRECT"
+        return {n: verdict for n, verdict in verdicts.items() if 1 <= n <= len(answers)}
+
+
+def quote_answer(answer: str) -> str:
+    """An answer as one double-quoted line, so it can't break out of its place in a prompt."""
+    return json.dumps(" ".join(answer.split()), ensure_ascii=False)
+
+
+def create_answer_batcher(client, max_batch: int, max_wait: float) -> Optional[AnswerBatcher]:
+    """Batcher for a chat client; None when batching is off or there is no client."""
+    if client is None or max_batch <= 1:
+        return None
+    return AnswerBatcher(client, max_batch=max_batch, max_wait=max_wait)
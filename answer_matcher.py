@@ -0,0 +1,287 @@
+"""
+Local Answer Matching Engine
+Tiered matching of player answers against a clue's expected answers so that
+only genuinely ambiguous answers need to be judged by OpenAI.
+
+Tiers:
+1. Normalized exact / alias lookup (case, punctuation, accents and stopwords ignored)
+2. Token-level fuzzy scoring (edit distance plus phonetic keys)
+3. Anything in the uncertain score band is left for the LLM to decide
+"""
+
+import functools
+import heapq
+import re
+import unicodedata
+from typing import Iterable, List, NamedTuple, Optional, Pattern, Tuple
+
+CORRECT = "correct"
+INCORRECT = "incorrect"
+UNCERTAIN = "uncertain"
+
+# Fuzzy scores at or above ACCEPT_SCORE are correct, below REJECT_SCORE incorrect.
+ACCEPT_SCORE = 0.85
+REJECT_SCORE = 0.55
+
+# Score given to two tokens that differ in spelling but sound alike.
+PHONETIC_SCORE = 0.85
+
+# Most aliases fuzzy-scored per answer, picked by the trigrams they share with it;
+# an alias sharing fewer than MIN_SHARED_TRIGRAMS is too different to score
+MAX_CANDIDATES = 16
+MIN_SHARED_TRIGRAMS = 2
+
+STOPWORDS = frozenset({
+    "a", "an", "the", "of", "at", "in", "on", "to", "and", "is", "it", "its",
+    "i", "im", "think", "guess", "maybe", "my", "answer", "this", "that",
+    "thats", "we", "were", "are", "be", "place", "called", "go", "going",
+})
+
+_APOSTROPHES = re.compile(r"['’`]")
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+_SOUNDEX_CODES = {}
+for _letters, _digit in (("bfpv", "1"), ("cgjkqsxz", "2"), ("dt", "3"),
+                         ("l", "4"), ("mn", "5"), ("r", "6")):
+    for _letter in _letters:
+        _SOUNDEX_CODES[_letter] = _digit
+
+
+class MatchResult(NamedTuple):
+    """Outcome of matching one answer against a clue's expected answers."""
+    verdict: str
+    score: float
+    alias: Optional[str] = None
+
+
+def normalize(text: str) -> str:
+    """Casefold, strip accents and punctuation, and collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = _APOSTROPHES.sub("", text.casefold())
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def tokenize(text: str) -> List[str]:
+    """Normalize text and split it into tokens with stopwords removed."""
+    tokens = normalize(text).split()
+    return [token for token in tokens if token not in STOPWORDS] or tokens
+
+
+def soundex(token: str) -> str:
+    """American Soundex key for a single normalized token."""
+    if not token:
+        return ""
+    key = token[0]
+    previous = _SOUNDEX_CODES.get(token[0], "")
+    for letter in token[1:]:
+        code = _SOUNDEX_CODES.get(letter, "")
+        if code and code != previous:
+            key += code
+            if len(key) == 4:
+                break
+        if letter not in "hw":
+            previous = code
+    return key.ljust(4, "0")
+
+
+def trigrams(tokens: Iterable[str]) -> set:
+    """Character trigrams of each token, padded so starts and ends count."""
+    grams = set()
+    for token in tokens:
+        padded = f" {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between two strings."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        previous = current
+    return previous[-1]
+
+
+def similarity(a: str, b: str) -> float:
+    """Edit-distance similarity in [0, 1]; 1.0 means identical."""
+    if a == b:
+        return 1.0
+    longest = max(len(a), len(b))
+    if not longest:
+        return 1.0
+    return 1.0 - edit_distance(a, b) / longest
+
+
+@functools.lru_cache(maxsize=65536)
+def token_similarity(a: str, b: str) -> float:
+    """Similarity of two tokens, boosted when they share a phonetic key."""
+    score = similarity(a, b)
+    if score < PHONETIC_SCORE and len(a) > 2 and len(b) > 2 and soundex(a) == soundex(b):
+        return PHONETIC_SCORE
+    return score
+
+
+def fuzzy_score(answer_tokens: List[str], alias_tokens: List[str]) -> float:
+    """Score how well the answer covers every token of an alias."""
+    if not answer_tokens or not alias_tokens:
+        return 0.0
+
+    total_length = sum(len(token) for token in alias_tokens)
+    covered = 0.0
+    for alias_token in alias_tokens:
+        best = max(token_similarity(alias_token, token) for token in answer_tokens)
+        covered += best * len(alias_token)
+    covered /= total_length
+
+    # Compare the squashed strings too so "powels books" ~ "powellsbooks", unless
+    # their lengths alone rule out beating the token score
+    answer_whole, alias_whole = "".join(answer_tokens), "".join(alias_tokens)
+    shorter, longer = sorted((len(answer_whole), len(alias_whole)))
+    if shorter <= covered * longer:
+        return covered
+    return max(similarity(answer_whole, alias_whole), covered)
+
+
+class AnswerIndex:
+    """Immutable, precompiled matcher for one clue's expected answers.
+
+    Built once when the game loads so each message costs a single regex pass
+    for the exact/alias tier, and fuzzy scoring visits only a bounded set of
+    aliases: those sharing a phonetic key with the answer, plus those sharing
+    the most character trigrams with it.
+    """
+
+    __slots__ = ("_aliases", "_pattern", "_others", "_by_alias", "_by_compact", "_by_phonetic", "_by_trigram")
+
+    def __init__(self, expected_answers: List[str], other_places: Iterable[str] = ()):
+        """
+        Args:
+            expected_answers: the clue's answer and its aliases
+            other_places: answers to the hunt's other clues; an answer naming
+                one of them as well as this clue's place is left uncertain
+        """
+        aliases = []
+        by_alias = {}
+        by_compact = {}
+        by_phonetic = {}
+        by_trigram = {}
+        for expected in expected_answers:
+            alias_norm = normalize(expected)
+            if not alias_norm or alias_norm in by_alias:
+                continue
+            tokens = tuple(tokenize(expected))
+            by_alias[alias_norm] = expected
+            by_compact.setdefault("".join(tokens), expected)
+            for token in tokens:
+                by_phonetic.setdefault(soundex(token), []).append(len(aliases))
+            for gram in trigrams(tokens):
+                by_trigram.setdefault(gram, []).append(len(aliases))
+            aliases.append((expected, tokens))
+
+        self._aliases = tuple(aliases)
+        self._by_alias = by_alias
+        self._by_compact = by_compact
+        self._by_phonetic = {key: tuple(ids) for key, ids in by_phonetic.items()}
+        self._by_trigram = {gram: tuple(ids) for gram, ids in by_trigram.items()}
+
+        self._pattern = _whole_words(by_alias)
+
+        # Places that are part of one of this clue's aliases don't count as another place
+        others = {normalize(place) for place in other_places}
+        self._others = _whole_words(
+            other for other in others
+            if other and not any(re.search(rf"\b{re.escape(other)}\b", alias) for alias in by_alias)
+        )
+
+    def __len__(self) -> int:
+        return len(self._aliases)
+
+    def match(self, user_answer: str) -> MatchResult:
+        """Match a player's answer, returning a CORRECT, INCORRECT or UNCERTAIN result."""
+        answer_norm = normalize(user_answer)
+        if not answer_norm or self._pattern is None:
+            return MatchResult(INCORRECT, 0.0)
+
+        # Tier 1: exact alias, or the alias appearing as whole words in the answer
+        found = self._pattern.search(answer_norm)
+        if found:
+            verdict = UNCERTAIN if self._names_other_place(answer_norm, found.span()) else CORRECT
+            return MatchResult(verdict, 1.0, self._by_alias[found.group(0)])
+
+        answer_tokens = tokenize(user_answer)
+
+        alias = self._by_compact.get("".join(answer_tokens))
+        if alias is not None:
+            return MatchResult(CORRECT, 1.0, alias)
+
+        # Tier 2: fuzzy token scoring against aliases that sound related
+        candidates = set()
+        for token in answer_tokens:
+            candidates.update(self._by_phonetic.get(soundex(token), ()))
+
+        if len(candidates) > MAX_CANDIDATES:
+            # Common words can share a key with hundreds of aliases
+            candidates = self._closest(answer_tokens, candidates)
+        # Misspellings can change the phonetic key too ("powell" P400 vs "powells" P420)
+        candidates = set(candidates).union(self._closest(answer_tokens))
+
+        best = MatchResult(INCORRECT, 0.0)
+        for alias_id in sorted(candidates):
+            expected, alias_tokens = self._aliases[alias_id]
+            score = fuzzy_score(answer_tokens, list(alias_tokens))
+            if score > best.score:
+                best = MatchResult(INCORRECT, score, expected)
+
+        if best.score >= ACCEPT_SCORE:
+            if self._names_other_place(answer_norm):
+                # Close to this place, but alongside other guesses: let the model decide
+                return best._replace(verdict=UNCERTAIN)
+            return best._replace(verdict=CORRECT)
+        if best.score >= REJECT_SCORE:
+            return best._replace(verdict=UNCERTAIN)
+        return best
+
+
+    def _closest(self, answer_tokens: List[str], among: Optional[set] = None) -> List[int]:
+        """Ids of up to MAX_CANDIDATES aliases sharing the most trigrams with the answer."""
+        shared = {}
+        for gram in trigrams(answer_tokens):
+            for alias_id in self._by_trigram.get(gram, ()):
+                if among is None or alias_id in among:
+                    shared[alias_id] = shared.get(alias_id, 0) + 1
+        closest = heapq.nlargest(MAX_CANDIDATES, shared, key=shared.get)
+        return [alias_id for alias_id in closest if shared[alias_id] >= MIN_SHARED_TRIGRAMS]
+
+    def _names_other_place(self, answer_norm: str, span: Tuple[int, int] = (0, 0)) -> bool:
+        """Whether the answer, outside the matched span, lists or names another place.
+
+        "the rose garden by the zoo" names one place; "powells or pioneer
+        square or the zoo" is a list of guesses and mustn't pass on one of them.
+        """
+        rest = answer_norm[:span[0]] + " " + answer_norm[span[1]:]
+        return "or" in rest.split() or (self._others is not None and self._others.search(rest) is not None)
+
+
+def _whole_words(phrases: Iterable[str]) -> Optional[Pattern]:
+    """Regex finding any of the (normalized) phrases as whole words; None if there are none."""
+    # Longest first so the reported match is the most specific one
+    alternation = "|".join(re.escape(phrase) for phrase in sorted(set(phrases), key=len, reverse=True))
+    return re.compile(rf"(?<![0-9a-z])(?:{alternation})(?![0-9a-z])") if alternation else None
+
+
+def match_answer(user_answer: str, expected_answers: List[str]) -> MatchResult:
+    """Match a player's answer against a list of expected answers.
+
+    Convenience wrapper for one-off checks; the game keeps a prebuilt
+    AnswerIndex per clue instead.
+    """
+    return AnswerIndex(expected_answers).match(user_answer)
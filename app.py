@@ -1,15 +1,33 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from twilio.twiml.messaging_response import MessagingResponse
 from twilio.twiml.voice_response import VoiceResponse
 from twilio.rest import Client
 import os
+import threading
+import time
 from datetime import datetime
 import logging
 from config import Config
+from metrics import FAST_BUCKETS, REGISTRY, timed
+from request_profiler import RequestProfiler
 from scavenger_game import game
+from cache_store import TTLCache
+from player_locks import StripedLock
+from sms_sender import SendQueue
+from snapshot_cache import SnapshotCache
+from sms_segments import SegmentCompactor, segment_info
+from reply_dispatcher import ReplyDispatcher
+from history_buffer import HistoryBuffer
+from hunt_loader import HuntValidationError
+from hunt_engine import create_hunt_engine, parse_routes
+from webhook_validator import require_twilio_signature
+from structured_logging import configure_logging, parse_sample_rates
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging: records are written by a background thread, as text or JSON lines
+log_handler = configure_logging(
+    Config.LOG_LEVEL, Config.LOG_FORMAT, Config.LOG_ASYNC, Config.LOG_FILE, Config.LOG_BATCH_SIZE,
+    sample_rates=parse_sample_rates(Config.LOG_SAMPLE_RATES), phone_salt=Config.SECRET_KEY
+)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
@@ -18,15 +36,56 @@ app.config.from_object(Config)
 # Initialize Twilio client
 if Config.TWILIO_ACCOUNT_SID and Config.TWILIO_AUTH_TOKEN:
     twilio_client = Client(Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN)
+    if Config.TWILIO_API_BASE_URL:
+        # e.g. a local stub of the Twilio API for load tests
+        twilio_client.api.base_url = Config.TWILIO_API_BASE_URL
     logger.info("Twilio client initialized successfully")
 else:
     twilio_client = None
     missing_config = Config.validate_twilio_config()
     logger.warning(f"Twilio credentials not found: {missing_config}. Some features may not work.")
 
-# In-memory storage for demonstration (use a database in production)
-message_history = []
-call_history = []
+# Hunts hosted by this process; the default hunt is the global game
+engine = create_hunt_engine(game, Config.HUNT_DIR, parse_routes(Config.HUNT_ROUTES))
+
+# Bounded in-memory history, optionally spilled to append-only log files
+message_history = HistoryBuffer(Config.HISTORY_SIZE, Config.MESSAGE_LOG_PATH)
+call_history = HistoryBuffer(Config.HISTORY_SIZE, Config.CALL_LOG_PATH)
+
+# Replies by MessageSid, so Twilio's webhook retries get the original reply
+# instead of running the message through the game again
+sms_replies = TTLCache(
+    max_size=Config.SMS_REPLY_CACHE_SIZE,
+    ttl=Config.SMS_REPLY_CACHE_TTL,
+    db_path=Config.SMS_REPLY_CACHE_PATH,
+    table="sms_replies"
+)
+message_sid_locks = StripedLock(64)
+# MessageSid -> Event set once the first delivery's reply is cached. The stripe
+# lock only guards claiming a SID, so processing never holds up other messages.
+sms_in_flight = {}
+# Twilio gives up on a webhook after 15s, so a retry waits no longer than that
+SMS_RETRY_WAIT = 15
+
+# Replies are measured in billable SMS segments, and optionally kept in GSM-7
+# and trimmed to a segment budget
+segment_compactor = SegmentCompactor(Config.SMS_GSM7_ONLY, Config.SMS_MAX_SEGMENTS)
+
+# Hot-path timings and counters, scraped from /metrics
+WEBHOOK_SECONDS = REGISTRY.histogram("scavenger_webhook_seconds", "Webhook handling time", ["webhook"])
+MESSAGE_SECONDS = REGISTRY.histogram("scavenger_message_seconds", "Game processing time per SMS", ["command"])
+TWIML_SECONDS = REGISTRY.histogram("scavenger_twiml_seconds", "TwiML rendering time", ["source"],
+                                   buckets=FAST_BUCKETS)
+COMMANDS = REGISTRY.counter("scavenger_commands_total", "SMS messages by command", ["command"])
+DUPLICATE_SMS = REGISTRY.counter("scavenger_duplicate_sms_total", "Webhook retries answered from the reply cache")
+_twiml_cached = TWIML_SECONDS.labels("cached")
+_twiml_rendered = TWIML_SECONDS.labels("rendered")
+_duplicate_sms = DUPLICATE_SMS.labels()
+
+# Opt-in sampling profiler for SMS webhooks (PROFILE_SAMPLE_RATE, or POST /profile)
+request_profiler = RequestProfiler(
+    Config.PROFILE_SAMPLE_RATE, Config.PROFILE_INTERVAL_MS / 1000, Config.PROFILE_MAX_STACKS
+)
 
 @app.route('/')
 def home():
@@ -35,9 +94,9 @@ def home():
         "message": "Portland Scavenger Hunt Bot 🎯",
         "description": "A Twilio-powered scavenger hunt game exploring Portland's iconic locations",
         "game_info": {
-            "locations": 5,
-            "max_points_per_clue": 40,
-            "total_possible_points": 200,
+            "locations": game.hunt.clue_count,
+            "max_points_per_clue": game.hunt.points_by_hints[0],
+            "total_possible_points": game.hunt.max_score,
             "features": [
                 "OpenAI-powered natural language processing",
                 "Progressive hint system",
@@ -49,17 +108,24 @@ def home():
             "start": "Text 'READY' to your Twilio number",
             "answer": "Respond with location names in natural language",
             "hints": "Get up to 3 hints per clue",
-            "scoring": "40 pts (no hints), 30 pts (1 hint), 20 pts (2 hints), 10 pts (3 hints)"
+            "scoring": ", ".join(
+                f"{points} pts ({hints} hint{'' if hints == 1 else 's'})" if hints else f"{points} pts (no hints)"
+                for hints, points in enumerate(game.hunt.points_by_hints)
+            )
         },
         "endpoints": {
             "sms_webhook": "/webhook/sms",
             "voice_webhook": "/webhook/voice",
             "game_stats": "/game-stats",
-            "leaderboard": "/leaderboard"
+            "leaderboard": "/leaderboard",
+            "metrics": "/metrics"
         }
     })
 
 @app.route('/webhook/sms', methods=['POST'])
+@timed(WEBHOOK_SECONDS.labels("sms"))
+@require_twilio_signature
+@request_profiler.sampled
 def sms_webhook():
     """Handle incoming SMS messages for the scavenger hunt game."""
     try:
@@ -69,48 +135,167 @@ def sms_webhook():
         message_body = request.form.get('Body')
         message_sid = request.form.get('MessageSid')
         
-        # Log the incoming message
-        logger.info(f"Received SMS from {from_number}: {message_body}")
+        if not message_sid:
+            return handle_sms(message_body, from_number, to_number, message_sid)
         
-        # Store message in history
-        message_data = {
-            "sid": message_sid,
-            "from": from_number,
-            "to": to_number,
-            "body": message_body,
-            "timestamp": datetime.now().isoformat(),
-            "direction": "inbound"
-        }
-        message_history.append(message_data)
+        # Twilio retries webhooks that time out; hold back the retry until the
+        # first delivery has been answered, then repeat that answer
+        claim = threading.Event()
+        while True:
+            with message_sid_locks.hold(message_sid):
+                previous_reply = sms_replies.get(message_sid)
+                if previous_reply is None:
+                    in_flight = sms_in_flight.setdefault(message_sid, claim)
+            if previous_reply is not None:
+                logger.info("Duplicate SMS %s, repeating reply", message_sid,
+                            extra={"event": "sms_duplicate", "phone": from_number, "sid": message_sid})
+                _duplicate_sms.inc()
+                return twiml_reply(previous_reply)
+            if in_flight is claim:
+                break
+            if not in_flight.wait(SMS_RETRY_WAIT):
+                # Still being answered; that delivery will send the reply
+                return twiml_reply("")
+            # Answered (or failed without a reply, in which case this retry claims it)
         
-        # Process the message through the scavenger hunt game
-        response = MessagingResponse()
-        reply_message = process_scavenger_hunt_message(message_body, from_number)
-        response.message(reply_message)
-        
-        # Log the response
-        logger.info(f"Responding to {from_number}: {reply_message[:100]}...")
-        
-        # Store response in history
-        response_data = {
-            "sid": f"response_{message_sid}",
-            "from": to_number,
-            "to": from_number,
-            "body": reply_message,
-            "timestamp": datetime.now().isoformat(),
-            "direction": "outbound"
-        }
-        message_history.append(response_data)
-        
-        return str(response)
+        try:
+            return handle_sms(message_body, from_number, to_number, message_sid)
+        finally:
+            sms_in_flight.pop(message_sid, None)
+            claim.set()
     
-    except Exception as e:
-        logger.error(f"Error processing SMS webhook: {str(e)}")
+    except Exception:
+        logger.exception("Error processing SMS webhook", extra={"event": "sms_error"})
         response = MessagingResponse()
         response.message("Sorry, I encountered an error. Please try texting 'READY' to start the Portland Scavenger Hunt! 🎯")
         return str(response)
 
+def handle_sms(message_body, from_number, to_number, message_sid):
+    """Answer a new inbound SMS (now, or later in async mode) and remember the reply."""
+    # Log the incoming message (formatted later, off the request thread)
+    logger.info("Received SMS from %s: %s", from_number, message_body,
+                extra={"event": "sms_received", "phone": from_number, "sid": message_sid})
+    
+    # Store message in history
+    message_data = {
+        "sid": message_sid,
+        "from": from_number,
+        "to": to_number,
+        "body": message_body,
+        "timestamp": datetime.now().isoformat(),
+        "direction": "inbound"
+    }
+    message_history.append(message_data)
+    
+    # In async mode, acknowledge now and reply later through the REST API;
+    # a retry is then acknowledged with an empty reply
+    if reply_dispatcher and reply_dispatcher.submit(message_body, from_number, to_number, message_sid):
+        reply_message = ""
+    else:
+        # Process the message through the scavenger hunt game
+        reply_message = build_sms_reply(message_body, from_number, to_number, message_sid)
+    
+    if message_sid:
+        sms_replies.set(message_sid, reply_message)
+    return twiml_reply(reply_message)
+
+def render_twiml(reply_message):
+    response = MessagingResponse()
+    if reply_message:
+        response.message(reply_message)
+    return str(response).encode('utf-8')
+
+# TwiML for replies that are the same for every player (help, hints, ...),
+# rendered once per hunt instead of on every message
+static_twiml = {"": render_twiml("")}
+
+def cache_static_replies(hunt):
+    for reply_message in map(segment_compactor.apply, hunt.static_replies):
+        if reply_message not in static_twiml:
+            static_twiml[reply_message] = render_twiml(reply_message)
+
+def twiml_reply(reply_message):
+    """TwiML for an SMS reply; empty text acknowledges without replying."""
+    started = time.perf_counter()
+    cached = static_twiml.get(reply_message)
+    if cached is not None:
+        _twiml_cached.observe(time.perf_counter() - started)
+        return cached
+    twiml = render_twiml(reply_message)
+    _twiml_rendered.observe(time.perf_counter() - started)
+    return twiml
+
+for hosted_game in engine.games.values():
+    cache_static_replies(hosted_game.hunt)
+
+def build_sms_reply(message_body, from_number, to_number, message_sid):
+    """Run a message through the game and record the reply in the message history."""
+    started = time.perf_counter()
+    reply_message = process_scavenger_hunt_message(message_body, from_number, to_number)
+    reply_message, segments = segment_compactor.compact(reply_message)
+    
+    # Log the response
+    logger.info(
+        "Responding to %s (%s %s segments): %.100s...", from_number, segments.segments, segments.encoding, reply_message,
+        extra={"event": "sms_reply", "phone": from_number, "sid": message_sid,
+               "hunt": engine.game_for(from_number, to_number).hunt.hunt_id, "segments": segments.segments,
+               "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+    )
+    
+    # Store response in history
+    response_data = {
+        "sid": f"response_{message_sid}",
+        "from": to_number,
+        "to": from_number,
+        "body": reply_message,
+        "segments": segments.segments,
+        "encoding": segments.encoding,
+        "timestamp": datetime.now().isoformat(),
+        "direction": "outbound"
+    }
+    message_history.append(response_data)
+    
+    return reply_message
+
+def twilio_send(to_number, from_number, body):
+    """Send one SMS through the Twilio REST API."""
+    return twilio_client.messages.create(
+        body=body,
+        from_=from_number or Config.TWILIO_PHONE_NUMBER,
+        to=to_number
+    )
+
+# Outbound SMS go through one rate-limited, retrying send queue
+if twilio_client:
+    sms_queue = SendQueue(
+        twilio_send,
+        default_from=Config.TWILIO_PHONE_NUMBER,
+        workers=Config.SMS_SEND_WORKERS,
+        account_rate=Config.SMS_ACCOUNT_RATE,
+        number_rate=Config.SMS_NUMBER_RATE,
+        max_retries=Config.SMS_SEND_RETRIES
+    )
+else:
+    sms_queue = None
+
+def send_deferred_reply(to_number, from_number, body):
+    """Deliver a reply computed off the request thread via the Twilio REST API."""
+    sms_queue.send(to_number, body, from_number)
+
+# Deferred replies keep webhook requests short while OpenAI is slow
+if Config.ASYNC_SMS_REPLIES and twilio_client:
+    reply_dispatcher = ReplyDispatcher(
+        build_sms_reply,
+        send_deferred_reply,
+        workers=Config.REPLY_WORKERS,
+        queue_size=Config.REPLY_QUEUE_SIZE
+    )
+    logger.info(f"Async SMS replies enabled with {Config.REPLY_WORKERS} workers")
+else:
+    reply_dispatcher = None
+
 @app.route('/webhook/voice', methods=['POST'])
+@require_twilio_signature
 def voice_webhook():
     """Handle incoming voice calls with scavenger hunt information."""
     try:
@@ -121,7 +306,8 @@ def voice_webhook():
         call_status = request.form.get('CallStatus')
         
         # Log the incoming call
-        logger.info(f"Received call from {from_number}, status: {call_status}")
+        logger.info("Received call from %s, status: %s", from_number, call_status,
+                    extra={"event": "call_received", "phone": from_number, "sid": call_sid})
         
         # Store call in history
         call_data = {
@@ -140,7 +326,7 @@ def voice_webhook():
         voice_message = f"""Hello! You've reached the Portland Scavenger Hunt hotline. 
         This is a text-based game where you explore Portland's iconic locations. 
         To play, send a text message with the word READY to this number. 
-        You'll receive clues about 5 amazing Portland locations and earn points for correct answers. 
+        You'll receive clues about {game.hunt.clue_count} amazing Portland locations and earn points for correct answers. 
         The game uses artificial intelligence to understand your responses in natural language. 
         Have fun exploring Portland!"""
         
@@ -156,9 +342,42 @@ def voice_webhook():
         response.hangup()
         return str(response)
 
-def process_scavenger_hunt_message(message_body, from_number):
+UNKNOWN_JOIN_CODE = "🤔 I don't know that hunt code. Check the code and try 'JOIN <code>' again!"
+static_twiml[UNKNOWN_JOIN_CODE] = render_twiml(UNKNOWN_JOIN_CODE)
+
+COMMAND_WORDS = {
+    **dict.fromkeys(['ready', 'start', 'begin', 'play'], 'ready'),
+    **dict.fromkeys(['status', 'score', 'progress'], 'status'),
+    **dict.fromkeys(['help', 'info', 'instructions'], 'help'),
+    **dict.fromkeys(['quit', 'stop', 'exit'], 'quit')
+}
+_command_metrics = {
+    command: (COMMANDS.labels(command), MESSAGE_SECONDS.labels(command))
+    for command in ['ready', 'status', 'help', 'quit', 'join', 'answer']
+}
+
+def process_scavenger_hunt_message(message_body, from_number, to_number=None):
     """Process incoming message through the scavenger hunt game logic."""
     message_lower = message_body.lower().strip()
+    command = 'join' if message_lower.startswith('join ') else COMMAND_WORDS.get(message_lower, 'answer')
+    counter, seconds = _command_metrics[command]
+    counter.inc()
+    started = time.perf_counter()
+    try:
+        return dispatch_command(message_lower, message_body, from_number, to_number)
+    finally:
+        seconds.observe(time.perf_counter() - started)
+
+def dispatch_command(message_lower, message_body, from_number, to_number):
+    # JOIN <code> switches the player to another hunt and starts it
+    if message_lower.startswith('join '):
+        joined_game = engine.join(from_number, message_lower[5:], to_number)
+        if joined_game is None:
+            return UNKNOWN_JOIN_CODE
+        return joined_game.start_game(from_number)
+    
+    # Route to the hunt for this player / Twilio number
+    game = engine.game_for(from_number, to_number)
     
     # Handle game commands
     if message_lower in ['ready', 'start', 'begin', 'play']:
@@ -168,32 +387,12 @@ def process_scavenger_hunt_message(message_body, from_number):
         return game.get_status(from_number)
     
     elif message_lower in ['help', 'info', 'instructions']:
-        return """🎯 Portland Scavenger Hunt Help
-
-How to play:
-• Send 'READY' to start the game
-• Answer clues about Portland locations
-• Use natural language - I understand various ways to say the same thing!
-• Get hints if you're stuck (but they reduce your points)
-
-Scoring:
-• First try: 40 points
-• With 1 hint: 30 points
-• With 2 hints: 20 points  
-• With 3 hints: 10 points
-
-Commands:
-• READY - Start/restart game
-• STATUS - Check your progress
-• HELP - Show this message
-
-Ready to explore Portland? Send 'READY'! 🌲"""
+        return game.hunt.help
     
     elif message_lower in ['quit', 'stop', 'exit']:
         # Reset player's game
-        if from_number in game.players:
-            del game.players[from_number]
-        return "👋 Thanks for playing the Portland Scavenger Hunt! Send 'READY' anytime to play again! 🌲"
+        game.quit_game(from_number)
+        return game.hunt.goodbye
     
     else:
         # Process as a game answer
@@ -201,62 +400,140 @@ Ready to explore Portland? Send 'READY'! 🌲"""
 
 @app.route('/game-stats', methods=['GET'])
 def get_game_stats():
-    """Get overall game statistics."""
-    total_players = len(game.players)
-    active_players = sum(1 for p in game.players.values() if p["game_started"])
-    completed_games = sum(1 for p in game.players.values() if len(p["completed_clues"]) == 5)
-    
-    # Calculate average score for completed games
-    completed_scores = [p["total_score"] for p in game.players.values() if len(p["completed_clues"]) == 5]
-    avg_score = sum(completed_scores) / len(completed_scores) if completed_scores else 0
+    """Get overall game statistics (for one hunt with ?hunt=<id>)."""
+    game = engine.game(request.args.get('hunt'))
+    if game is None:
+        return jsonify({"error": "Unknown hunt"}), 404
     
-    return jsonify({
-        "total_players": total_players,
-        "active_players": active_players,
-        "completed_games": completed_games,
-        "average_score": round(avg_score, 1),
+    stats = game.stats.snapshot()
+    stats.update({
+        "hunt": game.hunt.hunt_id,
+        "hunts": sorted(engine.games),
+        "verdict_cache": game.verdict_cache.stats(),
+        "sms_segments": segment_compactor.stats.snapshot(),
         "game_info": {
             "total_clues": len(game.clues),
-            "max_possible_score": 200,
+            "max_possible_score": game.hunt.max_score,
             "locations": [clue["location"] for clue in game.clues]
         }
     })
+    
+    # ?verify=true recomputes the counters with full scans (slow, for tests)
+    if request.args.get('verify', '').lower() == 'true':
+        stats["consistent"] = game.stats.is_consistent(
+            game.players.values(), game.leaderboard.score_counts()
+        )
+    
+    return jsonify(stats)
+
+REGISTRY.gauge("scavenger_active_players", "Players with a game in progress, across hunts",
+               lambda: sum(hosted.stats.active_players for hosted in engine.games.values()))
+REGISTRY.gauge("scavenger_sms_send_queue_pending", "Outbound SMS waiting to be sent",
+               lambda: sms_queue.pending() if sms_queue else 0)
+REGISTRY.gauge("scavenger_log_records_dropped", "Log records dropped because the log queue was full",
+               lambda: getattr(log_handler, 'dropped', 0))
+REGISTRY.gauge("scavenger_async_replies_pending", "Inbound SMS waiting for an async reply",
+               lambda: reply_dispatcher.pending() if reply_dispatcher else 0)
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Hot-path timings and counters for this worker, in the Prometheus text format."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/profile', methods=['GET'])
+def download_profile():
+    """Collapsed stacks of profiled SMS webhooks in this worker, for flamegraph tools (admin use)."""
+    stacks = request_profiler.collapsed()
+    if request.args.get('reset', '').lower() == 'true':
+        request_profiler.reset()
+    return Response(stacks, mimetype='text/plain', headers={
+        "Content-Disposition": f"attachment; filename=sms-webhook-{os.getpid()}.folded"
+    })
+
+@app.route('/profile', methods=['POST'])
+def configure_profile():
+    """Change the profiled fraction of SMS webhooks at runtime (admin use)."""
+    data = request.get_json(silent=True) or {}
+    if 'sample_rate' in data:
+        try:
+            sample_rate = float(data['sample_rate'])
+        except (TypeError, ValueError):
+            sample_rate = -1
+        if not 0 <= sample_rate <= 1:
+            return jsonify({"error": "sample_rate must be between 0 and 1"}), 400
+        request_profiler.sample_rate = sample_rate
+    if data.get('reset'):
+        request_profiler.reset()
+    return jsonify(request_profiler.stats())
 
 @app.route('/leaderboard', methods=['GET'])
 def get_leaderboard():
-    """Get leaderboard of top scores."""
-    # Get all completed games with scores
-    completed_players = []
-    for phone, player_data in game.players.items():
-        if len(player_data["completed_clues"]) == 5:
-            completed_players.append({
-                "phone": phone[-4:],  # Only show last 4 digits for privacy
-                "score": player_data["total_score"],
-                "completion_time": player_data.get("start_time", "Unknown")
-            })
+    """Get leaderboard of top scores (for one hunt with ?hunt=<id>)."""
+    game = engine.game(request.args.get('hunt'))
+    if game is None:
+        return jsonify({"error": "Unknown hunt"}), 404
     
-    # Sort by score (descending)
-    leaderboard = sorted(completed_players, key=lambda x: x["score"], reverse=True)[:10]
+    return jsonify({
+        "hunt": game.hunt.hunt_id,
+        "leaderboard": game.leaderboard.top(),
+        "total_completed_games": game.leaderboard.total_completed
+    })
+
+# Largest page the paged history and Twilio data routes return
+MAX_PAGE_SIZE = 500
+
+def history_page(history, key):
+    """Serve one page of a history buffer using the request's paging and filter args."""
+    try:
+        cursor = int(request.args.get('cursor', 0))
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({"error": "'cursor' and 'limit' must be integers"}), 400
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({"error": f"'limit' must be between 1 and {MAX_PAGE_SIZE}"}), 400
     
+    records, next_cursor = history.page(
+        cursor=cursor,
+        limit=limit,
+        phone=request.args.get('phone'),
+        direction=request.args.get('direction')
+    )
     return jsonify({
-        "leaderboard": leaderboard,
-        "total_completed_games": len(completed_players)
+        key: records,
+        "count": len(records),
+        "total": len(history),
+        "next_cursor": next_cursor
     })
 
 @app.route('/messages', methods=['GET'])
 def get_messages():
-    """Get message history."""
-    return jsonify({
-        "messages": message_history,
-        "count": len(message_history)
-    })
+    """Get message history (paged with ?cursor=&limit=, filtered by ?phone=&direction=)."""
+    return history_page(message_history, "messages")
 
 @app.route('/calls', methods=['GET'])
 def get_calls():
-    """Get call history."""
+    """Get call history (paged with ?cursor=&limit=, filtered by ?phone=&direction=)."""
+    return history_page(call_history, "calls")
+
+@app.route('/reload-hunt', methods=['POST'])
+def reload_hunt():
+    """Reload a hunt definition file (admin use); unchanged files are served from cache."""
+    game = engine.game(request.args.get('hunt'))
+    if game is None:
+        return jsonify({"error": "Unknown hunt"}), 404
+    
+    try:
+        hunt = game.reload_hunt()
+    except (OSError, HuntValidationError) as e:
+        logger.error(f"Error reloading hunt: {str(e)}")
+        return jsonify({"error": str(e)}), 400
+    cache_static_replies(hunt)
+    
     return jsonify({
-        "calls": call_history,
-        "count": len(call_history)
+        "hunt": hunt.hunt_id,
+        "name": hunt.name,
+        "clues": hunt.clue_count,
+        "source_hash": hunt.source_hash
     })
 
 @app.route('/send-sms', methods=['POST'])
@@ -273,14 +550,11 @@ def send_sms():
         if not to_number or not message_body:
             return jsonify({"error": "Missing 'to' or 'message' parameter"}), 400
         
-        # Send message via Twilio
-        message = twilio_client.messages.create(
-            body=message_body,
-            from_=Config.TWILIO_PHONE_NUMBER,
-            to=to_number
-        )
+        # Send message via Twilio (rate limited, retried on 429/5xx)
+        message = sms_queue.send(to_number, message_body)
         
-        logger.info(f"Sent SMS to {to_number}: {message_body}")
+        logger.info("Sent SMS to %s: %s", to_number, message_body,
+                    extra={"event": "sms_sent", "phone": to_number, "sid": message.sid})
         
         return jsonify({
             "success": True,
@@ -292,54 +566,178 @@ def send_sms():
         logger.error(f"Error sending SMS: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/broadcast', methods=['POST'])
+def broadcast_sms():
+    """Queue an SMS to every active player of a hunt (for admin use)."""
+    if not sms_queue:
+        return jsonify({"error": "Twilio client not configured"}), 500
+    
+    data = request.get_json() or {}
+    message_body = data.get('message')
+    if not message_body:
+        return jsonify({"error": "Missing 'message' parameter"}), 400
+    
+    game = engine.game(data.get('hunt'))
+    if game is None:
+        return jsonify({"error": "Unknown hunt"}), 404
+    
+    # Players who haven't started (or just finished) are skipped unless asked for
+    include_inactive = data.get('include_inactive', False)
+    recipients = [
+        phone_number for phone_number, player in game.players.items()
+        if include_inactive or player.game_started
+    ]
+    
+    # Send from the number routed to this hunt, if it has one
+    from_number = next(
+        (number for number, hunt_id in engine.routes.items() if hunt_id == game.hunt.hunt_id),
+        Config.TWILIO_PHONE_NUMBER
+    )
+    message_body = segment_compactor.apply(message_body)
+    result = sms_queue.broadcast(recipients, message_body, from_number)
+    logger.info("Broadcast to %s players of %s: %s", result['queued'], game.hunt.hunt_id, message_body,
+                extra={"event": "sms_broadcast", "hunt": game.hunt.hunt_id})
+    
+    result.update({
+        "hunt": game.hunt.hunt_id,
+        "segments": segment_info(message_body).segments,
+        "send_queue": sms_queue.stats()
+    })
+    return jsonify(result), 202
+
+def fetch_twilio_data():
+    """Fetch the most recent messages and calls from the Twilio account."""
+    messages_data = []
+    for msg in twilio_client.messages.list(limit=Config.TWILIO_DATA_DEPTH):
+        messages_data.append({
+            "sid": msg.sid,
+            "from": msg.from_,
+            "to": msg.to,
+            "body": msg.body,
+            "status": msg.status,
+            "direction": msg.direction,
+            "date_created": msg.date_created.isoformat() if msg.date_created else None
+        })
+    
+    calls_data = []
+    for call in twilio_client.calls.list(limit=Config.TWILIO_DATA_DEPTH):
+        calls_data.append({
+            "sid": call.sid,
+            "from": call.from_,
+            "to": call.to,
+            "status": call.status,
+            "direction": call.direction,
+            "duration": call.duration,
+            "date_created": call.date_created.isoformat() if call.date_created else None
+        })
+    
+    return {"messages": messages_data, "calls": calls_data}
+
+# Admin dashboards read a snapshot refreshed in the background instead of
+# calling the Twilio API on every request
+twilio_snapshot = SnapshotCache(fetch_twilio_data, ttl=Config.TWILIO_DATA_TTL) if twilio_client else None
+
+def page_after(records, cursor, limit):
+    """Records after the one with sid == cursor (from the start without a cursor)."""
+    start = 0
+    if cursor:
+        sids = [record["sid"] for record in records]
+        if cursor not in sids:
+            return None, None
+        start = sids.index(cursor) + 1
+    page = records[start:start + limit]
+    next_cursor = page[-1]["sid"] if page and start + limit < len(records) else None
+    return page, next_cursor
+
 @app.route('/twilio-data', methods=['GET'])
 def get_twilio_data():
-    """Fetch recent data from Twilio account."""
+    """Recent data from the Twilio account, served from a background-refreshed snapshot.
+    
+    Without ?kind= returns the latest 20 messages and 10 calls. With
+    ?kind=messages or ?kind=calls pages through one list using ?cursor=<sid>&limit=.
+    """
     try:
-        if not twilio_client:
+        if not twilio_snapshot:
             return jsonify({"error": "Twilio client not configured"}), 500
         
-        # Fetch recent messages
-        recent_messages = twilio_client.messages.list(limit=20)
-        messages_data = []
-        for msg in recent_messages:
-            messages_data.append({
-                "sid": msg.sid,
-                "from": msg.from_,
-                "to": msg.to,
-                "body": msg.body,
-                "status": msg.status,
-                "direction": msg.direction,
-                "date_created": msg.date_created.isoformat() if msg.date_created else None
-            })
+        snapshot, stale = twilio_snapshot.get()
+        info = dict(twilio_snapshot.stats(), stale=stale)
         
-        # Fetch recent calls
-        recent_calls = twilio_client.calls.list(limit=10)
-        calls_data = []
-        for call in recent_calls:
-            calls_data.append({
-                "sid": call.sid,
-                "from": call.from_,
-                "to": call.to,
-                "status": call.status,
-                "direction": call.direction,
-                "duration": call.duration,
-                "date_created": call.date_created.isoformat() if call.date_created else None
+        kind = request.args.get('kind')
+        if not kind:
+            return jsonify({
+                "messages": snapshot["messages"][:20],
+                "calls": snapshot["calls"][:10],
+                "account_sid": Config.TWILIO_ACCOUNT_SID,
+                "snapshot": info
             })
+        if kind not in ('messages', 'calls'):
+            return jsonify({"error": "'kind' must be 'messages' or 'calls'"}), 400
         
+        try:
+            limit = int(request.args.get('limit', 50))
+        except ValueError:
+            return jsonify({"error": "'limit' must be an integer"}), 400
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            return jsonify({"error": f"'limit' must be between 1 and {MAX_PAGE_SIZE}"}), 400
+        
+        records, next_cursor = page_after(snapshot[kind], request.args.get('cursor'), limit)
+        if records is None:
+            return jsonify({"error": "Cursor is no longer in the snapshot; start again without one"}), 410
         return jsonify({
-            "messages": messages_data,
-            "calls": calls_data,
-            "account_sid": Config.TWILIO_ACCOUNT_SID
+            kind: records,
+            "count": len(records),
+            "total": len(snapshot[kind]),
+            "next_cursor": next_cursor,
+            "snapshot": info
         })
     
     except Exception as e:
         logger.error(f"Error fetching Twilio data: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+def drain(timeout=None):
+    """Finish background work before the process exits, so a deploy doesn't drop messages.
+    
+    Called by gunicorn (see gunicorn.conf.py) once a worker has stopped taking requests.
+    `timeout` is one budget for all of the stages below, not one per stage.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    
+    def remaining():
+        return None if deadline is None else max(deadline - time.monotonic(), 0)
+    
+    def shared(attribute):
+        # Hunts share the OpenAI client, answer batcher and sometimes a player
+        # store; each is shut down once
+        unique = {}
+        for hosted_game in engine.games.values():
+            value = getattr(hosted_game, attribute)
+            if value is not None:
+                unique.setdefault(id(value), value)
+        return list(unique.values())
+    
+    # Deferred replies first: they still need the answer batcher and the send queue
+    if reply_dispatcher:
+        reply_dispatcher.shutdown(remaining())
+    for answer_batcher in shared('answer_batcher'):
+        answer_batcher.shutdown(remaining())
+    if sms_queue:
+        sms_queue.shutdown(remaining())
+    for players in shared('players'):
+        players.close()  # commits batched SQLite writes
+    for openai_client in shared('openai_client'):
+        openai_client.close()
+    message_history.close()
+    call_history.close()
+    logger.info("Background work drained")
+    if hasattr(log_handler, 'stop'):
+        log_handler.stop()
+
 if __name__ == '__main__':
     # Get port from environment (Codespaces sets this)
     port = int(os.environ.get('PORT', 5000))
     
-    # In Codespaces, we need to bind to all interfaces
-    app.run(debug=True, host='0.0.0.0', port=port) 
\ No newline at end of file
+    # In Codespaces, we need to bind to all interfaces. This is the development
+    # server; use `gunicorn -c gunicorn.conf.py app:app` in production
+    app.run(debug=Config.DEBUG, host='0.0.0.0', port=port) 
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""
+Bounded LRU + TTL cache with optional SQLite backing.
+The in-memory layer keeps hot entries per process; the SQLite file lets
+entries survive restarts and be shared between gunicorn workers.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600,
+                 db_path: Optional[str] = None, table: str = "cache", purge_interval: float = 300):
+        """
+        Args:
+            max_size: entries kept in memory (the SQLite table is bounded by the TTL)
+            ttl: seconds an entry lives
+            db_path: SQLite file backing the cache, or None for memory only
+            table: table name in that file
+            purge_interval: seconds between deleting expired rows from the table
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._next_purge = time.time() + purge_interval
+        self.table = table
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.db_path = db_path
+        self._conn = None
+        self._pid = None
+
+        if db_path:
+            self._connect()
+
+    @property
+    def _db(self) -> Optional[sqlite3.Connection]:
+        return self._connect() if self.db_path else None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Reconnect after a fork (e.g. gunicorn --preload): SQLite connections must not cross processes
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_expires_at ON {self.table} (expires_at)")
+        self._conn = conn
+        self._pid = os.getpid()
+        return conn
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    value = json.loads(row[0])
+                    self._store(key, row[1], value)
+                    self.hits += 1
+                    return value
+
+            self.misses += 1
+            return default
+
+    def set(self, key: str, value: Any) -> None:
+        """Cache a JSON-serializable value under key."""
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._store(key, expires_at, value)
+            if self._db is not None:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at)
+                )
+                # Rows are only read back while fresh; without this the table
+                # would keep every key ever written
+                if now >= self._next_purge:
+                    self._next_purge = now + self.purge_interval
+                    self._delete_expired()
+
+    def clear(self) -> None:
+        """Drop every entry, including the on-disk copy."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute(f"DELETE FROM {self.table}")
+
+    def purge_expired(self) -> int:
+        """Remove expired rows from the on-disk table; returns the number removed."""
+        if self._db is None:
+            return 0
+        with self._lock:
+            return self._delete_expired()
+
+    def _delete_expired(self) -> int:
+        return self._db.execute(
+            f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),)
+        ).rowcount
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "persistent": self.db_path is not None
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _store(self, key: str, expires_at: float, value: Any) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
@@ -11,11 +11,103 @@ class Config:
     TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID')
     TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN')
     TWILIO_PHONE_NUMBER = os.environ.get('TWILIO_PHONE_NUMBER')
+    TWILIO_API_BASE_URL = os.environ.get('TWILIO_API_BASE_URL')  # override, e.g. a local stub
+    
+    # /twilio-data snapshot: refreshed in the background every TTL seconds,
+    # keeping the latest DEPTH messages and calls for paging
+    TWILIO_DATA_TTL = float(os.environ.get('TWILIO_DATA_TTL', 30))
+    TWILIO_DATA_DEPTH = int(os.environ.get('TWILIO_DATA_DEPTH', 200))
+    
+    # Outbound SMS send queue: worker threads, token-bucket rates (messages per
+    # second for the account and for each sending number) and retries on 429/5xx
+    SMS_SEND_WORKERS = int(os.environ.get('SMS_SEND_WORKERS', 4))
+    SMS_ACCOUNT_RATE = float(os.environ.get('SMS_ACCOUNT_RATE', 30))
+    SMS_NUMBER_RATE = float(os.environ.get('SMS_NUMBER_RATE', 1))
+    SMS_SEND_RETRIES = int(os.environ.get('SMS_SEND_RETRIES', 3))
+    
+    # Reply compaction: drop emoji/substitute characters so replies stay in GSM-7
+    # (160 chars per segment instead of 70), and trim to a segment budget (0 = no limit)
+    SMS_GSM7_ONLY = os.environ.get('SMS_GSM7_ONLY', 'False').lower() == 'true'
+    SMS_MAX_SEGMENTS = int(os.environ.get('SMS_MAX_SEGMENTS', 0))
     
     # Flask Configuration
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
     DEBUG = os.environ.get('FLASK_DEBUG', 'True').lower() == 'true'
     
+    # Webhook signature validation (X-Twilio-Signature), on by default outside
+    # debug mode (gunicorn.conf.py turns it on regardless). Secondary tokens are accepted while rotating the auth token;
+    # the base URL is the public scheme://host when running behind a proxy
+    TWILIO_VALIDATE_SIGNATURES = os.environ.get('TWILIO_VALIDATE_SIGNATURES', str(not DEBUG)).lower() == 'true'
+    TWILIO_SECONDARY_AUTH_TOKENS = [
+        token.strip() for token in os.environ.get('TWILIO_SECONDARY_AUTH_TOKENS', '').split(',') if token.strip()
+    ]
+    TWILIO_WEBHOOK_BASE_URL = os.environ.get('TWILIO_WEBHOOK_BASE_URL')
+    
+    # Logging: 'text' or 'json' lines (phone numbers hashed), written by a
+    # background thread in batches; sample rates thin out high-volume events,
+    # e.g. LOG_SAMPLE_RATES=sms_received=0.1,answer=0.1
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text').lower()
+    LOG_ASYNC = os.environ.get('LOG_ASYNC', 'True').lower() == 'true'
+    LOG_FILE = os.environ.get('LOG_FILE')
+    LOG_BATCH_SIZE = int(os.environ.get('LOG_BATCH_SIZE', 100))
+    LOG_SAMPLE_RATES = os.environ.get('LOG_SAMPLE_RATES')
+    
+    # Sampling profiler for /webhook/sms: profile this fraction of requests
+    # (0 = off; can also be changed at runtime with POST /profile)
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 5))
+    PROFILE_MAX_STACKS = int(os.environ.get('PROFILE_MAX_STACKS', 5000))
+    
+    # Async SMS replies: acknowledge the webhook immediately and send the
+    # reply from a background worker via the Twilio REST API
+    ASYNC_SMS_REPLIES = os.environ.get('ASYNC_SMS_REPLIES', 'False').lower() == 'true'
+    REPLY_WORKERS = int(os.environ.get('REPLY_WORKERS', 8))
+    REPLY_QUEUE_SIZE = int(os.environ.get('REPLY_QUEUE_SIZE', 1000))
+    
+    # Replies remembered by MessageSid so retried webhooks are answered from cache
+    SMS_REPLY_CACHE_SIZE = int(os.environ.get('SMS_REPLY_CACHE_SIZE', 10000))
+    SMS_REPLY_CACHE_TTL = int(os.environ.get('SMS_REPLY_CACHE_TTL', 3600))
+    SMS_REPLY_CACHE_PATH = os.environ.get('SMS_REPLY_CACHE_PATH')  # SQLite file, optional
+    
+    # OpenAI answer verification: pooled client with per-call deadline, retries
+    # and a circuit breaker that falls back to local matching
+    OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL', 'https://api.openai.com/v1')
+    OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-3.5-turbo')
+    OPENAI_TIMEOUT = float(os.environ.get('OPENAI_TIMEOUT', 3.0))
+    OPENAI_MAX_RETRIES = int(os.environ.get('OPENAI_MAX_RETRIES', 2))
+    OPENAI_BREAKER_ERROR_RATE = float(os.environ.get('OPENAI_BREAKER_ERROR_RATE', 0.5))
+    OPENAI_BREAKER_LATENCY = float(os.environ.get('OPENAI_BREAKER_LATENCY', 2.0))
+    OPENAI_BREAKER_RESET = float(os.environ.get('OPENAI_BREAKER_RESET', 30))
+    # Micro-batching: uncertain answers to one clue wait up to OPENAI_BATCH_WAIT_MS
+    # and are judged together, up to OPENAI_BATCH_SIZE per prompt (1 disables)
+    OPENAI_BATCH_SIZE = int(os.environ.get('OPENAI_BATCH_SIZE', 20))
+    OPENAI_BATCH_WAIT_MS = float(os.environ.get('OPENAI_BATCH_WAIT_MS', 10))
+    
+    # Answer verdict cache (repeat answers skip the OpenAI call)
+    VERDICT_CACHE_SIZE = int(os.environ.get('VERDICT_CACHE_SIZE', 10000))
+    VERDICT_CACHE_TTL = int(os.environ.get('VERDICT_CACHE_TTL', 86400))
+    VERDICT_CACHE_PATH = os.environ.get('VERDICT_CACHE_PATH')  # SQLite file, optional
+    
+    # Hunt definition file (JSON, or YAML with PyYAML installed)
+    HUNT_FILE = os.environ.get('HUNT_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hunts', 'portland.json'))
+    
+    # Extra hunts to host (directory of hunt files) and Twilio number routing,
+    # e.g. HUNT_ROUTES=+15035550100=portland,+12065550100=seattle
+    HUNT_DIR = os.environ.get('HUNT_DIR')
+    HUNT_ROUTES = os.environ.get('HUNT_ROUTES')
+    
+    # Player state storage: 'memory' (per process) or 'sqlite' (shared, persistent)
+    PLAYER_STORE = os.environ.get('PLAYER_STORE', 'memory').lower()
+    PLAYER_DB_PATH = os.environ.get('PLAYER_DB_PATH', 'players.sqlite3')
+    # Per-player locks: a fixed pool shared by all phone numbers
+    PLAYER_LOCK_STRIPES = int(os.environ.get('PLAYER_LOCK_STRIPES', 256))
+    
+    # Message/call history: ring buffer size and optional append-only log files
+    HISTORY_SIZE = int(os.environ.get('HISTORY_SIZE', 1000))
+    MESSAGE_LOG_PATH = os.environ.get('MESSAGE_LOG_PATH')
+    CALL_LOG_PATH = os.environ.get('CALL_LOG_PATH')
+    
     # Webhook URLs (for reference)
     SMS_WEBHOOK_URL = '/webhook/sms'
     VOICE_WEBHOOK_URL = '/webhook/voice'
@@ -0,0 +1,121 @@
+"""
+Running aggregates for the /game-stats endpoint.
+Counters are updated by the game's state transitions so reading them doesn't
+scan the players; recompute() rebuilds the same numbers from scratch to check
+consistency in tests. With a SQLite player store the counters are kept there.
+"""
+
+import threading
+from typing import Dict, Iterable
+
+
+class GameStats:
+    """Incrementally maintained player, completion and hint counters.
+
+    Counters live in this process, or, with a shared player store, in the
+    store, so every worker reports the same numbers and they survive restarts.
+    """
+
+    def __init__(self, total_players: int = 0, active_players: int = 0, store=None):
+        self._store = store if store is not None and store.shared else None
+        self._counts = {}  # counter name -> value (when not kept in the store)
+        self._lock = threading.Lock()
+        # Seeded from the existing players the first time; later starts keep the stored totals
+        initial = {"total_players": total_players, "active_players": active_players}
+        if self._store is not None:
+            self._store.seed_counts(initial)
+        else:
+            self._counts.update(initial)
+
+    @property
+    def total_players(self) -> int:
+        return self._read().get("total_players", 0)
+
+    @property
+    def active_players(self) -> int:
+        return self._read().get("active_players", 0)
+
+    @property
+    def completed_games(self) -> int:
+        return self._read().get("completed_games", 0)
+
+    def player_added(self) -> None:
+        self._add({"total_players": 1})
+
+    def player_removed(self, was_active: bool) -> None:
+        self._add({"total_players": -1, "active_players": -1 if was_active else 0})
+
+    def game_started(self) -> None:
+        self._add({"active_players": 1})
+
+    def game_ended(self) -> None:
+        self._add({"active_players": -1})
+
+    def clue_finished(self, clue_id: int, hints_used: int) -> None:
+        self._add({f"clue_hints:{clue_id}:{hints_used}": 1})
+
+    def game_completed(self, score: int) -> None:
+        self._add({"completed_games": 1, "score_sum": score, f"score:{score}": 1})
+
+    def snapshot(self) -> Dict:
+        """Current counters in the /game-stats response shape."""
+        counts = self._read()
+        score_histogram = {}
+        clue_hints = {}
+        for name, value in counts.items():
+            if name.startswith("score:"):
+                score_histogram[int(name[6:])] = value
+            elif name.startswith("clue_hints:"):
+                clue_id, hints_used = (int(part) for part in name[11:].split(":"))
+                hint_counts = clue_hints.setdefault(clue_id, [])
+                if len(hint_counts) <= hints_used:
+                    hint_counts.extend([0] * (hints_used + 1 - len(hint_counts)))
+                hint_counts[hints_used] = value
+        completed_games = counts.get("completed_games", 0)
+        return {
+            "total_players": counts.get("total_players", 0),
+            "active_players": counts.get("active_players", 0),
+            "completed_games": completed_games,
+            "average_score": round(counts.get("score_sum", 0) / completed_games, 1) if completed_games else 0,
+            "score_histogram": dict(sorted(score_histogram.items())),
+            "clue_hints": dict(sorted(clue_hints.items()))
+        }
+
+    def _add(self, counts: Dict[str, int]) -> None:
+        if self._store is not None:
+            self._store.add_counts(counts)
+            return
+        with self._lock:
+            for name, value in counts.items():
+                self._counts[name] = self._counts.get(name, 0) + value
+
+    def _read(self) -> Dict[str, int]:
+        if self._store is not None:
+            return self._store.counts()
+        with self._lock:
+            return dict(self._counts)
+
+    def is_consistent(self, players: Iterable, score_counts: Dict[int, int]) -> bool:
+        """Check the running counters against a full recomputation."""
+        expected = self.recompute(players, score_counts)
+        current = self.snapshot()
+        return all(current[key] == value for key, value in expected.items())
+
+    @staticmethod
+    def recompute(players: Iterable, score_counts: Dict[int, int]) -> Dict:
+        """Rebuild the player and completion counters with full scans.
+
+        Completed players are reset after their final score, so completion
+        numbers come from the leaderboard's per-score counts. Per-clue hint
+        counts cannot be rebuilt from current state and are not included.
+        """
+        players = list(players)
+        completed_games = sum(score_counts.values())
+        score_sum = sum(score * count for score, count in score_counts.items())
+        return {
+            "total_players": len(players),
+            "active_players": sum(1 for p in players if p.game_started),
+            "completed_games": completed_games,
+            "average_score": round(score_sum / completed_games, 1) if completed_games else 0,
+            "score_histogram": dict(sorted(score_counts.items()))
+        }
@@ -0,0 +1,114 @@
+"""
+Production gunicorn settings for the scavenger hunt.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+The app and its hunts are loaded once in the master and shared copy-on-write
+by the forked workers. Workers are threaded (gthread): with OpenAI answer
+checks enabled requests mostly wait on the network, so each worker gets more
+threads. On SIGTERM a worker stops accepting connections, finishes in-flight
+webhooks, then drains deferred replies, queued SMS and batched player writes
+before exiting. Every setting can be overridden with the GUNICORN_* variables
+below (or gunicorn's own command-line flags).
+"""
+
+import gc
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+from dotenv import load_dotenv
+
+# Webhooks served by gunicorn are public, so Twilio signatures are checked
+# unless TWILIO_VALIDATE_SIGNATURES turns that off explicitly (FLASK_DEBUG,
+# which defaults to True, doesn't)
+load_dotenv()
+os.environ.setdefault('TWILIO_VALIDATE_SIGNATURES', 'True')
+
+from config import Config  # noqa: E402
+from llm_client import openai_configured  # noqa: E402
+
+ai_matching = openai_configured()
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+
+# The in-memory player store (with the leaderboard, /game-stats counters and JOIN
+# choices) lives in one process, so it needs a single worker; with
+# PLAYER_STORE=sqlite all of it is shared and workers can scale with CPUs
+default_workers = 1 if Config.PLAYER_STORE == 'memory' else multiprocessing.cpu_count() * 2 + 1
+workers = int(os.environ.get('GUNICORN_WORKERS', default_workers))
+
+# gthread in both modes; AI matching only raises the thread count. gevent (if
+# installed) also suits OpenAI-bound load, but isn't picked automatically: it
+# must monkey-patch before the app is imported, so it turns off preloading, and
+# the answer batcher, reply and send queues would run as greenlets
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 16 if ai_matching else 4))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))  # gevent only
+
+# Load the app (hunt files, compiled answer indexes, cached TwiML) before forking
+preload_app = os.environ.get('GUNICORN_PRELOAD', str(worker_class != 'gevent')).lower() == 'true'
+
+# Longer than a load balancer's idle timeout (commonly 60s), so it closes first
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 75))
+backlog = int(os.environ.get('GUNICORN_BACKLOG', 2048))
+
+# Twilio gives up on a webhook after 15s; graceful_timeout bounds the drain on SIGTERM
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+# Seconds of graceful_timeout left unused by the drain, so it finishes before
+# the master's SIGKILL
+drain_margin = float(os.environ.get('GUNICORN_DRAIN_MARGIN', 2))
+
+# No max_requests: recycling a worker would lose in-memory player state
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')  # e.g. '-' for stdout; off by default
+errorlog = '-'
+loglevel = Config.LOG_LEVEL.lower()
+
+
+def when_ready(server):
+    if preload_app:
+        # Keep the preloaded objects out of the workers' garbage collections, so
+        # collecting doesn't touch (and copy) the pages shared with the master
+        gc.freeze()
+    if Config.PLAYER_STORE == 'memory' and workers > 1:
+        server.log.warning("PLAYER_STORE=memory with %s workers: each worker has its own players, "
+                           "leaderboard, game stats and JOIN choices", workers)
+    if not Config.TWILIO_VALIDATE_SIGNATURES:
+        server.log.warning("TWILIO_VALIDATE_SIGNATURES is off: webhooks are accepted without a Twilio signature")
+    server.log.info("Serving with %s %s worker(s), %s thread(s) each, AI matching %s",
+                    workers, worker_class, threads, "on" if ai_matching else "off")
+
+
+def post_worker_init(worker):
+    # gunicorn has no SIGTERM hook: note when shutdown starts, then hand over
+    # to the worker's own handler
+    handle_exit = worker.handle_exit
+
+    def note_shutdown(sig, frame):
+        note_shutdown_started(worker)
+        handle_exit(sig, frame)
+
+    signal.signal(signal.SIGTERM, note_shutdown)
+
+
+def note_shutdown_started(worker):
+    if getattr(worker, 'shutdown_started', None) is None:
+        worker.shutdown_started = time.monotonic()
+
+
+# SIGINT/SIGQUIT and SIGABRT (a worker timing out) also end the worker
+worker_int = worker_abort = note_shutdown_started
+
+
+def worker_exit(server, worker):
+    # Runs in the worker after it has stopped serving (SIGTERM, or SIGHUP on
+    # reload). The master kills it graceful_timeout after the signal, and
+    # finishing in-flight webhooks has used part of that already
+    app_module = sys.modules.get('app')
+    if app_module is not None:
+        started = getattr(worker, 'shutdown_started', None)
+        elapsed = time.monotonic() - started if started is not None else 0
+        app_module.drain(timeout=max(graceful_timeout - elapsed - drain_margin, 0))
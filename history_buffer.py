@@ -0,0 +1,66 @@
+"""
+Fixed-capacity message/call history.
+Keeps the most recent records in a ring buffer, optionally spills every record
+to an append-only JSON lines file, and serves cursor-based pages.
+"""
+
+import json
+import threading
+from collections import deque
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+
+
+class HistoryBuffer:
+    """Ring buffer of history records addressed by a monotonically increasing cursor."""
+
+    def __init__(self, capacity: int = 1000, log_path: Optional[str] = None):
+        self.capacity = capacity
+        self._records = deque(maxlen=capacity)  # (cursor, record)
+        self._next_cursor = 1
+        self._lock = threading.Lock()
+        self._log = open(log_path, "a", encoding="utf-8", buffering=1) if log_path else None
+
+    def append(self, record: Dict) -> None:
+        """Add a record, evicting the oldest one when the buffer is full."""
+        with self._lock:
+            self._records.append((self._next_cursor, record))
+            self._next_cursor += 1
+            if self._log is not None:
+                self._log.write(json.dumps(record) + "\n")
+
+    def page(self, cursor: int = 0, limit: int = 50, phone: Optional[str] = None,
+             direction: Optional[str] = None) -> Tuple[List[Dict], Optional[int]]:
+        """Return up to `limit` records newer than `cursor`, oldest first.
+
+        Records can be filtered by phone number (either side) and direction.
+        The second value is the cursor for the next page, or None at the end.
+        """
+        with self._lock:
+            if not self._records:
+                return [], None
+            # Cursors are contiguous, so the starting offset is computed directly
+            first_cursor = self._records[0][0]
+            start = max(cursor - first_cursor + 1, 0)
+            candidates = list(islice(self._records, start, None))
+
+        results = []
+        last_cursor = cursor
+        for record_cursor, record in candidates:
+            if phone and phone not in (record.get("from"), record.get("to")):
+                continue
+            if direction and record.get("direction") != direction:
+                continue
+            if len(results) == limit:
+                return results, last_cursor
+            results.append(record)
+            last_cursor = record_cursor
+        return results, None
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def close(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
@@ -0,0 +1,107 @@
+"""
+Multi-hunt engine.
+Hosts several concurrent hunts in one process, each with its own clues and
+player namespace, while sharing the verdict cache, OpenAI client and answer batcher. Inbound
+messages are routed by the Twilio number they were sent to, or by a join code
+the player texted ("JOIN PDX"), falling back to the default hunt.
+"""
+
+import threading
+from typing import Dict, Optional
+
+from config import Config
+from hunt_loader import HuntValidationError, find_hunt_files, load_hunt
+from player_store import create_player_store
+from scavenger_game import ScavengerHuntGame
+
+
+class HuntEngine:
+    """Routes players to one of several ScavengerHuntGame instances."""
+
+    def __init__(self, default_game: ScavengerHuntGame):
+        self.default_game = default_game
+        self.games = {}  # hunt_id -> game
+        self.routes = {}  # Twilio number -> hunt_id
+        self._join_codes = {}  # join code -> hunt_id
+        self._lock = threading.Lock()
+        self.add_game(default_game)
+
+    def add_game(self, game: ScavengerHuntGame) -> ScavengerHuntGame:
+        """Host another hunt."""
+        hunt = game.hunt
+        if hunt.join_code in self._join_codes and self._join_codes[hunt.join_code] != hunt.hunt_id:
+            raise HuntValidationError(f"Join code '{hunt.join_code}' is already used by another hunt")
+        self.games[hunt.hunt_id] = game
+        if hunt.join_code:
+            self._join_codes[hunt.join_code] = hunt.hunt_id
+        return game
+
+    def add_hunt_file(self, hunt_file: str) -> ScavengerHuntGame:
+        """Host the hunt in a file, sharing this engine's verdict cache and OpenAI client."""
+        hunt = load_hunt(hunt_file)
+        if hunt.hunt_id in self.games:
+            return self.games[hunt.hunt_id]
+
+        store = create_player_store(Config.PLAYER_STORE, Config.PLAYER_DB_PATH, table=f"players_{hunt.hunt_id}")
+        return self.add_game(ScavengerHuntGame(
+            player_store=store,
+            hunt=hunt,
+            hunt_file=hunt_file,
+            verdict_cache=self.default_game.verdict_cache,
+            openai_client=self.default_game.openai_client,
+            answer_batcher=self.default_game.answer_batcher
+        ))
+
+    def add_route(self, to_number: str, hunt_id: str) -> None:
+        """Send every message for a Twilio number to one hunt."""
+        if hunt_id not in self.games:
+            raise KeyError(f"Unknown hunt: {hunt_id}")
+        self.routes[to_number] = hunt_id
+
+    def game_for(self, from_number: str, to_number: Optional[str] = None) -> ScavengerHuntGame:
+        """Pick the game for an inbound message."""
+        # Hunts chosen with a join code are kept in the default hunt's player store
+        hunt_id = self.default_game.players.membership(from_number) or self.routes.get(to_number)
+        return self.games.get(hunt_id, self.default_game)
+
+    def join(self, from_number: str, join_code: str, to_number: Optional[str] = None) -> Optional[ScavengerHuntGame]:
+        """Move a player to the hunt with this join code; None if the code is unknown."""
+        hunt_id = self._join_codes.get(join_code.strip().upper())
+        if hunt_id is None:
+            return None
+        with self._lock:
+            previous = self.game_for(from_number, to_number)
+            self.default_game.players.set_membership(from_number, hunt_id)
+        # Switching hunts ends the player's game in the old one
+        joined = self.games[hunt_id]
+        if previous is not joined:
+            previous.quit_game(from_number)
+        return joined
+
+    def game(self, hunt_id: Optional[str] = None) -> Optional[ScavengerHuntGame]:
+        """Game for a hunt id (the default game when no id is given)."""
+        if not hunt_id:
+            return self.default_game
+        return self.games.get(hunt_id)
+
+
+def parse_routes(value: Optional[str]) -> Dict[str, str]:
+    """Parse 'number=hunt_id,number=hunt_id' routing config."""
+    routes = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            to_number, hunt_id = item.split("=", 1)
+            routes[to_number.strip()] = hunt_id.strip()
+    return routes
+
+
+def create_hunt_engine(default_game: ScavengerHuntGame, hunt_dir: Optional[str] = None,
+                       routes: Optional[Dict[str, str]] = None) -> HuntEngine:
+    """Build the engine from a directory of hunt files and a number -> hunt routing table."""
+    engine = HuntEngine(default_game)
+    if hunt_dir:
+        for hunt_file in find_hunt_files(hunt_dir):
+            engine.add_hunt_file(hunt_file)
+    for to_number, hunt_id in (routes or {}).items():
+        engine.add_route(to_number, hunt_id)
+    return engine
@@ -0,0 +1,325 @@
+"""
+Hunt definitions loaded from JSON (or YAML) files.
+Each file is validated once and compiled into an immutable Hunt with
+precomputed answer indexes and pre-rendered messages: replies that never
+change (help, hints, clue prompts) are rendered in full, and the rest keep
+only their per-player slots (score, rank) to fill in. Compiled hunts are
+cached by file mtime/size and content hash, so reloading an unchanged file
+costs a stat() call.
+"""
+
+import hashlib
+import json
+import os
+import string
+import threading
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Tuple
+
+from answer_matcher import AnswerIndex
+
+try:
+    import yaml
+except ImportError:  # YAML hunts are optional
+    yaml = None
+
+DEFAULT_HUNT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hunts", "portland.json")
+HUNT_EXTENSIONS = (".json", ".yaml", ".yml")
+
+# Largest clue id or point value a Player's results array can hold
+MAX_RESULT = 0xFFFF
+
+DEFAULT_MESSAGES = {
+    "welcome": "🎯 Welcome to the {name}!\n\nYou'll visit {clue_count} locations. Answer correctly to earn points:\n{scoring}\n\nLet's begin your adventure!\n\n",
+    "farewell": "Thanks for playing! Send 'READY' to play again!",
+    "help": "🎯 {name} Help\n\nHow to play:\n• Send 'READY' to start the game\n• Answer the clues\n\nScoring:\n{scoring}\n\nCommands:\n• READY - Start/restart game\n• STATUS - Check your progress\n• HELP - Show this message",
+    "goodbye": "👋 Thanks for playing the {name}! Send 'READY' anytime to play again!",
+    "not_started": "Send 'READY' to start the {name}! 🎯",
+    "correct": "🎉 Correct! You earned {points} points!\n\n",
+    "hint": "❌ Not quite right! Here's a hint:\n\n{hint}\n\nTry again! 🤔",
+    "reveal": "❌ The answer was: {answer}\nYou get {consolation_points} consolation points! 💪\n\n",
+    "clue_prompt": "📍 Clue {clue_number}/{clue_count}:\n\n{clue}",
+    "status": "📊 Current Status:\n• Clue: {clue_number}/{clue_count}\n• Score: {score} points\n• Hints used this clue: {hints_used}/{hint_count}\n\nCurrent clue: {clue}",
+    "status_idle": "🎯 Ready to explore {city}? Send 'READY' to start the scavenger hunt!",
+    "status_done": "🏆 Game completed! Send 'READY' to play again!",
+    "final_score": "🏆 Congratulations! You've completed the {name}!\n\nFinal Score: {score} points\n\nYour Performance:\n",
+    "final_clue": "• Clue {clue_id}: {points} points ({hints} hints used)\n",
+    "final_rank": "\nRank: {rank}\n\n{farewell}"
+}
+
+
+class HuntValidationError(ValueError):
+    """Raised when a hunt definition file is malformed."""
+
+
+class Hunt(NamedTuple):
+    """Compiled, read-only hunt definition."""
+    hunt_id: str
+    name: str
+    city: str
+    join_code: str  # players text "JOIN <code>" to play this hunt
+    clues: Tuple[Mapping, ...]
+    answer_indexes: Mapping[int, AnswerIndex]
+    points_by_hints: Tuple[int, ...]
+    consolation_points: int
+    max_score: int
+    ranks: Tuple[Tuple[int, str], ...]  # (min_score, title), highest first
+    welcome: str
+    farewell: str
+    help: str
+    goodbye: str
+    clue_prompts: Tuple[str, ...]  # "📍 Clue n/N" prompt per clue
+    start_reply: str  # welcome + first clue
+    not_started: str
+    correct_replies: Tuple[str, ...]  # by hints used
+    hint_replies: Tuple[Tuple[str, ...], ...]  # per clue, per hint
+    reveal_replies: Tuple[str, ...]  # per clue, when the hints run out
+    status_prompts: Tuple[str, ...]  # per clue; slots: score, hints_used
+    status_idle: str
+    status_done: str
+    final_score: str  # slots: score
+    final_clue: str  # slots: clue_id, points, hints
+    final_rank: str  # slots: rank
+    source_hash: str
+
+    @property
+    def clue_count(self) -> int:
+        return len(self.clues)
+
+    def points_for(self, hints_used: int) -> int:
+        """Points for a correct answer after using some hints."""
+        return self.points_by_hints[min(hints_used, len(self.points_by_hints) - 1)]
+
+    def correct_reply(self, hints_used: int) -> str:
+        """Pre-rendered reply for a correct answer after using some hints."""
+        return self.correct_replies[min(hints_used, len(self.correct_replies) - 1)]
+
+    @property
+    def static_replies(self) -> Tuple[str, ...]:
+        """Every reply that is the same for all players."""
+        return (self.start_reply, self.help, self.goodbye, self.not_started, self.status_idle, self.status_done) + \
+            tuple(reply for replies in self.hint_replies for reply in replies)
+
+    def rank_for(self, score: int) -> str:
+        for min_score, title in self.ranks:
+            if score >= min_score:
+                return title
+        return self.ranks[-1][1]
+
+
+_cache = {}  # path -> (mtime_ns, size, Hunt)
+_cache_lock = threading.Lock()
+
+
+def load_hunt(path: str = DEFAULT_HUNT_FILE) -> Hunt:
+    """Load and compile a hunt file, reusing the cached Hunt if the file is unchanged."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    with open(path, "rb") as hunt_file:
+        raw = hunt_file.read()
+    source_hash = hashlib.sha256(raw).hexdigest()
+
+    # Touched but not edited: keep the compiled hunt
+    if cached and cached[2].source_hash == source_hash:
+        hunt = cached[2]
+    else:
+        hunt = compile_hunt(parse_hunt_file(path, raw), source_hash)
+
+    with _cache_lock:
+        _cache[path] = (stat.st_mtime_ns, stat.st_size, hunt)
+    return hunt
+
+
+def find_hunt_files(directory: str) -> List[str]:
+    """Paths of every hunt file in a directory, sorted by name."""
+    return [
+        os.path.join(directory, filename)
+        for filename in sorted(os.listdir(directory))
+        if filename.endswith(HUNT_EXTENSIONS)
+    ]
+
+
+def parse_hunt_file(path: str, raw: bytes) -> Dict:
+    """Parse raw JSON or YAML hunt data."""
+    if path.endswith((".yaml", ".yml")):
+        if yaml is None:
+            raise HuntValidationError(f"{path}: PyYAML is required to load YAML hunts")
+        try:
+            return yaml.safe_load(raw)
+        except yaml.YAMLError as e:
+            raise HuntValidationError(f"{path}: {e}") from e
+    try:
+        return json.loads(raw)
+    except ValueError as e:
+        raise HuntValidationError(f"{path}: {e}") from e
+
+
+def validate_hunt(data: Dict) -> None:
+    """Check a parsed hunt definition, raising HuntValidationError on the first problem."""
+    if not isinstance(data, dict):
+        raise HuntValidationError("Hunt definition must be an object")
+    for key in ("id", "name", "clues"):
+        if not data.get(key):
+            raise HuntValidationError(f"Hunt is missing '{key}'")
+    if not str(data["id"]).isidentifier():
+        raise HuntValidationError("Hunt 'id' must contain only letters, digits and underscores")
+
+    # Players keep clue ids and points in an unsigned-short array (see player.py)
+    scoring = data.get("scoring", {})
+    points = scoring.get("points_by_hints", [40, 30, 20, 10])
+    if not points or not all(_fits_result(p) for p in points):
+        raise HuntValidationError(f"'scoring.points_by_hints' must be a list of integers from 0 to {MAX_RESULT}")
+    if not _fits_result(scoring.get("consolation_points", 5)):
+        raise HuntValidationError(f"'scoring.consolation_points' must be an integer from 0 to {MAX_RESULT}")
+
+    seen_ids = set()
+    for n, clue in enumerate(data["clues"], 1):
+        if not isinstance(clue, dict):
+            raise HuntValidationError(f"Clue {n} must be an object")
+        for key in ("id", "clue", "expected_answers"):
+            if not clue.get(key):
+                raise HuntValidationError(f"Clue {n} is missing '{key}'")
+        if not _fits_result(clue["id"]) or clue["id"] in seen_ids:
+            raise HuntValidationError(f"Clue {n} needs a unique integer 'id' from 0 to {MAX_RESULT}")
+        seen_ids.add(clue["id"])
+        if not all(isinstance(answer, str) for answer in clue["expected_answers"]):
+            raise HuntValidationError(f"Clue {n} 'expected_answers' must be strings")
+        if not all(isinstance(hint, str) for hint in clue.get("hints", [])):
+            raise HuntValidationError(f"Clue {n} 'hints' must be strings")
+
+    for rank in data.get("ranks", []):
+        if not isinstance(rank.get("min_score"), int) or not rank.get("title"):
+            raise HuntValidationError("Each rank needs an integer 'min_score' and a 'title'")
+
+
+def _fits_result(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= MAX_RESULT
+
+
+def compile_hunt(data: Dict, source_hash: str = "") -> Hunt:
+    """Validate a parsed hunt definition and build its immutable compiled form."""
+    validate_hunt(data)
+
+    scoring = data.get("scoring", {})
+    points_by_hints = tuple(scoring.get("points_by_hints", [40, 30, 20, 10]))
+    clues = tuple(
+        MappingProxyType({
+            "id": clue["id"],
+            "clue": clue["clue"],
+            "expected_answers": tuple(clue["expected_answers"]),
+            "hints": tuple(clue.get("hints", [])),
+            "location": clue.get("location", "")
+        })
+        for clue in data["clues"]
+    )
+    ranks = tuple(sorted(
+        ((rank["min_score"], rank["title"]) for rank in data.get("ranks", [])),
+        reverse=True
+    )) or ((0, "🎯 Adventure Seeker!"),)
+
+    fields = {
+        "name": data["name"],
+        "city": data.get("city", ""),
+        "clue_count": len(clues),
+        "scoring": _scoring_lines(points_by_hints),
+        "consolation_points": scoring.get("consolation_points", 5)
+    }
+    messages = dict(DEFAULT_MESSAGES, **data.get("messages", {}))
+    for key, template in messages.items():
+        if not isinstance(template, str):
+            raise HuntValidationError(f"Message '{key}' must be a string")
+    fields["farewell"] = _render_static(messages["farewell"], fields)
+
+    def render(key, **clue_fields):
+        return _render_static(messages[key], dict(fields, **clue_fields))
+
+    def prerender(key, **clue_fields):
+        return _prerender(messages[key], dict(fields, **clue_fields))
+
+    welcome = render("welcome")
+
+    return Hunt(
+        hunt_id=str(data["id"]),
+        name=data["name"],
+        city=data.get("city", ""),
+        join_code=str(data.get("join_code", "")).upper(),
+        clues=clues,
+        answer_indexes=MappingProxyType({
+            clue["id"]: AnswerIndex(clue["expected_answers"], [
+                answer for other in clues if other is not clue for answer in other["expected_answers"]
+            ])
+            for clue in clues
+        }),
+        points_by_hints=points_by_hints,
+        consolation_points=fields["consolation_points"],
+        max_score=points_by_hints[0] * len(clues),
+        ranks=ranks,
+        welcome=welcome,
+        farewell=fields["farewell"],
+        help=render("help"),
+        goodbye=render("goodbye"),
+        clue_prompts=tuple(
+            render("clue_prompt", clue_number=n, clue=clue["clue"]) for n, clue in enumerate(clues, 1)
+        ),
+        start_reply=welcome + clues[0]["clue"],
+        not_started=render("not_started"),
+        correct_replies=tuple(render("correct", points=points) for points in points_by_hints),
+        hint_replies=tuple(
+            tuple(render("hint", hint=hint) for hint in clue["hints"]) for clue in clues
+        ),
+        reveal_replies=tuple(render("reveal", answer=clue["expected_answers"][0]) for clue in clues),
+        status_prompts=tuple(
+            prerender("status", clue_number=n, clue=clue["clue"], hint_count=len(clue["hints"]))
+            for n, clue in enumerate(clues, 1)
+        ),
+        status_idle=render("status_idle"),
+        status_done=render("status_done"),
+        final_score=prerender("final_score"),
+        final_clue=prerender("final_clue"),
+        final_rank=prerender("final_rank"),
+        source_hash=source_hash
+    )
+
+
+_formatter = string.Formatter()
+
+
+def _prerender(template: str, fields: Dict) -> str:
+    """Fill in the hunt's fixed values, keeping other {slots} (and escaped braces) for str.format."""
+    parts = []
+    try:
+        for literal, field, spec, conversion in _formatter.parse(template):
+            parts.append(literal.replace("{", "{{").replace("}", "}}"))
+            if field is None:
+                continue
+            if field in fields:
+                value = _formatter.format_field(_formatter.convert_field(fields[field], conversion), spec)
+                parts.append(value.replace("{", "{{").replace("}", "}}"))
+            else:
+                parts.append("{" + field + (f"!{conversion}" if conversion else "") + (f":{spec}" if spec else "") + "}")
+    except ValueError as e:
+        raise HuntValidationError(f"Bad message template {template!r}: {e}") from e
+    return "".join(parts)
+
+
+def _render_static(template: str, fields: Dict) -> str:
+    """Render a message that has no per-player slots."""
+    try:
+        return _prerender(template, fields).format()
+    except (KeyError, IndexError) as e:
+        raise HuntValidationError(f"Unknown placeholder {e} in message {template!r}") from e
+
+
+def _scoring_lines(points_by_hints: Tuple[int, ...]) -> str:
+    lines = []
+    for hints, points in enumerate(points_by_hints):
+        if hints == 0:
+            lines.append(f"• First try: {points} points")
+        else:
+            lines.append(f"• With {hints} hint{'s' if hints > 1 else ''}: {points} points")
+    return "\n".join(lines)
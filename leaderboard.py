@@ -0,0 +1,90 @@
+"""
+Incrementally maintained leaderboard for completed hunts.
+Keeps a bounded min-heap of the top scores plus a count per score, so reads
+cost O(top N) regardless of how many players have finished. With a shared
+(SQLite) player store the completions themselves are persisted in the store.
+"""
+
+import heapq
+import threading
+import time
+from typing import Dict, List, Optional
+
+from player import to_iso
+
+
+class Leaderboard:
+    """Top-N completed games and per-score counts for ranking.
+
+    With a shared player store the completions are kept in the store, and
+    each process folds in the ones it hasn't seen (its own and other
+    workers') before answering, so every worker and restart sees the same board.
+    """
+
+    def __init__(self, size: int = 10, store=None):
+        self.size = size
+        self._store = store if store is not None and store.shared else None
+        self._total_completed = 0
+        self._heap = []  # (score, -sequence, entry); the root is the weakest top entry
+        self._score_counts = {}  # score -> number of completed games
+        self._sequence = 0  # last completion folded in (the store's row id when shared)
+        self._lock = threading.Lock()
+
+    @property
+    def total_completed(self) -> int:
+        with self._lock:
+            self._sync()
+            return self._total_completed
+
+    def record(self, phone_number: str, score: int, completed_at: Optional[int] = None) -> None:
+        """Record a completed game."""
+        phone_tail = phone_number[-4:]  # Only show last 4 digits for privacy
+        completed_at = completed_at or int(time.time())
+        with self._lock:
+            if self._store is not None:
+                self._store.add_completion(phone_tail, score, completed_at)
+                self._sync()
+            else:
+                self._add(self._sequence + 1, phone_tail, score, completed_at)
+
+    def top(self) -> List[Dict]:
+        """Top entries, highest score first."""
+        with self._lock:
+            self._sync()
+            items = sorted(self._heap, reverse=True)
+        return [entry for _, _, entry in items]
+
+    def rank(self, score: int) -> int:
+        """1-based rank a score would have among all completed games."""
+        with self._lock:
+            self._sync()
+            return 1 + sum(count for s, count in self._score_counts.items() if s > score)
+
+    def score_counts(self) -> Dict[int, int]:
+        """Number of completed games per final score."""
+        with self._lock:
+            self._sync()
+            return dict(self._score_counts)
+
+    def _sync(self) -> None:
+        # Called with the lock held: fold in completions recorded since the last read
+        if self._store is not None:
+            for row in self._store.completions_after(self._sequence):
+                self._add(*row)
+
+    def _add(self, sequence: int, phone_tail: str, score: int, completed_at: int) -> None:
+        entry = {
+            "phone": phone_tail,
+            "score": score,
+            "completion_time": to_iso(completed_at)
+        }
+        self._total_completed += 1
+        self._score_counts[score] = self._score_counts.get(score, 0) + 1
+        self._sequence = sequence
+
+        # Earlier finishers win ties, so newer entries sort lower
+        item = (score, -sequence, entry)
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, item)
+        elif item > self._heap[0]:
+            heapq.heapreplace(self._heap, item)
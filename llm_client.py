@@ -0,0 +1,224 @@
+"""
+Long-lived OpenAI chat client for answer verification.
+One pooled keep-alive HTTP session per process, a strict deadline per call,
+bounded retries with jittered backoff, and a circuit breaker that makes the
+game fall back to local matching while the upstream is failing or slow.
+"""
+
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Config
+
+
+class LLMError(Exception):
+    """The model could not produce an answer in time."""
+
+
+class CircuitOpenError(LLMError):
+    """Calls are short-circuited because the upstream is unhealthy."""
+
+
+class CircuitBreaker:
+    """Opens when the recent error rate or average latency crosses a threshold.
+
+    While open every call is rejected; after `reset_timeout` seconds a single
+    probe call is let through and its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, error_rate: float = 0.5, latency: float = 5.0, window: int = 20,
+                 min_calls: int = 5, reset_timeout: float = 30.0):
+        self.error_rate = error_rate
+        self.latency = latency
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._calls = deque(maxlen=window)  # (succeeded, latency)
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.CLOSED
+                self._calls.clear()
+            self._calls.append((True, latency))
+            self._check()
+
+    def record_failure(self, latency: float = 0.0) -> None:
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._open()
+                return
+            self._calls.append((False, latency))
+            self._check()
+
+    def _check(self) -> None:
+        if self.state != self.CLOSED or len(self._calls) < self.min_calls:
+            return
+        failures = sum(1 for succeeded, _ in self._calls if not succeeded)
+        average_latency = sum(latency for _, latency in self._calls) / len(self._calls)
+        if failures / len(self._calls) >= self.error_rate or average_latency >= self.latency:
+            self._open()
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._calls.clear()
+
+
+class ChatClient:
+    """Minimal chat-completions client over a pooled requests.Session."""
+
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, api_key: str, base_url: str = "https://api.openai.com/v1",
+                 model: str = "gpt-3.5-turbo", timeout: float = 3.0, max_retries: int = 2,
+                 backoff: float = 0.1, pool_size: int = 10,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"Bearer {api_key}"})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def complete(self, prompt: str, max_tokens: int = 10) -> str:
+        """Return the model's reply to a single-message prompt.
+
+        Raises CircuitOpenError without calling upstream while the breaker is
+        open, and LLMError if no attempt succeeds before the deadline.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("OpenAI circuit is open")
+
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": 0
+        }
+        deadline = time.monotonic() + self.timeout
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            started = time.monotonic()
+            try:
+                response = self.session.post(self.url, json=payload, timeout=remaining)
+                if response.status_code in self.RETRY_STATUSES:
+                    raise LLMError(f"OpenAI returned HTTP {response.status_code}")
+                response.raise_for_status()
+                content = response.json()["choices"][0]["message"]["content"]
+                self.breaker.record_success(time.monotonic() - started)
+                return content
+            except (requests.ConnectionError, requests.Timeout, LLMError) as e:
+                self.breaker.record_failure(time.monotonic() - started)
+                last_error = e
+            except (requests.RequestException, ValueError, KeyError, IndexError) as e:
+                # Bad request, auth failure or malformed body: retrying won't help
+                self.breaker.record_failure(time.monotonic() - started)
+                raise LLMError(str(e)) from e
+
+            if not self.breaker.allow():
+                break
+            # Exponential backoff with jitter, never past the deadline
+            delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+            time.sleep(max(0.0, min(delay, deadline - time.monotonic())))
+
+        raise LLMError(f"OpenAI call failed: {last_error or 'deadline exceeded'}")
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class FakeChatClient:
+    """Offline stand-in for ChatClient, used by tests and load tests.
+
+    Understands the single-answer and numbered batch prompts the game sends and
+    judges each answer with `judge(answer) -> bool`, after sleeping `latency`.
+    """
+
+    SINGLE_ANSWER = re.compile(r'User\'s answer: (".*")')
+    NUMBERED_ANSWER = re.compile(r'^(\d+)\. (".*")$', re.MULTILINE)
+
+    def __init__(self, judge=None, latency: float = 0.0, timeout: float = 3.0):
+        self.judge = judge or (lambda answer: True)
+        self.latency = latency
+        self.timeout = timeout
+        self.calls = 0
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def complete(self, prompt: str, max_tokens: int = 10) -> str:
+        with self._lock:
+            self.calls += 1
+            self.prompts.append(prompt)
+        if self.latency:
+            time.sleep(self.latency)
+
+        numbered = self.NUMBERED_ANSWER.findall(prompt)
+        if numbered:
+            return "\n".join(
+                f"{n}: {'CORRECT' if self.judge(json.loads(answer)) else 'INCORRECT'}" for n, answer in numbered
+            )
+        single = self.SINGLE_ANSWER.search(prompt)
+        return "CORRECT" if single and self.judge(json.loads(single.group(1))) else "INCORRECT"
+
+    def close(self) -> None:
+        pass
+
+
+def openai_configured() -> bool:
+    """Whether an OpenAI API key is set (not the env_template.txt placeholder)."""
+    api_key = os.environ.get('OPENAI_API_KEY')
+    return bool(api_key) and not api_key.startswith('your_')
+
+
+def create_llm_client() -> Optional[ChatClient]:
+    """Build the shared client from configuration; None when no API key is set."""
+    if not openai_configured():
+        return None
+    return ChatClient(
+        os.environ['OPENAI_API_KEY'],
+        base_url=Config.OPENAI_BASE_URL,
+        model=Config.OPENAI_MODEL,
+        timeout=Config.OPENAI_TIMEOUT,
+        max_retries=Config.OPENAI_MAX_RETRIES,
+        breaker=CircuitBreaker(
+            error_rate=Config.OPENAI_BREAKER_ERROR_RATE,
+            latency=Config.OPENAI_BREAKER_LATENCY,
+            reset_timeout=Config.OPENAI_BREAKER_RESET
+        )
+    )
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Load-testing harness for the scavenger hunt.
+Simulates many SMS players sending realistic sequences (answers, typos, wrong
+guesses that earn hints, vague answers that need OpenAI, STATUS and HELP)
+against the Flask app, either in-process through the test client or over HTTP,
+with a fake OpenAI backend of configurable latency. Reports throughput,
+p50/p95/p99 latency and memory per player.
+
+Examples:
+    python load_test.py --players 2000 --concurrency 64 --openai-latency 300
+    python load_test.py --mode http --url http://localhost:5000 --fake-openai-port 8099
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_client import FakeChatClient
+
+WRONG_ANSWERS = ["Pioneer Square", "the airport", "no idea", "Mount Hood", "Voodoo Doughnut", "a bridge"]
+ADVANCED = ("Correct!", "The answer was", "Final Score")
+
+
+class PlayerScript:
+    """Plays one hunt from READY to the final score, reacting to the game's replies."""
+
+    def __init__(self, phone_number: str, clues, rng: random.Random, wrong_rate: float = 0.3,
+                 vague_rate: float = 0.1, status_rate: float = 0.1):
+        self.phone_number = phone_number
+        self.clues = clues
+        self.rng = rng
+        self.wrong_rate = wrong_rate
+        self.vague_rate = vague_rate
+        self.status_rate = status_rate
+
+    def play(self, send: Callable[[str, str], str]) -> None:
+        rng = self.rng
+        if rng.random() < 0.05:
+            send(self.phone_number, "HELP")
+        send(self.phone_number, "READY")
+
+        for clue in self.clues:
+            if rng.random() < self.status_rate:
+                send(self.phone_number, "STATUS")
+            for attempt in range(len(clue["hints"]) + 2):
+                reply = send(self.phone_number, self.answer(clue, attempt))
+                if any(marker in reply for marker in ADVANCED):
+                    break
+
+    def answer(self, clue, attempt: int) -> str:
+        rng = self.rng
+        if attempt == 0 and rng.random() < self.wrong_rate:
+            return rng.choice(WRONG_ANSWERS)
+        answer = rng.choice(clue["expected_answers"])
+        roll = rng.random()
+        if attempt == 0 and roll < self.vague_rate:
+            # A partial answer, usually in the uncertain band that goes to OpenAI
+            words = max(clue["expected_answers"], key=len).split()
+            return " ".join(words[:max(1, len(words) - 2)]) + " place"
+        if roll < 0.3:
+            return answer.lower()
+        if roll < 0.45 and len(answer) > 4:
+            # Swap two adjacent letters
+            i = rng.randrange(1, len(answer) - 2)
+            return answer[:i] + answer[i + 1] + answer[i] + answer[i + 2:]
+        return answer
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class LoadTest:
+    """Runs player scripts concurrently and collects per-request latencies."""
+
+    def __init__(self, send: Callable[[str, str, str], str], players: int, concurrency: int,
+                 seed: int = 1, **script_options):
+        self._send = send
+        self.players = players
+        self.concurrency = concurrency
+        self.seed = seed
+        self.script_options = script_options
+        self.latencies = []
+        self.errors = 0
+        self._sid = 0
+        self._lock = threading.Lock()
+
+    def send(self, phone_number: str, body: str) -> str:
+        with self._lock:
+            self._sid += 1
+            message_sid = f"SMload{self._sid:030d}"
+        started = time.perf_counter()
+        try:
+            reply = self._send(phone_number, body, message_sid)
+        except Exception:
+            reply = ""
+            with self._lock:
+                self.errors += 1
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.latencies.append(elapsed)
+        return reply
+
+    def run(self, clues) -> Dict:
+        def play(n):
+            rng = random.Random(self.seed * 1000003 + n)
+            PlayerScript(f"+1555{n:07d}", clues, rng, **self.script_options).play(self.send)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            list(pool.map(play, range(self.players)))
+        wall = time.perf_counter() - started
+
+        latencies = sorted(self.latencies)
+        return {
+            "players": self.players,
+            "concurrency": self.concurrency,
+            "requests": len(latencies),
+            "errors": self.errors,
+            "seconds": round(wall, 2),
+            "throughput_rps": round(len(latencies) / wall, 1) if wall else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50) * 1000, 2),
+                "p95": round(percentile(latencies, 95) * 1000, 2),
+                "p99": round(percentile(latencies, 99) * 1000, 2),
+                "max": round(latencies[-1] * 1000, 2) if latencies else 0.0
+            }
+        }
+
+
+def memory_per_player(game_factory: Callable, players: int = 2000) -> float:
+    """Bytes allocated per started player in a fresh in-memory game."""
+    game = game_factory()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for n in range(players):
+        game.start_game(f"+1666{n:07d}")
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / players
+
+
+def isolated_game(fake: FakeChatClient, hunt=None, verdict_cache=None, answer_batcher=None):
+    """A game with in-memory players and verdicts, judged by the fake OpenAI backend."""
+    from cache_store import TTLCache
+    from config import Config
+    from player_store import InMemoryPlayerStore
+    from scavenger_game import ScavengerHuntGame
+
+    return ScavengerHuntGame(
+        player_store=InMemoryPlayerStore(),
+        hunt=hunt,
+        verdict_cache=verdict_cache or TTLCache(max_size=Config.VERDICT_CACHE_SIZE, ttl=Config.VERDICT_CACHE_TTL),
+        openai_client=fake,
+        answer_batcher=answer_batcher
+    )
+
+
+# App globals replaced by isolate_app
+ISOLATED_STATE = ("game", "engine", "sms_replies", "message_history", "call_history",
+                  "reply_dispatcher", "sms_queue", "twilio_client", "twilio_snapshot")
+
+
+def isolate_app(app_module, latency: float, batch_size: int, batch_wait: float) -> FakeChatClient:
+    """Point the imported app at a throwaway copy of its hunts, judged by a fake OpenAI backend.
+
+    Players, verdicts, replies and history are kept in memory only, and
+    replies come back as TwiML (no reply dispatcher, send queue or Twilio
+    client), so a run never writes to the configured stores or sends SMS.
+    """
+    from answer_batcher import create_answer_batcher
+    from cache_store import TTLCache
+    from config import Config
+    from history_buffer import HistoryBuffer
+    from hunt_engine import HuntEngine
+
+    live = app_module.engine
+    fake = FakeChatClient(latency=latency)
+    default_game = isolated_game(fake, hunt=live.default_game.hunt,
+                                 answer_batcher=create_answer_batcher(fake, batch_size, batch_wait))
+    engine = HuntEngine(default_game)
+    for hosted in live.games.values():
+        if hosted is not live.default_game:
+            engine.add_game(isolated_game(fake, hunt=hosted.hunt, verdict_cache=default_game.verdict_cache,
+                                          answer_batcher=default_game.answer_batcher))
+    for to_number, hunt_id in live.routes.items():
+        engine.add_route(to_number, hunt_id)
+
+    app_module.game = default_game
+    app_module.engine = engine
+    app_module.sms_replies = TTLCache(max_size=Config.SMS_REPLY_CACHE_SIZE, ttl=Config.SMS_REPLY_CACHE_TTL)
+    app_module.message_history = HistoryBuffer(Config.HISTORY_SIZE)
+    app_module.call_history = HistoryBuffer(Config.HISTORY_SIZE)
+    app_module.reply_dispatcher = None
+    app_module.sms_queue = None
+    app_module.twilio_client = None
+    app_module.twilio_snapshot = None
+    return fake
+
+
+def serve_fake_openai(port: int, latency: float) -> ThreadingHTTPServer:
+    """Serve the fake backend as an OpenAI-compatible HTTP endpoint (for --mode http)."""
+    fake = FakeChatClient(latency=latency)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            content = fake.complete(request["messages"][0]["content"])
+            body = json.dumps({"choices": [{"message": {"content": content}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.fake = fake
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def twilio_headers(signer, url: str, form: Dict[str, str]) -> Dict[str, str]:
+    """X-Twilio-Signature for a webhook, for apps that validate signatures."""
+    return {"X-Twilio-Signature": signer.sign(url, form)} if signer else {}
+
+
+def in_process_sender(flask_app, to_number: str, signer=None):
+    client = flask_app.test_client()
+
+    def send(phone_number, body, message_sid):
+        form = {"From": phone_number, "To": to_number, "Body": body, "MessageSid": message_sid}
+        response = client.post('/webhook/sms', data=form,
+                               headers=twilio_headers(signer, "http://localhost/webhook/sms", form))
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        return response.get_data(as_text=True)
+    return send
+
+
+def http_sender(url: str, to_number: str, signer=None):
+    import requests
+
+    local = threading.local()
+    webhook_url = f"{url.rstrip('/')}/webhook/sms"
+
+    def send(phone_number, body, message_sid):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        form = {"From": phone_number, "To": to_number, "Body": body, "MessageSid": message_sid}
+        response = session.post(webhook_url, data=form, headers=twilio_headers(signer, webhook_url, form),
+                                timeout=30)
+        response.raise_for_status()
+        return response.text
+    return send
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate concurrent SMS players against the scavenger hunt")
+    parser.add_argument("--mode", choices=["inprocess", "http"], default="inprocess")
+    parser.add_argument("--url", default="http://localhost:5000", help="app URL for --mode http")
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32, help="players playing at the same time")
+    parser.add_argument("--openai-latency", type=float, default=200, help="fake OpenAI latency in ms")
+    parser.add_argument("--fake-openai-port", type=int, help="serve the fake OpenAI over HTTP on this port")
+    parser.add_argument("--wrong-rate", type=float, default=0.3, help="share of clues answered wrong first")
+    parser.add_argument("--vague-rate", type=float, default=0.1, help="share of clues answered vaguely first")
+    parser.add_argument("--to-number", default="+15035550100")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-sign", action="store_true",
+                        help="don't sign webhooks with TWILIO_AUTH_TOKEN (X-Twilio-Signature)")
+    parser.add_argument("--max-p95-ms", type=float, help="fail (exit 1) if p95 latency is higher")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON only")
+    args = parser.parse_args(argv)
+
+    fake_server = None
+    if args.fake_openai_port:
+        fake_server = serve_fake_openai(args.fake_openai_port, args.openai_latency / 1000)
+        if not args.json:
+            print(f"🤖 Fake OpenAI at http://127.0.0.1:{args.fake_openai_port}/v1 "
+                  "(start the app with OPENAI_BASE_URL pointing here)")
+
+    from config import Config
+    from webhook_validator import TwilioSignatureValidator
+
+    signer = None
+    if Config.TWILIO_AUTH_TOKEN and not args.no_sign:
+        signer = TwilioSignatureValidator([Config.TWILIO_AUTH_TOKEN])
+
+    if args.mode == "inprocess":
+        import app as app_module
+
+        logging.getLogger().setLevel(logging.WARNING)
+        fake = isolate_app(
+            app_module, args.openai_latency / 1000,
+            Config.OPENAI_BATCH_SIZE, Config.OPENAI_BATCH_WAIT_MS / 1000
+        )
+        send = in_process_sender(app_module.app, args.to_number, signer)
+        clues = app_module.engine.game_for("", args.to_number).clues
+    else:
+        from hunt_loader import load_hunt
+
+        fake = fake_server.fake if fake_server else None
+        send = http_sender(args.url, args.to_number, signer)
+        clues = load_hunt(Config.HUNT_FILE).clues
+
+    load_test = LoadTest(send, args.players, args.concurrency, args.seed,
+                         wrong_rate=args.wrong_rate, vague_rate=args.vague_rate)
+    report = load_test.run(clues)
+    report["mode"] = args.mode
+    report["openai_calls"] = fake.calls if fake else None
+    if args.mode == "inprocess":
+        report["memory_per_player_bytes"] = round(memory_per_player(lambda: isolated_game(fake)))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print("📈 Load Test Report")
+        print("=" * 50)
+        print(f"Players: {report['players']} ({report['concurrency']} concurrent, {report['mode']})")
+        print(f"Requests: {report['requests']} in {report['seconds']}s ({report['errors']} errors)")
+        print(f"Throughput: {report['throughput_rps']} requests/s")
+        latency = report["latency_ms"]
+        print(f"Latency: p50 {latency['p50']}ms, p95 {latency['p95']}ms, p99 {latency['p99']}ms, max {latency['max']}ms")
+        if report["openai_calls"] is not None:
+            print(f"OpenAI calls: {report['openai_calls']}")
+        if "memory_per_player_bytes" in report:
+            print(f"Memory per player: {report['memory_per_player_bytes']} bytes")
+
+    if fake_server:
+        fake_server.shutdown()
+    if report["errors"] or (args.max_p95_ms and report["latency_ms"]["p95"] > args.max_p95_ms):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,98 @@
+"""
+Compact player record for the scavenger hunt.
+Uses __slots__, integer epoch timestamps and a single unsigned-short array
+for per-clue results instead of a dict per player and a dict per clue.
+"""
+
+import time
+from array import array
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+def to_epoch(value) -> Optional[int]:
+    """Convert an ISO timestamp (old player dicts) or number to epoch seconds."""
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value)
+    return int(datetime.fromisoformat(value).timestamp())
+
+
+def to_iso(epoch: Optional[int]) -> Optional[str]:
+    """Convert epoch seconds to the ISO string used by the JSON endpoints."""
+    if epoch is None:
+        return None
+    return datetime.fromtimestamp(epoch).isoformat()
+
+
+class Player:
+    """State of one player's current hunt."""
+
+    __slots__ = (
+        "current_clue", "total_score", "hints_used", "game_started",
+        "start_time", "last_activity", "_results"
+    )
+
+    def __init__(self):
+        self.current_clue = 0
+        self.total_score = 0
+        self.hints_used = 0
+        self.game_started = False
+        self.start_time = None  # epoch seconds
+        self.last_activity = int(time.time())
+        # Flat (clue_id, points_earned, hints_used) triples
+        self._results = array("H")
+
+    def record_clue(self, clue_id: int, points_earned: int, hints_used: int) -> None:
+        """Record the result of a finished clue."""
+        self._results.extend((clue_id, points_earned, hints_used))
+
+    @property
+    def clues_completed(self) -> int:
+        """Number of clues finished in the current hunt."""
+        return len(self._results) // 3
+
+    def results(self) -> Iterator[Tuple[int, int, int]]:
+        """Iterate (clue_id, points_earned, hints_used) for finished clues."""
+        results = self._results
+        for i in range(0, len(results), 3):
+            yield results[i], results[i + 1], results[i + 2]
+
+    @property
+    def completed_clues(self) -> List[Dict]:
+        """Per-clue results in the original dict shape."""
+        results = self._results
+        return [
+            {"clue_id": results[i], "points_earned": results[i + 1], "hints_used": results[i + 2]}
+            for i in range(0, len(results), 3)
+        ]
+
+    def to_dict(self) -> Dict:
+        """Serialize to the original player dict shape (ISO timestamps)."""
+        return {
+            "current_clue": self.current_clue,
+            "total_score": self.total_score,
+            "hints_used": self.hints_used,
+            "game_started": self.game_started,
+            "completed_clues": self.completed_clues,
+            "start_time": to_iso(self.start_time),
+            "last_activity": to_iso(self.last_activity)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Player":
+        """Build a player from the original dict shape."""
+        player = cls()
+        player.current_clue = data.get("current_clue", 0)
+        player.total_score = data.get("total_score", 0)
+        player.hints_used = data.get("hints_used", 0)
+        player.game_started = data.get("game_started", False)
+        player.start_time = to_epoch(data.get("start_time"))
+        player.last_activity = to_epoch(data.get("last_activity")) or player.last_activity
+        for completed in data.get("completed_clues", []):
+            player.record_clue(completed["clue_id"], completed["points_earned"], completed["hints_used"])
+        return player
+
+    def __repr__(self) -> str:
+        return f"Player({self.to_dict()!r})"
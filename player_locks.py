@@ -0,0 +1,31 @@
+"""
+Per-player locking for threaded workers.
+A fixed array of locks is shared by all players, each phone number always
+mapping to the same stripe, so two messages from one player are handled one
+at a time while different players rarely wait on each other.
+"""
+
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class StripedLock:
+    """A fixed pool of re-entrant locks, selected by hashing the key."""
+
+    def __init__(self, stripes: int = 256):
+        self._locks = tuple(threading.RLock() for _ in range(stripes))
+
+    def lock_for(self, key: str) -> threading.RLock:
+        # crc32 rather than hash() so a key maps to the same stripe in every process
+        return self._locks[zlib.crc32(key.encode("utf-8")) % len(self._locks)]
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[None]:
+        """Hold the lock for a key."""
+        with self.lock_for(key):
+            yield
+
+    def __len__(self) -> int:
+        return len(self._locks)
@@ -0,0 +1,358 @@
+"""
+Player state storage for the scavenger hunt.
+PlayerStore is a mapping of phone number -> Player so the game (and the
+admin endpoints) can use it like the original dict, with an in-memory backend
+for development and a SQLite backend that is shared between gunicorn workers
+and survives restarts.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from metrics import FAST_BUCKETS, REGISTRY
+from player import Player
+
+STORE_SECONDS = REGISTRY.histogram(
+    "scavenger_player_store_seconds", "Player store reads and writes", ["backend", "op"],
+    buckets=FAST_BUCKETS
+)
+
+
+class PlayerStore(MutableMapping):
+    """Interface for player storage backends, keyed by phone number.
+
+    Shared backends (other processes and restarts see the same data) also
+    keep the game's records: completed hunts for the leaderboard and the
+    counters behind /game-stats. Process-local backends leave those to the
+    in-memory Leaderboard and GameStats. Every backend remembers which hunt
+    a player joined with a code.
+    """
+
+    shared = False
+
+    def add_completion(self, phone_tail: str, score: int, completed_at: int) -> None:
+        """Append a completed hunt (shared backends only)."""
+        raise NotImplementedError
+
+    def completions_after(self, last_id: int) -> List[Tuple[int, str, int, int]]:
+        """(id, phone_tail, score, completed_at) of completions after `last_id`, oldest first."""
+        raise NotImplementedError
+
+    def add_counts(self, counts: Dict[str, int]) -> None:
+        """Add to named stats counters (shared backends only)."""
+        raise NotImplementedError
+
+    def seed_counts(self, counts: Dict[str, int]) -> None:
+        """Set counters that don't exist yet, e.g. player totals on first use."""
+        raise NotImplementedError
+
+    def counts(self) -> Dict[str, int]:
+        """Every named stats counter."""
+        raise NotImplementedError
+
+    def membership(self, phone_number: str) -> Optional[str]:
+        """Hunt a player chose with a join code, or None."""
+        raise NotImplementedError
+
+    def set_membership(self, phone_number: str, hunt_id: str) -> None:
+        """Remember the hunt a player chose with a join code."""
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Persist any buffered writes."""
+
+    @contextmanager
+    def lock(self, phone_number: str, timeout: float = 10.0) -> Iterator[None]:
+        """Hold an exclusive lock on one player across worker processes.
+
+        Process-local stores need nothing beyond the game's in-process locks.
+        """
+        yield
+
+    def close(self) -> None:
+        """Flush and release any resources held by the store."""
+        self.flush()
+
+
+class InMemoryPlayerStore(PlayerStore):
+    """Process-local store; state is lost on restart."""
+
+    _read_seconds = STORE_SECONDS.labels("memory", "read")
+    _write_seconds = STORE_SECONDS.labels("memory", "write")
+
+    def __init__(self):
+        self._players = {}
+        self._memberships = {}
+
+    def __getitem__(self, phone_number: str) -> Player:
+        with self._read_seconds.time():
+            return self._players[phone_number]
+
+    def __setitem__(self, phone_number: str, player: Player) -> None:
+        with self._write_seconds.time():
+            self._players[phone_number] = player
+
+    def __delitem__(self, phone_number: str) -> None:
+        del self._players[phone_number]
+
+    def __contains__(self, phone_number) -> bool:
+        return phone_number in self._players
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._players))
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def membership(self, phone_number: str) -> Optional[str]:
+        return self._memberships.get(phone_number)
+
+    def set_membership(self, phone_number: str, hunt_id: str) -> None:
+        self._memberships[phone_number] = hunt_id
+
+
+class SQLitePlayerStore(PlayerStore):
+    """SQLite-backed store using WAL mode and batched commits.
+
+    Writes are applied immediately on this process's connection (so reads
+    here see them) and committed in batches, either every `batch_size`
+    writes or every `flush_interval` seconds by a background flusher.
+
+    lock() is an advisory lock row in `<table>_locks`, leased for
+    `lock_lease` seconds so a crashed worker cannot wedge a player.
+    Completed hunts go to `<table>_completions` and stats counters to
+    `<table>_stats`, batched with the player writes.
+    """
+
+    shared = True
+
+    _read_seconds = STORE_SECONDS.labels("sqlite", "read")
+    _write_seconds = STORE_SECONDS.labels("sqlite", "write")
+
+    def __init__(self, db_path: str, batch_size: int = 100, flush_interval: float = 0.05,
+                 table: str = "players", lock_lease: float = 30.0):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid player table name: {table}")
+        self.db_path = db_path
+        self.table = table
+        self._select_sql = f"SELECT data FROM {table} WHERE phone_number = ?"
+        self._upsert_sql = (
+            f"INSERT INTO {table} (phone_number, data, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(phone_number) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at"
+        )
+        self._delete_sql = f"DELETE FROM {table} WHERE phone_number = ?"
+        self._expire_lock_sql = f"DELETE FROM {table}_locks WHERE phone_number = ? AND expires_at < ?"
+        self._acquire_lock_sql = f"INSERT OR IGNORE INTO {table}_locks (phone_number, owner, expires_at) VALUES (?, ?, ?)"
+        self._release_lock_sql = f"DELETE FROM {table}_locks WHERE phone_number = ? AND owner = ?"
+        self._add_completion_sql = f"INSERT INTO {table}_completions (phone_tail, score, completed_at) VALUES (?, ?, ?)"
+        self._add_count_sql = (
+            f"INSERT INTO {table}_stats (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value"
+        )
+        self._membership_sql = f"SELECT hunt_id FROM {table}_memberships WHERE phone_number = ?"
+        self._set_membership_sql = (
+            f"INSERT INTO {table}_memberships (phone_number, hunt_id) VALUES (?, ?) "
+            "ON CONFLICT(phone_number) DO UPDATE SET hunt_id = excluded.hunt_id"
+        )
+        self.lock_lease = lock_lease
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._conn = None
+        self._pid = None
+        self._pending = 0
+        self._flusher = None
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Reconnect after a fork: SQLite connections must not cross processes
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+        conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "phone_number TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_updated_at ON {self.table} (updated_at)")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table}_locks ("
+            "phone_number TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table}_completions ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, phone_tail TEXT NOT NULL, "
+            "score INTEGER NOT NULL, completed_at INTEGER NOT NULL)"
+        )
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table}_stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table}_memberships ("
+            "phone_number TEXT PRIMARY KEY, hunt_id TEXT NOT NULL)"
+        )
+        conn.commit()
+        self._conn = conn
+        self._pid = os.getpid()
+        self._pending = 0
+        self._flusher = None
+        return conn
+
+    def _write(self, sql: str, params: tuple) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(sql, params)
+            self._pending += 1
+            if self._pending >= self.batch_size:
+                self._commit()
+            else:
+                self._ensure_flusher()
+
+    def _commit(self) -> None:
+        if self._pending:
+            self._conn.commit()
+            self._pending = 0
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is not None:
+            return
+        self._flusher = threading.Thread(target=self._flush_loop, name="player-store-flush", daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def __getitem__(self, phone_number: str) -> Player:
+        with self._read_seconds.time():
+            with self._lock:
+                row = self._connect().execute(self._select_sql, (phone_number,)).fetchone()
+            if row is None:
+                raise KeyError(phone_number)
+            return Player.from_dict(json.loads(row[0]))
+
+    def __setitem__(self, phone_number: str, player: Player) -> None:
+        with self._write_seconds.time():
+            self._write(self._upsert_sql, (phone_number, json.dumps(player.to_dict()), time.time()))
+
+    def __delitem__(self, phone_number: str) -> None:
+        if phone_number not in self:
+            raise KeyError(phone_number)
+        self._write(self._delete_sql, (phone_number,))
+
+    def __contains__(self, phone_number) -> bool:
+        with self._lock:
+            return self._connect().execute(self._select_sql, (phone_number,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            rows = self._connect().execute(f"SELECT phone_number FROM {self.table}").fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def items(self):
+        with self._lock:
+            rows = self._connect().execute(f"SELECT phone_number, data FROM {self.table}").fetchall()
+        return [(phone_number, Player.from_dict(json.loads(data))) for phone_number, data in rows]
+
+    def values(self):
+        return [player for _, player in self.items()]
+
+    def add_completion(self, phone_tail: str, score: int, completed_at: int) -> None:
+        self._write(self._add_completion_sql, (phone_tail, score, completed_at))
+
+    def completions_after(self, last_id: int) -> List[Tuple[int, str, int, int]]:
+        with self._lock:
+            return self._connect().execute(
+                f"SELECT id, phone_tail, score, completed_at FROM {self.table}_completions WHERE id > ? ORDER BY id",
+                (last_id,)
+            ).fetchall()
+
+    def add_counts(self, counts: Dict[str, int]) -> None:
+        for name, value in counts.items():
+            self._write(self._add_count_sql, (name, value))
+
+    def seed_counts(self, counts: Dict[str, int]) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(f"INSERT OR IGNORE INTO {self.table}_stats (name, value) VALUES (?, ?)", counts.items())
+            self._pending += 1
+            self._commit()
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._connect().execute(f"SELECT name, value FROM {self.table}_stats").fetchall())
+
+    def membership(self, phone_number: str) -> Optional[str]:
+        with self._lock:
+            row = self._connect().execute(self._membership_sql, (phone_number,)).fetchone()
+        return row[0] if row else None
+
+    def set_membership(self, phone_number: str, hunt_id: str) -> None:
+        self._write(self._set_membership_sql, (phone_number, hunt_id))
+
+    @contextmanager
+    def lock(self, phone_number: str, timeout: float = 10.0) -> Iterator[None]:
+        owner = f"{os.getpid()}:{threading.get_ident()}"
+        deadline = time.monotonic() + timeout
+        delay = 0.002
+        while True:
+            with self._lock:
+                conn = self._connect()
+                now = time.time()
+                conn.execute(self._expire_lock_sql, (phone_number, now))
+                acquired = conn.execute(
+                    self._acquire_lock_sql, (phone_number, owner, now + self.lock_lease)
+                ).rowcount == 1
+                self._pending += 1
+                self._commit()
+            if acquired:
+                break
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Player {phone_number} is locked by another worker")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+
+        try:
+            yield
+        finally:
+            # The player's writes are committed together with the release, so the
+            # next worker to take the lock reads them
+            with self._lock:
+                self._connect().execute(self._release_lock_sql, (phone_number, owner))
+                self._pending += 1
+                self._commit()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                self._pid = None
+
+
+def create_player_store(backend: str = "memory", db_path: Optional[str] = None,
+                        table: str = "players") -> PlayerStore:
+    """Build the player store selected in the configuration."""
+    if backend == "memory":
+        return InMemoryPlayerStore()
+    if backend == "sqlite":
+        return SQLitePlayerStore(db_path or "players.sqlite3", table=table)
+    raise ValueError(f"Unknown player store backend: {backend}")
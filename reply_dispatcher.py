@@ -0,0 +1,43 @@
+"""
+Deferred SMS reply dispatcher.
+Lets the SMS webhook acknowledge Twilio immediately while a small pool of
+background threads computes each reply and sends it through the Twilio REST API.
+"""
+
+import logging
+from typing import Callable, Optional
+
+from worker_pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+
+class ReplyDispatcher(WorkerPool):
+    """Bounded queue of inbound messages drained by background worker threads."""
+
+    def __init__(self, handler: Callable[[str, str, str, str], Optional[str]],
+                 sender: Callable[[str, str, str], None],
+                 workers: int = 4, queue_size: int = 1000):
+        """
+        Args:
+            handler: handler(body, from_number, to_number, message_sid) -> reply text
+            sender: sender(to_number, from_number, body) delivers the reply
+            workers: number of worker threads
+            queue_size: maximum number of messages waiting for a worker
+        """
+        super().__init__(workers, queue_size, name="sms-reply")
+        self.handler = handler
+        self.sender = sender
+
+    def submit(self, body: str, from_number: str, to_number: str, message_sid: str) -> bool:
+        """Queue an inbound message; returns False if the queue is full or shutting down."""
+        return self._put((body, from_number, to_number, message_sid))
+
+    def _handle(self, item) -> None:
+        body, from_number, to_number, message_sid = item
+        try:
+            reply = self.handler(body, from_number, to_number, message_sid)
+            if reply:
+                self.sender(from_number, to_number, reply)
+        except Exception:
+            logger.exception("Error sending deferred SMS reply", extra={"event": "sms_error"})
@@ -0,0 +1,131 @@
+"""
+Opt-in sampling profiler for webhook requests.
+A fraction of requests is marked for profiling; while one is running, a
+background thread samples its Python stack every few milliseconds and counts
+each distinct stack. The counts are served as collapsed stacks
+("frame;frame;frame count" per line), the input format of flamegraph.pl,
+speedscope and similar tools. With a sample rate of 0 the only cost per
+request is one comparison.
+"""
+
+import functools
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+TRUNCATED = "[other stacks]"
+
+
+class RequestProfiler:
+    """Samples the stacks of a random fraction of requests and aggregates them."""
+
+    def __init__(self, sample_rate: float = 0.0, interval: float = 0.005, max_stacks: int = 5000):
+        """
+        Args:
+            sample_rate: fraction of requests to profile (0 disables profiling)
+            interval: seconds between stack samples of a profiled request
+            max_stacks: distinct stacks kept; further new stacks are counted as TRUNCATED
+        """
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.profiled_requests = 0
+        self.samples = 0
+        self._stacks = {}  # collapsed stack -> samples
+        self._active = {}  # thread id -> frame the profiled request started in
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._sampler = None
+
+    def sampled(self, handler):
+        """Decorator profiling `sample_rate` of the calls to a request handler."""
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+                return handler(*args, **kwargs)
+            with self.profile():
+                return handler(*args, **kwargs)
+        return wrapper
+
+    @contextmanager
+    def profile(self) -> Iterator[None]:
+        """Sample the calling thread's stack, below the caller, until the block exits."""
+        thread_id = threading.get_ident()
+        with self._lock:
+            self.profiled_requests += 1
+            # Frames 0 and 1 are this generator and contextlib; 2 is the `with` caller,
+            # so samples show what the caller runs rather than the server above it
+            self._active[thread_id] = sys._getframe(2)
+            self._ensure_sampler()
+        self._wake.set()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active.pop(thread_id, None)
+
+    def collapsed(self) -> str:
+        """Aggregated stacks in the collapsed format, most sampled first."""
+        with self._lock:
+            stacks = sorted(self._stacks.items(), key=lambda item: -item[1])
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+            self.profiled_requests = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "sample_rate": self.sample_rate,
+                "interval_ms": self.interval * 1000,
+                "profiled_requests": self.profiled_requests,
+                "samples": self.samples,
+                "stacks": len(self._stacks),
+                "active": len(self._active)
+            }
+
+    def _ensure_sampler(self) -> None:
+        # Called with the lock held; started lazily so it runs after a gunicorn fork
+        if self._sampler is None or not self._sampler.is_alive():
+            self._sampler = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+            self._sampler.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            with self._lock:
+                active = dict(self._active)
+                if not active:
+                    # Nothing to profile: sleep until the next sampled request
+                    self._wake.clear()
+                    continue
+            frames = sys._current_frames()
+            stacks = [_collapse(frames.get(thread_id), stop) for thread_id, stop in active.items()]
+            with self._lock:
+                for stack in stacks:
+                    if not stack:
+                        continue
+                    if stack not in self._stacks and len(self._stacks) >= self.max_stacks:
+                        stack = TRUNCATED
+                    self._stacks[stack] = self._stacks.get(stack, 0) + 1
+                    self.samples += 1
+            time.sleep(self.interval)
+
+
+def _collapse(frame, stop) -> Optional[str]:
+    """A thread's stack as outer;...;inner, starting below the `stop` frame."""
+    names = []
+    while frame is not None and frame is not stop:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    if frame is None:
+        return None  # the request finished between the snapshot and the walk
+    return ";".join(reversed(names))
@@ -1,236 +1,239 @@
 """
 Portland Scavenger Hunt Game Logic
-Manages game state, clues, scoring, and OpenAI integration for natural language processing.
+Manages game state, scoring, and OpenAI integration for natural language processing.
+Clues and scoring come from a hunt definition file (see hunt_loader.py).
 """
 
-import openai
-import os
-import json
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+import functools
+import logging
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+from answer_batcher import AnswerBatcher, create_answer_batcher, quote_answer
+from answer_matcher import AnswerIndex, CORRECT, UNCERTAIN, normalize
+from cache_store import TTLCache
+from config import Config
+from game_stats import GameStats
+from hunt_loader import Hunt, load_hunt
+from leaderboard import Leaderboard
+from llm_client import LLMError, create_llm_client
+from metrics import REGISTRY
+from player import Player
+from player_locks import StripedLock
+from player_store import PlayerStore, create_player_store
+
+ANSWER_CHECK_SECONDS = REGISTRY.histogram(
+    "scavenger_answer_check_seconds",
+    "Time to judge an answer, by path (local match, cached verdict, model call)",
+    ["path"]
+)
+ANSWERS = REGISTRY.counter("scavenger_answers_total", "Answers judged, by result", ["result"])
+HINTS = REGISTRY.counter("scavenger_hints_total", "Hints sent")
+
+logger = logging.getLogger(__name__)
+
+_check_timers = {path: ANSWER_CHECK_SECONDS.labels(path)
+                 for path in ("local", "unverified", "cache", "model", "model_error")}
+_correct_answers = ANSWERS.labels("correct")
+_incorrect_answers = ANSWERS.labels("incorrect")
+_hints_sent = HINTS.labels()
+
+def serialized_per_player(method):
+    """Run a game method while holding the player's lock (first argument is the phone number)."""
+    @functools.wraps(method)
+    def wrapper(self, phone_number, *args, **kwargs):
+        with self.player_lock(phone_number):
+            return method(self, phone_number, *args, **kwargs)
+    return wrapper
 
 class ScavengerHuntGame:
-    def __init__(self):
-        # Initialize OpenAI client only if API key is available
-        api_key = os.environ.get('OPENAI_API_KEY')
-        if api_key and not api_key.startswith('your_'):
-            self.has_openai = False
-            self.openai_client = None
-            
-            # Try multiple initialization approaches
-            try:
-                # Method 1: Try basic initialization without any extra arguments
-                self.openai_client = openai.OpenAI(api_key=api_key)
-                self.has_openai = True
-                print("✅ OpenAI client initialized successfully (method 1)")
-            except TypeError as e:
-                if 'proxies' in str(e):
-                    try:
-                        # Method 2: Try with explicit empty proxies
-                        import openai as openai_module
-                        self.openai_client = openai_module.OpenAI(
-                            api_key=api_key,
-                            http_client=None
-                        )
-                        self.has_openai = True
-                        print("✅ OpenAI client initialized successfully (method 2)")
-                    except Exception:
-                        try:
-                            # Method 3: Use legacy style initialization
-                            openai.api_key = api_key
-                            self.openai_client = openai
-                            self.has_openai = True
-                            print("✅ OpenAI client initialized successfully (method 3 - legacy)")
-                        except Exception as e3:
-                            print(f"⚠️  OpenAI initialization failed, using fallback: {e3}")
-                            self.openai_client = None
-                            self.has_openai = False
-                else:
-                    try:
-                        # Method 4: Legacy fallback
-                        openai.api_key = api_key
-                        self.openai_client = openai
-                        self.has_openai = True
-                        print("✅ OpenAI client initialized successfully (method 4 - legacy)")
-                    except Exception as e4:
-                        print(f"⚠️  OpenAI initialization failed, using fallback: {e4}")
-                        self.openai_client = None
-                        self.has_openai = False
-            except Exception as e:
-                print(f"⚠️  OpenAI initialization failed, using fallback: {e}")
-                self.openai_client = None
-                self.has_openai = False
-        else:
-            self.openai_client = None
-            self.has_openai = False
-        
-        # Game data storage (in production, use a database)
-        self.players = {}  # phone_number -> player_data
-        
-        # Portland Scavenger Hunt Clues
-        self.clues = [
-            {
-                "id": 1,
-                "clue": "🌹 Start your adventure at Portland's most famous garden, where over 10,000 rose bushes bloom. This International Rose Test Garden has been testing roses since 1917. What's the name of this fragrant paradise?",
-                "expected_answers": [
-                    "International Rose Test Garden",
-                    "Rose Test Garden", 
-                    "Rose Garden",
-                    "International Rose Garden",
-                    "Portland Rose Garden"
-                ],
-                "hints": [
-                    "🌹 This garden is in Washington Park and offers stunning views of Mount Hood on clear days.",
-                    "🌹 It's located in the same park as the Japanese Garden and has 'International' in its name.",
-                    "🌹 The garden tests new rose varieties and has been doing so for over 100 years!"
-                ],
-                "location": "Washington Park"
-            },
-            {
-                "id": 2,
-                "clue": "📚 Next, visit the largest independent bookstore in the world! This colorful store takes up an entire city block and has a slogan about covering the city. Where are you going?",
-                "expected_answers": [
-                    "Powell's Books",
-                    "Powell's City of Books",
-                    "Powells",
-                    "Powell's",
-                    "City of Books"
-                ],
-                "hints": [
-                    "📚 The store uses different colored rooms (Blue, Red, Green, etc.) to organize its sections.",
-                    "📚 It's located in the Pearl District and their slogan mentions 'covering' something.",
-                    "📚 The founder's last name is Powell, and they claim to cover the city like a good book!"
-                ],
-                "location": "Pearl District"
-            },
-            {
-                "id": 3,
-                "clue": "🍩 Time for a sweet treat! Head to the place where the donuts are as weird as the city's slogan. This iconic pink box shop has been serving unusual flavors since 2003. The owner's goal was to keep Portland weird. What's this donut shop called?",
-                "expected_answers": [
-                    "Voodoo Doughnut",
-                    "Voodoo Donuts",
-                    "Voodoo Doughnuts",
-                    "Voodoo",
-                    "VooDoo Doughnut"
-                ],
-                "hints": [
-                    "🍩 They're famous for donuts with cereal on top and bacon-covered varieties.",
-                    "🍩 The shop has a pink neon sign and is often associated with 'magic' or 'spells'.",
-                    "🍩 Their most famous donut is covered in Fruit Loops cereal!"
-                ],
-                "location": "Downtown Portland"
-            },
-            {
-                "id": 4,
-                "clue": "🏛️ Now explore Portland's living room! This beautiful public square hosts farmers markets, festivals, and events. It's been the heart of downtown since 1984 and is named after a civic leader. What's this gathering place called?",
-                "expected_answers": [
-                    "Pioneer Courthouse Square",
-                    "Pioneer Square",
-                    "Courthouse Square",
-                    "Pioneer Courthouse",
-                    "Portland's Living Room"
-                ],
-                "hints": [
-                    "🏛️ It's directly across from a historic federal courthouse built in the 1870s.",
-                    "🏛️ The square features red brick and often has a large Christmas tree during holidays.",
-                    "🏛️ It's nicknamed 'Portland's Living Room' and hosts the annual Festival of Lights!"
-                ],
-                "location": "Downtown Portland"
-            },
-            {
-                "id": 5,
-                "clue": "🌊 For your final destination, visit the area where two major rivers meet! This waterfront district offers great views, food carts, and Saturday Market. It's named after the direction you'd travel to reach the ocean. What's this riverside area called?",
-                "expected_answers": [
-                    "Tom McCall Waterfront Park",
-                    "Waterfront Park",
-                    "Tom McCall Park",
-                    "McCall Waterfront Park",
-                    "Waterfront District",
-                    "Saturday Market area"
-                ],
-                "hints": [
-                    "🌊 This park stretches along the Willamette River and hosts the Saturday Market.",
-                    "🌊 It's named after a former Oregon governor who was known for environmental protection.",
-                    "🌊 The park offers great views of the Hawthorne and Morrison bridges!"
-                ],
-                "location": "Waterfront"
-            }
-        ]
+    def __init__(self, player_store: Optional[PlayerStore] = None, hunt: Optional[Hunt] = None,
+                 hunt_file: Optional[str] = None, verdict_cache: Optional[TTLCache] = None,
+                 openai_client=None, answer_batcher: Optional[AnswerBatcher] = None):
+        # One pooled OpenAI client per process (shared between hunts); None without an API key
+        if openai_client is None:
+            openai_client = create_llm_client()
+        self.openai_client = openai_client
+        self.has_openai = openai_client is not None
+        
+        # Uncertain answers to the same clue are judged together in one prompt
+        if answer_batcher is None:
+            answer_batcher = create_answer_batcher(
+                openai_client, Config.OPENAI_BATCH_SIZE, Config.OPENAI_BATCH_WAIT_MS / 1000
+            )
+        self.answer_batcher = answer_batcher
+        
+        # Cache of OpenAI verdicts keyed on (hunt, hunt file hash, clue id, normalized answer)
+        if verdict_cache is None:
+            verdict_cache = TTLCache(
+                max_size=Config.VERDICT_CACHE_SIZE,
+                ttl=Config.VERDICT_CACHE_TTL,
+                db_path=Config.VERDICT_CACHE_PATH,
+                table="verdicts"
+            )
+        self.verdict_cache = verdict_cache
+        
+        # Game data storage: phone_number -> player_data (in-memory or SQLite)
+        if player_store is None:
+            player_store = create_player_store(Config.PLAYER_STORE, Config.PLAYER_DB_PATH)
+        self.players = player_store
+        
+        # Completed games are kept here (and in a SQLite store) since get_final_score resets the player
+        self.leaderboard = Leaderboard(store=self.players)
+        
+        # One message per player at a time, so double-sends can't double-award points
+        self.player_locks = StripedLock(Config.PLAYER_LOCK_STRIPES)
+        
+        # Running aggregates for /game-stats, seeded once from existing players
+        self.stats = GameStats(
+            total_players=len(self.players),
+            active_players=sum(1 for p in self.players.values() if p.game_started),
+            store=self.players
+        )
+        
+        # Hunt definition (clues, scoring, messages) compiled from a data file
+        self.hunt_file = hunt_file or Config.HUNT_FILE
+        self.hunt = hunt or load_hunt(self.hunt_file)
+    
+    @property
+    def clues(self):
+        return self.hunt.clues
+    
+    @property
+    def answer_indexes(self):
+        return self.hunt.answer_indexes
     
-    def get_player_data(self, phone_number: str) -> Dict:
+    def reload_hunt(self) -> Hunt:
+        """Pick up edits to the hunt file; unchanged files come from the compiled cache."""
+        self.hunt = load_hunt(self.hunt_file)
+        return self.hunt
+    
+    @contextmanager
+    def player_lock(self, phone_number: str):
+        """Serialize a player's messages across threads and (for SQLite) worker processes."""
+        with self.player_locks.hold(phone_number), self.players.lock(phone_number):
+            yield
+    
+    def get_player_data(self, phone_number: str) -> Player:
         """Get or create player data."""
-        if phone_number not in self.players:
-            self.players[phone_number] = {
-                "current_clue": 0,
-                "total_score": 0,
-                "hints_used": 0,
-                "game_started": False,
-                "completed_clues": [],
-                "start_time": None,
-                "last_activity": datetime.now().isoformat()
-            }
-        return self.players[phone_number]
+        player = self.players.get(phone_number)
+        if player is None:
+            player = Player()
+            self.players[phone_number] = player
+            self.stats.player_added()
+        return player
     
+    @serialized_per_player
     def start_game(self, phone_number: str) -> str:
         """Start the scavenger hunt game."""
         player = self.get_player_data(phone_number)
-        player["game_started"] = True
-        player["current_clue"] = 1
-        player["start_time"] = datetime.now().isoformat()
-        player["hints_used"] = 0
+        if not player.game_started:
+            self.stats.game_started()
+        player.game_started = True
+        player.current_clue = 1
+        player.start_time = int(time.time())
+        player.hints_used = 0
+        self.players[phone_number] = player
         
-        welcome_msg = """🎯 Welcome to the Portland Scavenger Hunt! 🌲
-
-You'll visit 5 amazing Portland locations. Answer correctly to earn points:
-• First try: 40 points
-• With 1 hint: 30 points  
-• With 2 hints: 20 points
-• With 3 hints: 10 points
-
-Let's begin your adventure!
-
-"""
-        
-        first_clue = self.clues[0]["clue"]
-        return welcome_msg + first_clue
+        return self.hunt.start_reply
     
+    @serialized_per_player
     def process_answer(self, phone_number: str, user_message: str) -> str:
-        """Process user's answer using OpenAI to check if it matches expected responses."""
+        """Process user's answer, matching locally and using OpenAI only for uncertain answers."""
         player = self.get_player_data(phone_number)
         
-        if not player["game_started"]:
-            return "Send 'READY' to start the Portland Scavenger Hunt! 🎯"
+        if not player.game_started:
+            return self.hunt.not_started
         
-        current_clue_index = player["current_clue"] - 1
+        current_clue_index = player.current_clue - 1
         if current_clue_index >= len(self.clues):
             return self.get_final_score(phone_number)
         
         current_clue = self.clues[current_clue_index]
         
-        # Use OpenAI to check if the answer is correct
-        is_correct = self.check_answer_with_ai(user_message, current_clue["expected_answers"])
+        # Match locally, using OpenAI only if the answer is uncertain
+        started = time.perf_counter()
+        is_correct, path = self.judge_answer(
+            user_message, current_clue["expected_answers"], current_clue["id"]
+        )
+        logger.info(
+            "Answer to clue %s judged %s (%s)", current_clue["id"], is_correct, path,
+            extra={"event": "answer", "phone": phone_number, "hunt": self.hunt.hunt_id,
+                   "clue": current_clue["id"], "correct": is_correct, "verdict_source": path,
+                   "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+        )
         
         if is_correct:
+            _correct_answers.inc()
             return self.handle_correct_answer(phone_number)
         else:
+            _incorrect_answers.inc()
             return self.handle_incorrect_answer(phone_number)
     
-    def check_answer_with_ai(self, user_answer: str, expected_answers: List[str]) -> bool:
-        """Use OpenAI to determine if the user's answer matches any expected answer."""
+    def check_answer_with_ai(self, user_answer: str, expected_answers: List[str],
+                             clue_id: Optional[int] = None) -> bool:
+        """Check the user's answer locally, asking OpenAI only when the match is uncertain."""
+        return self.judge_answer(user_answer, expected_answers, clue_id)[0]
+    
+    def judge_answer(self, user_answer: str, expected_answers: List[str],
+                     clue_id: Optional[int] = None) -> Tuple[bool, str]:
+        """Like check_answer_with_ai, also returning how the verdict was reached."""
+        started = time.perf_counter()
+        is_correct, path = self._judge_answer(user_answer, expected_answers, clue_id)
+        _check_timers[path].observe(time.perf_counter() - started)
+        return is_correct, path
+    
+    def _judge_answer(self, user_answer: str, expected_answers: List[str],
+                      clue_id: Optional[int]) -> Tuple[bool, str]:
+        """The verdict and how it was reached (the `path` label of the timing metric)."""
+        answer_index = self.answer_indexes.get(clue_id)
+        if answer_index is None:
+            answer_index = AnswerIndex(expected_answers)
+        match = answer_index.match(user_answer)
+        if match.verdict != UNCERTAIN:
+            return match.verdict == CORRECT, "local"
+        
         if not self.has_openai or not self.openai_client:
-            # Fallback to simple string matching if no OpenAI
-            user_lower = user_answer.lower()
-            return any(expected.lower() in user_lower for expected in expected_answers)
+            # Without OpenAI an uncertain answer is treated as incorrect
+            return False, "unverified"
+        
+        # The hunt file's hash keeps verdicts from before an edit to its clues from being reused
+        clue_key = f"{self.hunt.hunt_id}:{self.hunt.source_hash[:16]}:{clue_id}"
+        cache_key = f"{clue_key}:{normalize(user_answer)}" if clue_id is not None else None
+        if cache_key:
+            cached = self.verdict_cache.get(cache_key)
+            if cached is not None:
+                return cached, "cache"
         
         try:
-            expected_list = ", ".join(expected_answers)
+            if self.answer_batcher is not None and clue_id is not None:
+                verdict = self.answer_batcher.verify(clue_key, expected_answers, user_answer, self.hunt.name)
+                try:
+                    is_correct = verdict.result(timeout=self.answer_batcher.result_timeout)
+                except FutureTimeoutError:
+                    raise LLMError("Timed out waiting for the batched verdict")
+            else:
+                is_correct = self.ask_openai(user_answer, expected_answers)
+            if cache_key:
+                self.verdict_cache.set(cache_key, is_correct)
+            return is_correct, "model"
             
-            prompt = f"""
-You are helping with a Portland scavenger hunt. Determine if the user's answer matches any of the expected answers.
+        except LLMError as e:
+            # Upstream failing, slow or circuit open -> keep the local verdict
+            logger.warning("OpenAI unavailable, using local matching: %s", e)
+            return False, "model_error"
+    
+    def ask_openai(self, user_answer: str, expected_answers: List[str]) -> bool:
+        """Judge a single answer with its own prompt."""
+        expected_list = ", ".join(expected_answers)
+        
+        prompt = f"""
+You are helping with a {self.hunt.name}. Determine if the user's answer matches any of the expected answers.
 
 Expected answers: {expected_list}
 
-User's answer: "{user_answer}"
+User's answer: {quote_answer(user_answer)}
 
 The user's answer should be considered correct if it:
 1. Contains the main name/location mentioned in the expected answers
@@ -239,142 +242,107 @@ The user's answer should be considered correct if it:
 
 Respond with only "CORRECT" or "INCORRECT".
 """
-            
-            # Use only the legacy API style to avoid proxies issues
-            import openai as openai_module
-            
-            # Ensure we're using the legacy API
-            if hasattr(openai_module, 'ChatCompletion'):
-                response = openai_module.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=10,
-                    temperature=0
-                )
-                result = response.choices[0].message.content.strip().upper()
-                return result == "CORRECT"
-            else:
-                # If legacy API not available, fall back to string matching
-                print("Legacy OpenAI API not available, using string matching")
-                user_lower = user_answer.lower()
-                return any(expected.lower() in user_lower for expected in expected_answers)
-            
-        except Exception as e:
-            # Any error with OpenAI -> fall back to string matching
-            print(f"OpenAI unavailable, using string matching: {type(e).__name__}")
-            user_lower = user_answer.lower()
-            return any(expected.lower() in user_lower for expected in expected_answers)
+        
+        result = self.openai_client.complete(prompt).strip().upper()
+        return result == "CORRECT"
     
     def handle_correct_answer(self, phone_number: str) -> str:
         """Handle when user gets the answer correct."""
         player = self.get_player_data(phone_number)
-        current_clue_index = player["current_clue"] - 1
+        current_clue_index = player.current_clue - 1
         current_clue = self.clues[current_clue_index]
         
         # Calculate points based on hints used
-        points_map = {0: 40, 1: 30, 2: 20, 3: 10}
-        points = points_map.get(player["hints_used"], 10)
+        points = self.hunt.points_for(player.hints_used)
         
-        player["total_score"] += points
-        player["completed_clues"].append({
-            "clue_id": current_clue["id"],
-            "points_earned": points,
-            "hints_used": player["hints_used"]
-        })
+        player.total_score += points
+        player.record_clue(current_clue["id"], points, player.hints_used)
+        self.stats.clue_finished(current_clue["id"], player.hints_used)
         
-        response = f"🎉 Correct! You earned {points} points!\n\n"
+        response = self.hunt.correct_reply(player.hints_used)
         
         # Move to next clue
-        player["current_clue"] += 1
-        player["hints_used"] = 0  # Reset hints for next clue
+        player.current_clue += 1
+        player.hints_used = 0  # Reset hints for next clue
+        self.players[phone_number] = player
         
-        if player["current_clue"] <= len(self.clues):
-            if player["current_clue"] == len(self.clues) + 1:
-                # Game completed
-                return response + self.get_final_score(phone_number)
-            else:
-                # Next clue
-                next_clue = self.clues[player["current_clue"] - 1]
-                response += f"📍 Clue {player['current_clue']}/5:\n\n{next_clue['clue']}"
+        if player.current_clue > len(self.clues):
+            # Game completed
+            self.complete_game(phone_number, player)
+            return response + self.get_final_score(phone_number)
+        else:
+            # Next clue
+            response += self.hunt.clue_prompts[player.current_clue - 1]
         
         return response
     
     def handle_incorrect_answer(self, phone_number: str) -> str:
         """Handle when user gets the answer wrong."""
         player = self.get_player_data(phone_number)
-        current_clue_index = player["current_clue"] - 1
+        current_clue_index = player.current_clue - 1
         current_clue = self.clues[current_clue_index]
         
-        if player["hints_used"] < len(current_clue["hints"]):
+        if player.hints_used < len(current_clue["hints"]):
             # Provide a hint
-            hint = current_clue["hints"][player["hints_used"]]
-            player["hints_used"] += 1
+            hint_reply = self.hunt.hint_replies[current_clue_index][player.hints_used]
+            player.hints_used += 1
+            self.players[phone_number] = player
+            _hints_sent.inc()
             
-            return f"❌ Not quite right! Here's a hint:\n\n{hint}\n\nTry again! 🤔"
+            return hint_reply
         else:
             # No more hints, give the answer and move on
-            correct_answer = current_clue["expected_answers"][0]
-            player["total_score"] += 5  # Consolation points
-            player["completed_clues"].append({
-                "clue_id": current_clue["id"],
-                "points_earned": 5,
-                "hints_used": player["hints_used"]
-            })
+            consolation = self.hunt.consolation_points
+            player.total_score += consolation
+            player.record_clue(current_clue["id"], consolation, player.hints_used)
+            self.stats.clue_finished(current_clue["id"], player.hints_used)
             
-            response = f"❌ The answer was: {correct_answer}\nYou get 5 consolation points! 💪\n\n"
+            response = self.hunt.reveal_replies[current_clue_index]
             
             # Move to next clue
-            player["current_clue"] += 1
-            player["hints_used"] = 0
+            player.current_clue += 1
+            player.hints_used = 0
+            self.players[phone_number] = player
             
-            if player["current_clue"] <= len(self.clues):
-                if player["current_clue"] == len(self.clues) + 1:
-                    return response + self.get_final_score(phone_number)
-                else:
-                    next_clue = self.clues[player["current_clue"] - 1]
-                    response += f"📍 Clue {player['current_clue']}/5:\n\n{next_clue['clue']}"
+            if player.current_clue > len(self.clues):
+                self.complete_game(phone_number, player)
+                return response + self.get_final_score(phone_number)
+            else:
+                response += self.hunt.clue_prompts[player.current_clue - 1]
             
             return response
     
+    def complete_game(self, phone_number: str, player: Player) -> None:
+        """Record a finished hunt on the leaderboard and in the running stats."""
+        self.leaderboard.record(phone_number, player.total_score)
+        self.stats.game_completed(player.total_score)
+    
+    @serialized_per_player
+    def quit_game(self, phone_number: str) -> None:
+        """Remove a player who quit."""
+        player = self.players.get(phone_number)
+        if player is not None:
+            del self.players[phone_number]
+            self.stats.player_removed(player.game_started)
+    
     def get_final_score(self, phone_number: str) -> str:
         """Get final score and game completion message."""
         player = self.get_player_data(phone_number)
         
-        score_msg = f"""🏆 Congratulations! You've completed the Portland Scavenger Hunt!
-
-Final Score: {player['total_score']} points
-
-Your Performance:
-"""
+        score_msg = self.hunt.final_score.format(score=player.total_score)
         
-        for completed in player["completed_clues"]:
-            clue_id = completed["clue_id"]
-            points = completed["points_earned"]
-            hints = completed["hints_used"]
-            score_msg += f"• Clue {clue_id}: {points} points ({hints} hints used)\n"
+        for clue_id, points, hints in player.results():
+            score_msg += self.hunt.final_clue.format(clue_id=clue_id, points=points, hints=hints)
         
         # Score ranking
-        if player['total_score'] >= 180:
-            rank = "🥇 Portland Expert!"
-        elif player['total_score'] >= 150:
-            rank = "🥈 City Explorer!"
-        elif player['total_score'] >= 100:
-            rank = "🥉 Tourist Guide!"
-        else:
-            rank = "🎯 Adventure Seeker!"
+        rank = self.hunt.rank_for(player.total_score)
         
-        score_msg += f"\nRank: {rank}\n\nThanks for exploring Portland! Send 'READY' to play again! 🌲"
+        score_msg += self.hunt.final_rank.format(rank=rank)
         
         # Reset player for new game
-        self.players[phone_number] = {
-            "current_clue": 0,
-            "total_score": 0,
-            "hints_used": 0,
-            "game_started": False,
-            "completed_clues": [],
-            "start_time": None,
-            "last_activity": datetime.now().isoformat()
-        }
+        if player.game_started:
+            self.stats.game_ended()
+        self.players[phone_number] = Player()
         
         return score_msg
     
@@ -382,19 +350,16 @@ Your Performance:
         """Get current game status for a player."""
         player = self.get_player_data(phone_number)
         
-        if not player["game_started"]:
-            return "🎯 Ready to explore Portland? Send 'READY' to start the scavenger hunt!"
+        if not player.game_started:
+            return self.hunt.status_idle
         
-        current_clue_num = player["current_clue"]
+        current_clue_num = player.current_clue
         if current_clue_num > len(self.clues):
-            return "🏆 Game completed! Send 'READY' to play again!"
+            return self.hunt.status_done
         
-        return f"""📊 Current Status:
-• Clue: {current_clue_num}/5
-• Score: {player['total_score']} points
-• Hints used this clue: {player['hints_used']}/3
-
-Current clue: {self.clues[current_clue_num - 1]['clue']}"""
+        return self.hunt.status_prompts[current_clue_num - 1].format(
+            score=player.total_score, hints_used=player.hints_used
+        )
 
 # Global game instance
 game = ScavengerHuntGame() 
\ No newline at end of file
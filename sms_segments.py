@@ -0,0 +1,163 @@
+"""
+SMS segment accounting and compaction.
+Carriers bill per segment: 160 GSM-7 characters (153 per part once a message
+is split), but a single character outside GSM-7, such as an emoji, switches
+the whole message to UCS-2 at 70 (67) characters per segment. This module
+counts segments for a reply, can substitute characters to keep a reply in
+GSM-7, and can trim a reply to a segment budget.
+"""
+
+import functools
+import re
+import threading
+import unicodedata
+from typing import Dict, NamedTuple, Tuple
+
+GSM7 = "GSM-7"
+UCS2 = "UCS-2"
+
+GSM7_BASIC = frozenset(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+GSM7_EXTENDED = frozenset("^{}\\[~]|€\f")  # sent as escape + char, two septets each
+
+# (single segment, per segment once split) in characters / UTF-16 code units
+SEGMENT_SIZES = {GSM7: (160, 153), UCS2: (70, 67)}
+
+SUBSTITUTIONS = {
+    "•": "-", "–": "-", "—": "-", "‘": "'", "’": "'", "“": '"', "”": '"',
+    "…": "...", "\u00a0": " ", "\t": " ", "×": "x", "·": "-"
+}
+SPACES = re.compile(r"[ ]{2,}")
+
+
+class SegmentInfo(NamedTuple):
+    encoding: str
+    units: int  # septets for GSM-7, UTF-16 code units for UCS-2
+    segments: int
+
+
+def is_gsm7(text: str) -> bool:
+    return all(c in GSM7_BASIC or c in GSM7_EXTENDED for c in text)
+
+
+def _units(text: str, encoding: str) -> int:
+    if encoding == GSM7:
+        return len(text) + sum(1 for c in text if c in GSM7_EXTENDED)
+    return len(text.encode("utf-16-le")) // 2
+
+
+def segment_info(text: str) -> SegmentInfo:
+    """Encoding, length and number of billable segments for a message."""
+    encoding = GSM7 if is_gsm7(text) else UCS2
+    units = _units(text, encoding)
+    single, multi = SEGMENT_SIZES[encoding]
+    segments = 1 if units <= single else -(-units // multi)
+    return SegmentInfo(encoding, units, segments)
+
+
+def to_gsm7(text: str) -> str:
+    """Replace or drop characters outside GSM-7 (emoji are dropped, accents stripped)."""
+    out = []
+    for c in text:
+        if c in GSM7_BASIC or c in GSM7_EXTENDED:
+            out.append(c)
+        elif c in SUBSTITUTIONS:
+            out.append(SUBSTITUTIONS[c])
+        else:
+            # "ó" -> "o"; emoji and other symbols have no GSM-7 form and are dropped
+            out.append("".join(
+                d for d in unicodedata.normalize("NFKD", c) if d in GSM7_BASIC or d in GSM7_EXTENDED
+            ))
+    lines = (SPACES.sub(" ", line).strip() for line in "".join(out).split("\n"))
+    return "\n".join(lines).strip()
+
+
+def trim_to_segments(text: str, max_segments: int) -> str:
+    """Cut a message at a word boundary so it fits in max_segments, marking the cut."""
+    info = segment_info(text)
+    if info.segments <= max_segments:
+        return text
+    single, multi = SEGMENT_SIZES[info.encoding]
+    ellipsis = "..." if info.encoding == GSM7 else "…"
+    limit = (single if max_segments == 1 else multi * max_segments) - _units(ellipsis, info.encoding)
+
+    used = cut = 0
+    for cut, c in enumerate(text):
+        used += _units(c, info.encoding)
+        if used > limit:
+            break
+    # Prefer ending on a line or word break if one is reasonably close
+    boundary = max(text.rfind("\n", 0, cut), text.rfind(" ", 0, cut))
+    if boundary > cut // 2:
+        cut = boundary
+    return text[:cut].rstrip() + ellipsis
+
+
+class SegmentStats:
+    """Running segment counts for outgoing replies."""
+
+    def __init__(self):
+        self.replies = 0
+        self.segments = 0
+        self.segments_before = 0  # what the replies would have cost uncompacted
+        self.ucs2_replies = 0
+        self.substituted = 0
+        self.trimmed = 0
+        self._lock = threading.Lock()
+
+    def record(self, before: SegmentInfo, after: SegmentInfo, substituted: bool, trimmed: bool) -> None:
+        with self._lock:
+            self.replies += 1
+            self.segments += after.segments
+            self.segments_before += before.segments
+            self.ucs2_replies += after.encoding == UCS2
+            self.substituted += substituted
+            self.trimmed += trimmed
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "replies": self.replies,
+                "segments": self.segments,
+                "segments_saved": self.segments_before - self.segments,
+                "average_segments": round(self.segments / self.replies, 2) if self.replies else 0,
+                "ucs2_replies": self.ucs2_replies,
+                "substituted": self.substituted,
+                "trimmed": self.trimmed
+            }
+
+
+class SegmentCompactor:
+    """Applies the configured GSM-7 substitution and segment budget to replies."""
+
+    def __init__(self, gsm7_only: bool = False, max_segments: int = 0):
+        self.gsm7_only = gsm7_only
+        self.max_segments = max_segments
+        self.stats = SegmentStats()
+        # Static replies repeat constantly; remember their compacted form
+        self._compact = functools.lru_cache(maxsize=1024)(self._compact_uncached)
+
+    def apply(self, text: str) -> str:
+        """The compacted text, without recording metrics."""
+        return self._compact(text)[0]
+
+    def compact(self, text: str) -> Tuple[str, SegmentInfo]:
+        """Return the reply to send and its segment info, recording the metrics."""
+        compacted, before, after, substituted, trimmed = self._compact(text)
+        self.stats.record(before, after, substituted, trimmed)
+        return compacted, after
+
+    def _compact_uncached(self, text: str):
+        before = segment_info(text)
+        compacted = text
+        substituted = trimmed = False
+        if self.gsm7_only and before.encoding == UCS2:
+            compacted = to_gsm7(compacted)
+            substituted = True
+        if self.max_segments > 0 and segment_info(compacted).segments > self.max_segments:
+            compacted = trim_to_segments(compacted, self.max_segments)
+            trimmed = True
+        after = segment_info(compacted) if compacted is not text else before
+        return compacted, before, after, substituted, trimmed
@@ -0,0 +1,138 @@
+"""
+Outbound SMS send queue.
+Messages are sent by a pool of background threads, paced by token buckets
+(one for the account, one per sending number) and retried with backoff when
+Twilio answers 429 or 5xx, so a broadcast to thousands of players drains at
+the rate Twilio accepts instead of failing halfway.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+import requests
+
+from worker_pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Allows `rate` events per second on average, with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token, returning how many seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Tokens may go negative: later callers queue up behind earlier ones
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def take(self) -> None:
+        """Block until a token is available."""
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Twilio errors worth retrying: rate limiting, server errors and dropped connections."""
+    status = getattr(error, "status", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return isinstance(error, (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError))
+
+
+class SendQueue(WorkerPool):
+    """Rate-limited outbound SMS with retries, drained by background worker threads."""
+
+    def __init__(self, send: Callable[[str, str, str], object], default_from: Optional[str] = None,
+                 workers: int = 4, queue_size: int = 10000, account_rate: float = 30.0,
+                 number_rate: float = 1.0, max_retries: int = 3, backoff: float = 0.5):
+        """
+        Args:
+            send: send(to_number, from_number, body) -> Twilio message; raises on failure
+            default_from: sending number when a message doesn't name one
+            workers: number of worker threads
+            queue_size: maximum number of messages waiting to be sent
+            account_rate: messages per second across the account
+            number_rate: messages per second from each sending number
+            max_retries: retries after a 429/5xx before giving up on a message
+            backoff: first retry delay in seconds, doubled on each retry
+        """
+        super().__init__(workers, queue_size, name="sms-send")
+        self.send_func = send
+        self.default_from = default_from
+        self.number_rate = number_rate
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.account_bucket = TokenBucket(account_rate)
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self._number_buckets = {}  # sending number -> TokenBucket
+
+    def enqueue(self, to_number: str, body: str, from_number: Optional[str] = None) -> bool:
+        """Queue a message; returns False if the queue is full or shutting down."""
+        return self._put((to_number, from_number or self.default_from, body))
+
+    def broadcast(self, to_numbers: Iterable[str], body: str, from_number: Optional[str] = None) -> Dict[str, int]:
+        """Queue the same message to many numbers."""
+        queued = dropped = 0
+        for to_number in to_numbers:
+            if self.enqueue(to_number, body, from_number):
+                queued += 1
+            else:
+                dropped += 1
+        return {"queued": queued, "dropped": dropped}
+
+    def send(self, to_number: str, body: str, from_number: Optional[str] = None):
+        """Send one message now on the calling thread, under the same rate limits and retries."""
+        return self._deliver(to_number, from_number or self.default_from, body)
+
+    def stats(self) -> Dict[str, int]:
+        return {"pending": self.pending(), "sent": self.sent, "failed": self.failed, "retried": self.retried}
+
+    def _number_bucket(self, from_number: Optional[str]) -> TokenBucket:
+        with self._lock:
+            bucket = self._number_buckets.get(from_number)
+            if bucket is None:
+                bucket = self._number_buckets[from_number] = TokenBucket(self.number_rate)
+            return bucket
+
+    def _deliver(self, to_number: str, from_number: Optional[str], body: str):
+        number_bucket = self._number_bucket(from_number)
+        for attempt in range(self.max_retries + 1):
+            self.account_bucket.take()
+            number_bucket.take()
+            try:
+                message = self.send_func(to_number, from_number, body)
+                with self._lock:
+                    self.sent += 1
+                return message
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    with self._lock:
+                        self.failed += 1
+                    raise
+                with self._lock:
+                    self.retried += 1
+                time.sleep(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    def _handle(self, item) -> None:
+        to_number, from_number, body = item
+        try:
+            self._deliver(to_number, from_number, body)
+        except Exception as e:
+            logger.error("Error sending SMS to %s: %s", to_number, e, extra={"event": "sms_error", "phone": to_number})
@@ -0,0 +1,108 @@
+"""
+Background-refreshed snapshot cache.
+Keeps the latest result of a slow remote fetch (e.g. recent Twilio messages)
+and serves it immediately, refreshing it in a background thread every `ttl`
+seconds while someone is reading it. Past the TTL the old snapshot is still
+served (stale-while-revalidate) while a refresh runs.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotCache:
+    """Serves the latest fetched value, kept fresh by a background refresher."""
+
+    def __init__(self, fetch: Callable[[], Any], ttl: float = 30.0, idle_timeout: float = 300.0,
+                 first_fetch_timeout: float = 10.0):
+        """
+        Args:
+            fetch: fetch() -> value; may be slow and may raise
+            ttl: seconds between refreshes, and the age after which a snapshot is stale
+            idle_timeout: stop refreshing after this many seconds without a read
+            first_fetch_timeout: how long a read waits when there is no snapshot yet
+        """
+        self.fetch = fetch
+        self.ttl = ttl
+        self.idle_timeout = idle_timeout
+        self.first_fetch_timeout = first_fetch_timeout
+        self.fetches = 0
+        self.errors = 0
+        self.last_error = None
+        self.last_latency = None  # seconds
+        self._value = None
+        self._fetched_at = None  # wall clock, for display
+        self._fetched_mono = 0.0
+        self._last_read = 0.0
+        self._refresher = None
+        self._lock = threading.Lock()
+        self._updated = threading.Condition(self._lock)
+
+    def get(self) -> Tuple[Any, bool]:
+        """Return (snapshot, stale), waiting for the first fetch if there is none yet.
+
+        Raises the fetch error if no snapshot could be fetched at all.
+        """
+        with self._lock:
+            self._last_read = time.monotonic()
+            self._ensure_refresher()
+            if self._value is None:
+                attempts = self.fetches + self.errors
+                self._updated.wait_for(
+                    lambda: self._value is not None or self.fetches + self.errors > attempts,
+                    self.first_fetch_timeout
+                )
+                if self._value is None:
+                    raise self.last_error or TimeoutError("No snapshot fetched yet")
+            return self._value, time.monotonic() - self._fetched_mono > self.ttl
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "fetched_at": self._fetched_at.isoformat() if self._fetched_at else None,
+                "age_seconds": round(time.monotonic() - self._fetched_mono, 1) if self._fetched_at else None,
+                "fetch_latency_ms": round(self.last_latency * 1000, 1) if self.last_latency is not None else None,
+                "fetches": self.fetches,
+                "errors": self.errors,
+                "last_error": str(self.last_error) if self.last_error else None,
+                "refreshing": self._refresher is not None
+            }
+
+    def _ensure_refresher(self) -> None:
+        # Called with the lock held; started lazily so it runs after a gunicorn fork
+        if self._refresher is None:
+            self._refresher = threading.Thread(target=self._run, name="snapshot-refresh", daemon=True)
+            self._refresher.start()
+
+    def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                value = self.fetch()
+            except Exception as e:
+                logger.error(f"Snapshot refresh failed: {str(e)}")
+                with self._lock:
+                    self.errors += 1
+                    self.last_error = e
+                    self._updated.notify_all()
+            else:
+                finished = time.monotonic()
+                with self._lock:
+                    self._value = value
+                    self._fetched_at = datetime.now()
+                    self._fetched_mono = finished
+                    self.fetches += 1
+                    self.last_latency = finished - started
+                    self._updated.notify_all()
+
+            time.sleep(self.ttl)
+            with self._lock:
+                # Nobody is looking: stop polling the upstream until the next read
+                if time.monotonic() - self._last_read > self.idle_timeout:
+                    self._refresher = None
+                    return
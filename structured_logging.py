@@ -0,0 +1,212 @@
+"""
+Asynchronous, optionally structured logging.
+Request threads only put log records on a queue; a background listener
+formats them (as text, or as JSON lines with LOG_FORMAT=json) and writes them
+in batches, so slow log disks don't show up in webhook latency. Messages are
+%-formatted lazily on the listener, and high-volume events can be sampled
+(LOG_SAMPLE_RATES=sms_received=0.1,...).
+
+Structured fields are passed with `extra`, e.g.
+    logger.info("Received SMS from %s", phone, extra={"event": "sms_received", "phone": phone})
+Phone numbers are written as a salted hash (`phone_hash`), never in clear,
+in JSON mode.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+TEXT_FORMAT = "%(levelname)s:%(name)s:%(message)s"  # logging.basicConfig's default
+
+# Attributes every LogRecord has; anything else came from `extra`
+RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def phone_hash(phone_number: str, salt: str = "") -> str:
+    """Stable, non-reversible id for a phone number in logs."""
+    return hashlib.sha256((salt + phone_number).encode("utf-8")).hexdigest()[:16]
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any `extra` fields."""
+
+    def __init__(self, phone_salt: str = ""):
+        super().__init__()
+        self.phone_salt = phone_salt
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": message
+        }
+        for key, value in record.__dict__.items():
+            if key in RECORD_ATTRIBUTES:
+                continue
+            if key == "phone":
+                hashed = phone_hash(value, self.phone_salt) if value else None
+                entry["phone_hash"] = hashed
+                if value:
+                    # The text message may name the number too
+                    entry["msg"] = message.replace(value, hashed)
+            else:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """The usual text lines; structured fields other than the message are left out."""
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of the records for sampled events; warnings and errors always pass."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, "event", None))
+        return rate is None or random.random() < rate
+
+
+class BatchingStreamHandler(logging.StreamHandler):
+    """Buffers formatted lines and writes them with one write/flush per batch."""
+
+    def __init__(self, stream=None, batch_size: int = 100):
+        super().__init__(stream)
+        self.batch_size = batch_size
+        self._buffer = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._buffer.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if self._buffer and self.stream:
+                lines, self._buffer = self._buffer, []
+                self.stream.write("\n".join(lines) + "\n")
+            super().flush()
+        except (OSError, ValueError):
+            pass  # stream already closed, as logging.shutdown() tolerates at exit
+        finally:
+            self.release()
+
+
+class BatchingQueueListener(QueueListener):
+    """QueueListener that flushes its handlers' batches whenever the queue runs dry."""
+
+    def dequeue(self, block: bool):
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            for handler in self.handlers:
+                handler.flush()
+            return self.queue.get(block)
+
+
+class AsyncQueueHandler(QueueHandler):
+    """Puts records on the listener's queue without formatting them first.
+
+    The listener thread is started on first use (so it runs after a gunicorn
+    fork) and restarted if the process has forked since.
+    """
+
+    def __init__(self, log_queue: queue.Queue, handler: logging.Handler):
+        super().__init__(log_queue)
+        self.handler = handler
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Same process, so the record doesn't need to be pickled: the listener
+        # merges args into the message (and renders tracebacks) instead
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self._pid != os.getpid():
+            self._start_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1  # never block a request on logging
+
+    def _start_listener(self) -> None:
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._listener = BatchingQueueListener(self.queue, self.handler, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def stop(self) -> None:
+        """Write out everything queued and stop the listener."""
+        with self._start_lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()
+                self.handler.flush()
+            self._listener = None
+            self._pid = None
+
+
+def parse_sample_rates(spec: Optional[str]) -> Dict[str, float]:
+    """'sms_received=0.1,sms_reply=0.5' -> {'sms_received': 0.1, 'sms_reply': 0.5}"""
+    rates = {}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            event, rate = part.split("=", 1)
+            rates[event.strip()] = float(rate)
+    return rates
+
+
+def configure_logging(level: str = "INFO", log_format: str = "text", async_logging: bool = True,
+                      log_file: Optional[str] = None, batch_size: int = 100, queue_size: int = 10000,
+                      sample_rates: Optional[Dict[str, float]] = None, phone_salt: str = "") -> logging.Handler:
+    """Install the root handler: JSON or text lines, written directly or through the queue."""
+    stream = open(log_file, "a", encoding="utf-8") if log_file else sys.stderr
+    formatter = JsonFormatter(phone_salt) if log_format == "json" else TextFormatter()
+
+    if async_logging:
+        writer = BatchingStreamHandler(stream, batch_size)
+        writer.setFormatter(formatter)
+        handler = AsyncQueueHandler(queue.Queue(queue_size), writer)
+        atexit.register(handler.stop)
+    else:
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(formatter)
+    if sample_rates:
+        handler.addFilter(SamplingFilter(sample_rates))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    return handler
@@ -98,7 +98,7 @@ def test_game_flow():
         
         # Check player data was created
         player = test_game.get_player_data(test_phone)
-        if player["game_started"] and player["current_clue"] == 1:
+        if player.game_started and player.current_clue == 1:
             print("✅ Player data initialized correctly")
         else:
             print("❌ Player data not initialized correctly")
@@ -109,8 +109,8 @@ def test_game_flow():
         
         for answer in correct_answers:
             # Reset for each test
-            test_game.players[test_phone]["current_clue"] = 1
-            test_game.players[test_phone]["hints_used"] = 0
+            test_game.players[test_phone].current_clue = 1
+            test_game.players[test_phone].hints_used = 0
             
             response = test_game.process_answer(test_phone, answer)
             if "Correct! You earned 40 points" in response:
@@ -121,8 +121,8 @@ def test_game_flow():
             return False
         
         # Test wrong answer and hint system
-        test_game.players[test_phone]["current_clue"] = 1
-        test_game.players[test_phone]["hints_used"] = 0
+        test_game.players[test_phone].current_clue = 1
+        test_game.players[test_phone].hints_used = 0
         
         wrong_response = test_game.process_answer(test_phone, "Wrong Answer")
         if "Not quite right! Here's a hint:" in wrong_response:
@@ -161,25 +161,25 @@ def test_scoring_system():
         response = test_game.process_answer(test_phone, "Rose Garden")
         
         player = test_game.get_player_data(test_phone)
-        if player["total_score"] == 40:
+        if player.total_score == 40:
             print("✅ No hints: 40 points awarded correctly")
         else:
-            print(f"❌ Expected 40 points, got {player['total_score']}")
+            print(f"❌ Expected 40 points, got {player.total_score}")
             return False
         
         # Test scoring with 1 hint (should get 30 points)
-        test_game.players[test_phone]["current_clue"] = 2
-        test_game.players[test_phone]["hints_used"] = 0
+        test_game.players[test_phone].current_clue = 2
+        test_game.players[test_phone].hints_used = 0
         
         # Get a hint first
         test_game.process_answer(test_phone, "Wrong Answer")
         # Then answer correctly
         response = test_game.process_answer(test_phone, "Powell's Books")
         
-        if player["total_score"] == 70:  # 40 + 30
+        if player.total_score == 70:  # 40 + 30
             print("✅ With 1 hint: 30 points awarded correctly")
         else:
-            print(f"❌ Expected 70 total points, got {player['total_score']}")
+            print(f"❌ Expected 70 total points, got {player.total_score}")
             return False
         
         print("✅ Scoring system test completed successfully")
@@ -239,6 +239,785 @@ def test_portland_locations():
         print(f"❌ Portland locations test failed: {e}")
         return False
 
+def test_answer_matching():
+    """Test the local answer matcher tiers."""
+    try:
+        from answer_matcher import match_answer, CORRECT, INCORRECT, UNCERTAIN
+        from scavenger_game import ScavengerHuntGame
+        
+        test_game = ScavengerHuntGame()
+        
+        print("\n🔎 Testing Answer Matching:")
+        
+        rose_answers = test_game.clues[0]["expected_answers"]
+        powells_answers = test_game.clues[1]["expected_answers"]
+        
+        cases = [
+            ("powells", powells_answers, CORRECT),
+            ("I think it's the Rose Garden!", rose_answers, CORRECT),
+            ("Powels Books", powells_answers, CORRECT),
+            # Misspellings whose phonetic key differs from every alias
+            ("Powell", powells_answers, CORRECT),
+            ("Porwells", powells_answers, CORRECT),
+            ("Wrong Answer", rose_answers, INCORRECT),
+            ("Japanese Garden", rose_answers, UNCERTAIN),
+            # Listing several places isn't a correct answer, even if one of them is
+            ("powells or pioneer square or the zoo", powells_answers, UNCERTAIN),
+            # ...but describing where the place is doesn't count as a list
+            ("the rose garden by the zoo", rose_answers, CORRECT),
+            ("Rose garden in washington park", rose_answers, CORRECT),
+            ("Powells bookstore pearl district", powells_answers, CORRECT),
+            ("Voodoo doughnut on 3rd ave", test_game.clues[2]["expected_answers"], CORRECT),
+        ]
+        
+        for answer, expected_answers, verdict in cases:
+            result = match_answer(answer, expected_answers)
+            if result.verdict == verdict:
+                print(f"✅ '{answer}' matched as {verdict} (score {result.score:.2f})")
+            else:
+                print(f"❌ '{answer}' expected {verdict}, got {result.verdict} (score {result.score:.2f})")
+                return False
+        
+        # Prebuilt indexes handle large alias lists in one pass
+        from answer_matcher import AnswerIndex
+        aliases = [f"Food Cart Pod {n}" for n in range(500)] + ["Powell's City of Books"]
+        big_index = AnswerIndex(aliases)
+        result = big_index.match("meet me at powells city of books")
+        if result.verdict == CORRECT and result.alias == "Powell's City of Books":
+            print(f"✅ Index with {len(big_index)} aliases matched correctly")
+        else:
+            print(f"❌ Large alias index returned {result}")
+            return False
+        
+        # Wrong answers only fuzzy-score a bounded number of the aliases
+        import time
+        wrong_answers = ["Powel", "food truck corner", "qwerty uiop", "the red cart by the river near the bridge"]
+        started = time.perf_counter()
+        for _ in range(5):
+            for wrong in wrong_answers:
+                big_index.match(wrong)
+        per_answer_ms = (time.perf_counter() - started) / (5 * len(wrong_answers)) * 1000
+        if per_answer_ms > 10:
+            print(f"❌ Fuzzy matching against {len(big_index)} aliases took {per_answer_ms:.1f}ms per answer")
+            return False
+        print(f"✅ Fuzzy matching against {len(big_index)} aliases: {per_answer_ms:.2f}ms per answer")
+        
+        # The game's indexes know the other clues' places, so naming one is left uncertain
+        both = test_game.answer_indexes[test_game.clues[1]["id"]].match("powells and pioneer square")
+        if both.verdict != UNCERTAIN:
+            print(f"❌ Answer naming two clues' places matched as {both.verdict}")
+            return False
+        print("✅ Answers naming another clue's place are left to the model")
+        
+        if len(test_game.answer_indexes) != len(test_game.clues):
+            print("❌ Answer indexes not built for every clue")
+            return False
+        
+        # Uncertain answers are incorrect when OpenAI isn't available
+        test_game.has_openai = False
+        if test_game.check_answer_with_ai("Japanese Garden", rose_answers):
+            print("❌ Uncertain answer accepted without OpenAI")
+            return False
+        print("✅ Uncertain answers fall back to incorrect without OpenAI")
+        
+        print("✅ Answer matching test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Answer matching test failed: {e}")
+        return False
+
+def test_verdict_cache():
+    """Test LRU eviction, TTL expiry and on-disk persistence of the verdict cache."""
+    try:
+        import tempfile
+        import time
+        from cache_store import TTLCache
+        
+        print("\n🗃️ Testing Verdict Cache:")
+        
+        cache = TTLCache(max_size=2, ttl=60)
+        cache.set("1:rose garden", True)
+        cache.set("1:japanese garden", False)
+        cache.get("1:rose garden")
+        cache.set("2:books", True)  # evicts the least recently used entry
+        
+        if cache.get("1:japanese garden") is None and cache.get("1:rose garden") is True:
+            print("✅ Least recently used verdict evicted")
+        else:
+            print("❌ LRU eviction not working")
+            return False
+        
+        if cache.hits == 2 and cache.misses == 1:
+            print("✅ Hit/miss counters are correct")
+        else:
+            print(f"❌ Expected 2 hits and 1 miss, got {cache.hits}/{cache.misses}")
+            return False
+        
+        short_cache = TTLCache(max_size=10, ttl=0.01)
+        short_cache.set("1:rose garden", True)
+        time.sleep(0.02)
+        if short_cache.get("1:rose garden") is None:
+            print("✅ Expired verdicts are not returned")
+        else:
+            print("❌ TTL expiry not working")
+            return False
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "verdicts.sqlite3")
+            TTLCache(db_path=db_path, table="verdicts").set("3:vodoo", True)
+            
+            # A fresh cache (e.g. another worker) reads the verdict from disk
+            if TTLCache(db_path=db_path, table="verdicts").get("3:vodoo") is True:
+                print("✅ Verdicts persist in SQLite across instances")
+            else:
+                print("❌ SQLite backing not working")
+                return False
+            
+            # Expired rows are deleted from disk as new entries are written
+            import sqlite3
+            purging = TTLCache(ttl=0.01, db_path=db_path, table="purged", purge_interval=0.02)
+            for n in range(10):
+                purging.set(f"sid{n}", "reply")
+                time.sleep(0.01)
+            rows = sqlite3.connect(db_path).execute("SELECT COUNT(*) FROM purged").fetchone()[0]
+            if rows > 4:
+                print(f"❌ Expired rows not purged from disk: {rows} left")
+                return False
+            print(f"✅ Expired rows purged from disk ({rows} of 10 left)")
+        
+        print("✅ Verdict cache test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Verdict cache test failed: {e}")
+        return False
+
+def test_player_store():
+    """Test that the SQLite player store persists state across game instances."""
+    try:
+        import tempfile
+        from scavenger_game import ScavengerHuntGame
+        from player_store import InMemoryPlayerStore, SQLitePlayerStore
+        
+        print("\n💾 Testing Player Store:")
+        
+        if not isinstance(ScavengerHuntGame().players, InMemoryPlayerStore):
+            print("❌ Default player store should be in-memory")
+            return False
+        print("✅ In-memory store used by default")
+        
+        test_phone = "+1234567894"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "players.sqlite3")
+            
+            store = SQLitePlayerStore(db_path)
+            test_game = ScavengerHuntGame(player_store=store)
+            test_game.start_game(test_phone)
+            test_game.process_answer(test_phone, "Rose Garden")
+            test_game.process_answer(test_phone, "Wrong Answer")
+            store.close()
+            
+            # A new process (or worker) sees the same player
+            restored_store = SQLitePlayerStore(db_path)
+            restored_game = ScavengerHuntGame(player_store=restored_store)
+            player = restored_game.get_player_data(test_phone)
+            if player.current_clue == 2 and player.total_score == 40 and player.hints_used == 1:
+                print("✅ Player state restored from SQLite")
+            else:
+                print(f"❌ Unexpected restored player: {player}")
+                return False
+            
+            del restored_game.players[test_phone]
+            if test_phone in restored_game.players or len(restored_game.players) != 0:
+                print("❌ Player was not deleted")
+                return False
+            print("✅ Player deletion works")
+            restored_store.close()
+            
+            # Leaderboard and stats live in the store too, so two workers (or a
+            # restart) report the same completed games
+            shared_path = os.path.join(tmp_dir, "shared.sqlite3")
+            worker_a = ScavengerHuntGame(player_store=SQLitePlayerStore(shared_path))
+            worker_b = ScavengerHuntGame(player_store=SQLitePlayerStore(shared_path))
+            worker_a.start_game("+15550004321")
+            player = worker_a.get_player_data("+15550004321")
+            player.total_score = 300
+            worker_a.complete_game("+15550004321", player)
+            worker_a.players.flush()
+            board = worker_b.leaderboard.top()
+            stats = worker_b.stats.snapshot()
+            worker_a.players.close()
+            worker_b.players.close()
+            if [entry["phone"] for entry in board] != ["4321"] or stats["completed_games"] != 1 \
+                    or stats["active_players"] != 1 or worker_b.leaderboard.rank(250) != 2:
+                print(f"❌ Completion not shared between workers: {board}, {stats}")
+                return False
+            restarted = ScavengerHuntGame(player_store=SQLitePlayerStore(shared_path))
+            if restarted.leaderboard.total_completed != 1 or restarted.stats.snapshot()["average_score"] != 300:
+                print("❌ Leaderboard or stats lost on restart")
+                return False
+            restarted.players.close()
+            print("✅ Leaderboard and stats shared between workers and kept across restarts")
+        
+        print("✅ Player store test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Player store test failed: {e}")
+        return False
+
+def test_player_locking():
+    """Test that concurrent messages from one player are handled one at a time."""
+    try:
+        import tempfile
+        import threading
+        from scavenger_game import ScavengerHuntGame
+        from player_store import SQLitePlayerStore
+        
+        print("\n🔒 Testing Player Locking:")
+        
+        test_game = ScavengerHuntGame()
+        test_phone = "+1234567897"
+        test_game.start_game(test_phone)
+        
+        # A burst of double-sends must award clue 1 exactly once
+        threads = [
+            threading.Thread(target=test_game.process_answer, args=(test_phone, "Rose Garden"))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        player = test_game.get_player_data(test_phone)
+        results = list(player.results())
+        awarded = sum(points for _, points, _ in results)
+        if [clue_id for clue_id, _, _ in results].count(1) != 1 or player.total_score != awarded:
+            print(f"❌ Concurrent answers corrupted the player: {results}, score {player.total_score}")
+            return False
+        print("✅ Concurrent answers serialized per player")
+        
+        # Advisory lock shared by two stores on one database (two workers)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "players.sqlite3")
+            worker_a = SQLitePlayerStore(db_path)
+            worker_b = SQLitePlayerStore(db_path)
+            
+            with worker_a.lock(test_phone):
+                try:
+                    with worker_b.lock(test_phone, timeout=0.1):
+                        print("❌ Second worker took a held player lock")
+                        return False
+                except TimeoutError:
+                    pass
+                with worker_b.lock("+1234567898", timeout=0.1):
+                    pass
+                worker_a[test_phone] = player
+            
+            with worker_b.lock(test_phone, timeout=0.1):
+                if worker_b[test_phone].total_score != player.total_score:
+                    print("❌ Writes made under the lock were not visible to the next holder")
+                    return False
+            worker_a.close()
+            worker_b.close()
+        print("✅ SQLite advisory lock excludes other workers and publishes writes on release")
+        
+        print("✅ Player locking test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Player locking test failed: {e}")
+        return False
+
+def test_player_record():
+    """Test the compact Player record and its dict serialization."""
+    try:
+        from player import Player
+        
+        print("\n🧍 Testing Player Record:")
+        
+        old_shape = {
+            "current_clue": 3,
+            "total_score": 70,
+            "hints_used": 1,
+            "game_started": True,
+            "completed_clues": [
+                {"clue_id": 1, "points_earned": 40, "hints_used": 0},
+                {"clue_id": 2, "points_earned": 30, "hints_used": 1}
+            ],
+            "start_time": "2024-06-01T10:00:00",
+            "last_activity": "2024-06-01T10:15:00"
+        }
+        
+        player = Player.from_dict(old_shape)
+        if player.to_dict() == old_shape and player.clues_completed == 2:
+            print("✅ Player round-trips through the original dict shape")
+        else:
+            print(f"❌ Round trip mismatch: {player.to_dict()}")
+            return False
+        
+        if hasattr(player, "__dict__"):
+            print("❌ Player should use __slots__")
+            return False
+        print("✅ Player uses __slots__")
+        
+        print("✅ Player record test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Player record test failed: {e}")
+        return False
+
+def test_leaderboard():
+    """Test that completed games are kept on the leaderboard."""
+    try:
+        from scavenger_game import ScavengerHuntGame
+        from leaderboard import Leaderboard
+        
+        print("\n🏅 Testing Leaderboard:")
+        
+        test_game = ScavengerHuntGame()
+        test_phone = "+1234567895"
+        test_game.start_game(test_phone)
+        for answer in ["Rose Garden", "Powells", "Voodoo Doughnut", "Pioneer Square", "Waterfront Park"]:
+            test_game.process_answer(test_phone, answer)
+        
+        top = test_game.leaderboard.top()
+        if test_game.leaderboard.total_completed == 1 and top[0]["score"] == 200 and top[0]["phone"] == "7895":
+            print("✅ Completed game recorded even though the player was reset")
+        else:
+            print(f"❌ Unexpected leaderboard: {top}")
+            return False
+        
+        board = Leaderboard(size=3)
+        for n, score in enumerate([50, 200, 120, 200, 75, 10]):
+            board.record(f"+1555000000{n}", score)
+        
+        scores = [entry["score"] for entry in board.top()]
+        if scores == [200, 200, 120] and board.top()[0]["phone"] == "0001":
+            print("✅ Top entries kept in score order with earliest ties first")
+        else:
+            print(f"❌ Unexpected top scores: {board.top()}")
+            return False
+        
+        if board.total_completed == 6 and board.rank(75) == 4:
+            print("✅ Rank counts cover every completed game")
+        else:
+            print(f"❌ Unexpected rank {board.rank(75)} or total {board.total_completed}")
+            return False
+        
+        print("✅ Leaderboard test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Leaderboard test failed: {e}")
+        return False
+
+def test_game_stats():
+    """Test that running game stats match a full recomputation."""
+    try:
+        from scavenger_game import ScavengerHuntGame
+        
+        print("\n📈 Testing Game Stats:")
+        
+        test_game = ScavengerHuntGame()
+        
+        # One finished game, one in progress, one idle player and one quitter
+        test_game.start_game("+1555000001")
+        for answer in ["Rose Garden", "Wrong Answer", "Powells", "Voodoo", "Pioneer Square", "Waterfront Park"]:
+            test_game.process_answer("+1555000001", answer)
+        test_game.start_game("+1555000002")
+        test_game.process_answer("+1555000002", "Wrong Answer")
+        test_game.get_status("+1555000003")
+        test_game.start_game("+1555000004")
+        test_game.quit_game("+1555000004")
+        
+        stats = test_game.stats.snapshot()
+        expected = {"total_players": 3, "active_players": 1, "completed_games": 1, "average_score": 190}
+        if all(stats[key] == value for key, value in expected.items()):
+            print("✅ Running counters are correct")
+        else:
+            print(f"❌ Unexpected stats: {stats}")
+            return False
+        
+        if stats["clue_hints"][1] == [1] and stats["clue_hints"][2] == [0, 1]:
+            print("✅ Per-clue hint distributions recorded")
+        else:
+            print(f"❌ Unexpected hint distributions: {stats['clue_hints']}")
+            return False
+        
+        if test_game.stats.is_consistent(test_game.players.values(), test_game.leaderboard.score_counts()):
+            print("✅ Running counters match a full recomputation")
+        else:
+            print("❌ Running counters drifted from recomputed values")
+            return False
+        
+        print("✅ Game stats test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Game stats test failed: {e}")
+        return False
+
+def test_history_buffer():
+    """Test the bounded message history and its cursor paging."""
+    try:
+        import json
+        import tempfile
+        from history_buffer import HistoryBuffer
+        
+        print("\n🗂️ Testing History Buffer:")
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_path = os.path.join(tmp_dir, "messages.jsonl")
+            history = HistoryBuffer(capacity=5, log_path=log_path)
+            for n in range(8):
+                history.append({
+                    "sid": f"SM{n}",
+                    "from": "+1555000001" if n % 2 else "+1555000002",
+                    "to": "+15550009999",
+                    "direction": "inbound"
+                })
+            history.close()
+            
+            with open(log_path) as log_file:
+                logged = [json.loads(line)["sid"] for line in log_file]
+        
+        if len(history) == 5 and len(logged) == 8:
+            print("✅ Buffer capped at capacity while the log keeps every record")
+        else:
+            print(f"❌ Buffer has {len(history)} records, log has {len(logged)}")
+            return False
+        
+        first_page, cursor = history.page(limit=3)
+        second_page, end_cursor = history.page(cursor=cursor, limit=3)
+        sids = [record["sid"] for record in first_page + second_page]
+        if sids == ["SM3", "SM4", "SM5", "SM6", "SM7"] and end_cursor is None:
+            print("✅ Cursor paging walks the buffer in order")
+        else:
+            print(f"❌ Unexpected pages: {sids}, end cursor {end_cursor}")
+            return False
+        
+        empty_page, empty_cursor = history.page(cursor=cursor, limit=0)
+        if empty_page or empty_cursor != cursor:
+            print(f"❌ A zero limit should return nothing, got {empty_page}, {empty_cursor}")
+            return False
+        
+        import app as app_module
+        client = app_module.app.test_client()
+        statuses = [client.get(f'/messages?limit={limit}').status_code for limit in (0, -1, 501, 500)]
+        if statuses == [400, 400, 400, 200]:
+            print("✅ Page limits outside 1-500 rejected")
+        else:
+            print(f"❌ Unexpected statuses for out-of-range limits: {statuses}")
+            return False
+        
+        filtered, _ = history.page(phone="+1555000001")
+        if [record["sid"] for record in filtered] == ["SM3", "SM5", "SM7"]:
+            print("✅ Filtering by phone number works")
+        else:
+            print(f"❌ Unexpected filtered page: {filtered}")
+            return False
+        
+        print("✅ History buffer test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ History buffer test failed: {e}")
+        return False
+
+def test_hunt_loading():
+    """Test loading, validating and caching hunt definition files."""
+    try:
+        import json
+        import tempfile
+        from hunt_loader import compile_hunt, load_hunt, HuntValidationError
+        from scavenger_game import ScavengerHuntGame
+        
+        print("\n🗺️ Testing Hunt Loading:")
+        
+        hunt_data = {
+            "id": "mini",
+            "name": "Mini Hunt",
+            "city": "Testville",
+            "scoring": {"points_by_hints": [50, 25], "consolation_points": 1},
+            "clues": [
+                {"id": 1, "clue": "First?", "expected_answers": ["Alpha"], "hints": ["Starts with A"]},
+                {"id": 2, "clue": "Second?", "expected_answers": ["Bravo"], "hints": []}
+            ]
+        }
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            hunt_path = os.path.join(tmp_dir, "mini.json")
+            with open(hunt_path, "w") as hunt_file:
+                json.dump(hunt_data, hunt_file)
+            
+            hunt = load_hunt(hunt_path)
+            if load_hunt(hunt_path) is hunt:
+                print("✅ Unchanged hunt file served from the compiled cache")
+            else:
+                print("❌ Hunt was recompiled without changes")
+                return False
+            
+            test_game = ScavengerHuntGame(hunt_file=hunt_path)
+            test_phone = "+1234567896"
+            test_game.start_game(test_phone)
+            response = test_game.process_answer(test_phone, "alpha")
+            if "earned 50 points" in response and "Clue 2/2" in response and hunt.max_score == 100:
+                print("✅ Scoring and clue count come from the hunt file")
+            else:
+                print(f"❌ Unexpected response: {response}")
+                return False
+            
+            hunt_data["clues"].append({"id": 3, "clue": "Third?", "expected_answers": ["Charlie"]})
+            with open(hunt_path, "w") as hunt_file:
+                json.dump(hunt_data, hunt_file)
+            os.utime(hunt_path, ns=(0, 0))  # make sure the mtime changes
+            
+            if test_game.reload_hunt().clue_count == 3:
+                print("✅ Edited hunt file reloaded without a restart")
+            else:
+                print("❌ Hunt reload did not pick up the edit")
+                return False
+            
+            with open(hunt_path, "w") as hunt_file:
+                json.dump({"id": "broken", "name": "Broken", "clues": [{"id": 1}]}, hunt_file)
+            os.utime(hunt_path, ns=(1, 1))
+            try:
+                load_hunt(hunt_path)
+                print("❌ Invalid hunt file was accepted")
+                return False
+            except HuntValidationError:
+                print("✅ Invalid hunt file rejected")
+            
+            # Clue ids and points are stored as unsigned shorts on each player
+            clue = {"id": 1, "clue": "Find it", "expected_answers": ["it"]}
+            for bad in ({"clues": [dict(clue, id=70000)]},
+                        {"clues": [clue], "scoring": {"points_by_hints": [70000]}},
+                        {"clues": [clue], "scoring": {"consolation_points": -5}},
+                        {"clues": [clue], "scoring": {"consolation_points": 2.5}}):
+                try:
+                    compile_hunt(dict({"id": "big", "name": "Big"}, **bad))
+                    print(f"❌ Out-of-range hunt was accepted: {bad}")
+                    return False
+                except HuntValidationError:
+                    pass
+            print("✅ Clue ids and points outside 0..65535 rejected")
+        
+        print("✅ Hunt loading test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Hunt loading test failed: {e}")
+        return False
+
+def test_message_templates():
+    """Test pre-rendered, localizable messages and the cached TwiML for static replies."""
+    try:
+        from hunt_loader import compile_hunt, HuntValidationError
+        from scavenger_game import ScavengerHuntGame, game
+        from twilio.twiml.messaging_response import MessagingResponse
+        
+        print("\n📝 Testing Message Templates:")
+        
+        hunt = compile_hunt({
+            "id": "es",
+            "name": "Búsqueda",
+            "city": "Madrid",
+            "messages": {
+                "hint": "❌ ¡Casi! Pista:\n\n{hint}",
+                "status": "Pista {clue_number}/{clue_count} · {score} puntos · {hints_used}/{hint_count} pistas\n{clue}",
+                "final_rank": "\nRango: {rank}"
+            },
+            "clues": [{"id": 1, "clue": "¿Dónde está {el oso}?", "expected_answers": ["Puerta del Sol"], "hints": ["Kilómetro cero"]}]
+        })
+        test_game = ScavengerHuntGame(hunt=hunt)
+        test_phone = "+1234567890"
+        test_game.start_game(test_phone)
+        
+        hint = test_game.process_answer(test_phone, "zzz")
+        status = test_game.get_status(test_phone)
+        if hint != "❌ ¡Casi! Pista:\n\nKilómetro cero" or hint is not hunt.hint_replies[0][0]:
+            print(f"❌ Hint not served from the pre-rendered template: {hint}")
+            return False
+        if status != "Pista 1/1 · 0 puntos · 1/1 pistas\n¿Dónde está {el oso}?":
+            print(f"❌ Status slots not filled correctly: {status}")
+            return False
+        print("✅ Localized templates pre-rendered, with braces in clue text kept intact")
+        
+        final = test_game.process_answer(test_phone, "Puerta del Sol")
+        if not final.endswith("Rango: 🎯 Adventure Seeker!") or "Final Score: 30 points" not in final:
+            print(f"❌ Final score template not used: {final}")
+            return False
+        print("✅ Final score filled into the pre-rendered template")
+        
+        try:
+            compile_hunt({
+                "id": "minimal",
+                "name": "Minimal",
+                "messages": {"help": "Hi {nombre}"},
+                "clues": [{"id": 1, "clue": "?", "expected_answers": ["x"]}]
+            })
+            print("❌ Unknown placeholder in a static message was accepted")
+            return False
+        except HuntValidationError:
+            print("✅ Unknown placeholders rejected at load time")
+        
+        from app import twiml_reply
+        expected = MessagingResponse()
+        expected.message(game.hunt.help)
+        if twiml_reply(game.hunt.help) is not twiml_reply(game.hunt.help) or \
+                twiml_reply(game.hunt.help).decode() != str(expected):
+            print("❌ Static reply TwiML not cached")
+            return False
+        print("✅ TwiML for static replies rendered once and reused")
+        
+        print("✅ Message template test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Message template test failed: {e}")
+        return False
+
+def test_sms_segments():
+    """Test GSM-7/UCS-2 segment counting, GSM-7 substitution and segment budgets."""
+    try:
+        import app as app_module
+        from sms_segments import SegmentCompactor, segment_info, to_gsm7, trim_to_segments
+        from scavenger_game import game
+        
+        print("\n✉️ Testing SMS Segments:")
+        
+        cases = [
+            ("a" * 160, ("GSM-7", 1)),
+            ("a" * 161, ("GSM-7", 2)),
+            ("€" * 80, ("GSM-7", 1)),       # extension characters take two septets
+            ("a" * 68 + "🎯", ("UCS-2", 1)),  # an emoji is two UTF-16 units
+            ("a" * 69 + "🎯", ("UCS-2", 2)),
+        ]
+        for text, expected in cases:
+            info = segment_info(text)
+            if (info.encoding, info.segments) != expected:
+                print(f"❌ {text[:10]!r}... counted as {info}, expected {expected}")
+                return False
+        print("✅ GSM-7 and UCS-2 segments counted correctly")
+        
+        welcome = game.hunt.start_reply
+        compact = to_gsm7(welcome)
+        if segment_info(compact).encoding != "GSM-7" or segment_info(compact).segments >= segment_info(welcome).segments:
+            print(f"❌ GSM-7 substitution did not save segments: {segment_info(compact)}")
+            return False
+        if "Welcome to the Portland Scavenger Hunt!" not in compact or "- First try: 40 points" not in compact:
+            print(f"❌ Substitution mangled the text: {compact}")
+            return False
+        print(f"✅ Welcome reply: {segment_info(welcome).segments} UCS-2 segments -> {segment_info(compact).segments} GSM-7")
+        
+        trimmed = trim_to_segments(welcome, 2)
+        if segment_info(trimmed).segments != 2 or not trimmed.endswith("…"):
+            print(f"❌ Trimmed reply doesn't fit the budget: {segment_info(trimmed)}")
+            return False
+        print("✅ Replies trimmed to the segment budget")
+        
+        original_compactor = app_module.segment_compactor
+        app_module.segment_compactor = SegmentCompactor(gsm7_only=True)
+        try:
+            reply = app_module.build_sms_reply("HELP", "+1234567801", "+15035550100", "SM_segments")
+            stats = app_module.segment_compactor.stats.snapshot()
+        finally:
+            app_module.segment_compactor = original_compactor
+        if segment_info(reply).encoding != "GSM-7" or stats["substituted"] != 1 or stats["segments_saved"] <= 0:
+            print(f"❌ Replies not compacted by the app: {stats}")
+            return False
+        print(f"✅ App replies compacted and measured: {stats}")
+        
+        print("✅ SMS segment test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ SMS segment test failed: {e}")
+        return False
+
+def test_hunt_engine():
+    """Test routing players between hunts hosted by one engine."""
+    try:
+        import json
+        import tempfile
+        from scavenger_game import ScavengerHuntGame
+        from hunt_engine import create_hunt_engine
+        
+        print("\n🧭 Testing Hunt Engine:")
+        
+        mini_hunt = {
+            "id": "mini",
+            "name": "Mini Hunt",
+            "city": "Testville",
+            "join_code": "mini",
+            "clues": [{"id": 1, "clue": "Only clue?", "expected_answers": ["Alpha"], "hints": ["A"]}]
+        }
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with open(os.path.join(tmp_dir, "mini.json"), "w") as hunt_file:
+                json.dump(mini_hunt, hunt_file)
+            
+            default_game = ScavengerHuntGame()
+            engine = create_hunt_engine(default_game, tmp_dir, {"+15550002222": "mini"})
+        
+        mini_game = engine.game("mini")
+        if engine.game_for("+1555000001", "+15550002222") is mini_game and \
+                engine.game_for("+1555000001", "+15550003333") is default_game:
+            print("✅ Messages routed by Twilio number")
+        else:
+            print("❌ Routing by Twilio number failed")
+            return False
+        
+        if mini_game.verdict_cache is default_game.verdict_cache and mini_game.players is not default_game.players:
+            print("✅ Hunts share the verdict cache but not players")
+        else:
+            print("❌ Hunts should share caches and keep separate players")
+            return False
+        
+        default_game.start_game("+1555000009")
+        if engine.join("+1555000009", "MINI") is not mini_game or engine.join("+1555000009", "nope") is not None:
+            print("❌ Join codes not resolved correctly")
+            return False
+        if engine.game_for("+1555000009", "+15550003333") is mini_game and "+1555000009" not in default_game.players:
+            print("✅ Join code moves the player to the other hunt")
+        else:
+            print("❌ Player was not moved by the join code")
+            return False
+        
+        # With the SQLite store the join is seen by other workers and after a restart
+        from hunt_engine import HuntEngine
+        from player_store import SQLitePlayerStore
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "players.sqlite3")
+            
+            def worker():
+                sqlite_game = ScavengerHuntGame(player_store=SQLitePlayerStore(db_path))
+                worker_engine = HuntEngine(sqlite_game)
+                worker_engine.add_game(ScavengerHuntGame(
+                    player_store=SQLitePlayerStore(db_path, table="players_mini"), hunt=mini_game.hunt
+                ))
+                return worker_engine
+            
+            first = worker()
+            first.join("+1555000010", "MINI")
+            first.default_game.players.flush()
+            restarted = worker()
+            if restarted.game_for("+1555000010").hunt.hunt_id != "mini":
+                print("❌ Join code choice lost on restart")
+                return False
+            print("✅ Join code choice kept in the player store")
+        
+        print("✅ Hunt engine test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Hunt engine test failed: {e}")
+        return False
+
 def test_flask_integration():
     """Test that the Flask app can import and use the game."""
     try:
@@ -271,6 +1050,671 @@ def test_flask_integration():
         print(f"❌ Flask integration test failed: {e}")
         return False
 
+def test_duplicate_webhooks():
+    """Test that a retried webhook (same MessageSid) repeats the reply without replaying the move."""
+    try:
+        from app import app
+        from scavenger_game import game
+        
+        print("\n🔁 Testing Duplicate Webhooks:")
+        
+        client = app.test_client()
+        test_phone = "+1234567899"
+        client.post('/webhook/sms', data={"From": test_phone, "Body": "READY", "MessageSid": "SM_dup_1"})
+        
+        wrong_answer = {"From": test_phone, "Body": "Wrong Answer", "MessageSid": "SM_dup_2"}
+        first = client.post('/webhook/sms', data=wrong_answer).get_data(as_text=True)
+        retry = client.post('/webhook/sms', data=wrong_answer).get_data(as_text=True)
+        
+        if first != retry or "hint" not in first:
+            print(f"❌ Retry got a different reply: {retry}")
+            return False
+        if game.get_player_data(test_phone).hints_used != 1:
+            print("❌ Retried webhook charged another hint")
+            return False
+        print("✅ Retried webhook answered from the reply cache")
+        
+        client.post('/webhook/sms', data=dict(wrong_answer, MessageSid="SM_dup_3"))
+        if game.get_player_data(test_phone).hints_used != 2:
+            print("❌ A new MessageSid was treated as a duplicate")
+            return False
+        print("✅ New messages are still processed")
+        
+        # A retry that arrives while the first delivery is still being answered
+        # waits for its reply, without holding up other messages
+        import threading
+        import time
+        import zlib
+        import app as app_module
+        
+        original_build = app_module.build_sms_reply
+        builds = []
+        
+        def slow_build(message_body, from_number, to_number, message_sid):
+            builds.append(message_sid)
+            if message_sid == "SM_dup_slow":
+                time.sleep(0.3)
+            return f"reply to {message_sid}"
+        
+        # Another SID hashing to the same lock stripe as the slow one
+        stripes = len(app_module.message_sid_locks)
+        same_stripe = next(f"SM_dup_{n}" for n in range(10000)
+                           if zlib.crc32(f"SM_dup_{n}".encode()) % stripes == zlib.crc32(b"SM_dup_slow") % stripes)
+        app_module.build_sms_reply = slow_build
+        replies = {}
+        try:
+            def post(key, sid, body):
+                replies[key] = client.post('/webhook/sms', data={"From": test_phone, "Body": body, "MessageSid": sid}).get_data(as_text=True)
+            
+            first_delivery = threading.Thread(target=post, args=("first", "SM_dup_slow", "slow"))
+            first_delivery.start()
+            time.sleep(0.05)
+            retry_delivery = threading.Thread(target=post, args=("retry", "SM_dup_slow", "slow"))
+            retry_delivery.start()
+            started = time.monotonic()
+            post("other", same_stripe, "other")
+            other_seconds = time.monotonic() - started
+            first_delivery.join()
+            retry_delivery.join()
+        finally:
+            app_module.build_sms_reply = original_build
+        
+        if builds.count("SM_dup_slow") != 1 or replies["retry"] != replies["first"] or "SM_dup_slow" not in replies["first"]:
+            print(f"❌ Concurrent retry not answered from the first delivery: {builds}, {replies}")
+            return False
+        if other_seconds > 0.2:
+            print(f"❌ Another message waited {other_seconds:.2f}s behind a slow one")
+            return False
+        print("✅ Concurrent retry waits for the first reply; other messages aren't blocked")
+        
+        game.quit_game(test_phone)
+        print("✅ Duplicate webhook test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Duplicate webhook test failed: {e}")
+        return False
+
+def test_twilio_snapshot():
+    """Test the background-refreshed /twilio-data snapshot and its cursor paging."""
+    try:
+        import time
+        import app as app_module
+        from snapshot_cache import SnapshotCache
+        
+        print("\n🛰️ Testing Twilio Data Snapshot:")
+        
+        fetches = []
+        def slow_fetch():
+            time.sleep(0.05)
+            fetches.append(time.time())
+            if len(fetches) == 3:
+                raise RuntimeError("Twilio unavailable")
+            return {
+                "messages": [{"sid": f"SM{n}", "body": f"Message {n}"} for n in range(45)],
+                "calls": [{"sid": f"CA{n}"} for n in range(12)]
+            }
+        
+        snapshot = SnapshotCache(slow_fetch, ttl=0.2)
+        first, stale = snapshot.get()
+        started = time.monotonic()
+        again, _ = snapshot.get()
+        if len(fetches) != 1 or again is not first or stale or time.monotonic() - started > 0.01:
+            print("❌ Second read should be served from the snapshot")
+            return False
+        if not snapshot.stats()["fetch_latency_ms"] >= 50:
+            print(f"❌ Fetch latency not recorded: {snapshot.stats()}")
+            return False
+        print("✅ Reads after the first are served from the snapshot")
+        
+        # The refresher keeps going; a failed refresh keeps serving the old data
+        time.sleep(0.55)
+        value, _ = snapshot.get()
+        if len(fetches) < 3 or snapshot.errors != 1 or value is None:
+            print(f"❌ Background refresh not running as expected: {snapshot.stats()}")
+            return False
+        print("✅ Refreshed in the background, failures keep the last snapshot")
+        
+        original_snapshot = app_module.twilio_snapshot
+        app_module.twilio_snapshot = snapshot
+        try:
+            client = app_module.app.test_client()
+            default_view = client.get('/twilio-data').get_json()
+            page_one = client.get('/twilio-data?kind=messages&limit=20').get_json()
+            page_three = client.get('/twilio-data?kind=messages&limit=20&cursor=SM39').get_json()
+            gone = client.get('/twilio-data?kind=messages&cursor=SM999')
+            bad_limit = client.get('/twilio-data?kind=messages&limit=-1')
+        finally:
+            app_module.twilio_snapshot = original_snapshot
+        
+        if len(default_view["messages"]) != 20 or len(default_view["calls"]) != 10:
+            print("❌ Default view should keep the original 20 messages / 10 calls")
+            return False
+        if page_one["next_cursor"] != "SM19" or [m["sid"] for m in page_three["messages"]] != [f"SM{n}" for n in range(40, 45)]:
+            print(f"❌ Unexpected paging: {page_one['next_cursor']}, {page_three}")
+            return False
+        if page_three["next_cursor"] is not None or gone.status_code != 410 or bad_limit.status_code != 400:
+            print("❌ Paging should end at the last record and reject unknown cursors and bad limits")
+            return False
+        print("✅ Cursor paging goes deeper than the default 20 messages")
+        
+        print("✅ Twilio snapshot test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Twilio snapshot test failed: {e}")
+        return False
+
+def test_metrics():
+    """Test lock-free counters and the /metrics endpoint."""
+    try:
+        import threading
+        import app as app_module
+        from metrics import Registry, REGISTRY
+        
+        print("\n📏 Testing Metrics:")
+        
+        registry = Registry()
+        counter = registry.counter("test_events_total", "Events", ["kind"]).labels("a")
+        histogram = registry.histogram("test_seconds", "Durations", buckets=(0.1, 1.0)).labels()
+        
+        def work():
+            for _ in range(10000):
+                counter.inc()
+            histogram.observe(0.5)
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        work()  # a live shard on this thread as well as the retired ones
+        
+        text = registry.render()
+        expected = ['test_events_total{kind="a"} 90000', 'test_seconds_bucket{le="0.1"} 0',
+                    'test_seconds_bucket{le="1"} 9', 'test_seconds_bucket{le="+Inf"} 9', 'test_seconds_count 9']
+        missing = [line for line in expected if line not in text.splitlines()]
+        if missing:
+            print(f"❌ Lines missing from the exposition: {missing}\n{text}")
+            return False
+        print("✅ Per-thread counters add up across live and finished threads")
+        
+        before = REGISTRY.snapshot()
+        client = app_module.app.test_client()
+        phone = "+1234567890metrics"
+        first_answer = app_module.game.clues[0]["expected_answers"][0]
+        for body in ["READY", first_answer, "definitely not it", "STATUS"]:
+            client.post('/webhook/sms', data={"From": phone, "To": "+15035550100", "Body": body})
+        after = REGISTRY.snapshot()
+        
+        def delta(key):
+            return after.get(key, 0) - before.get(key, 0)
+        
+        deltas = {key: delta(key) for key in [
+            'scavenger_commands_total{command="ready"}', 'scavenger_commands_total{command="answer"}',
+            'scavenger_commands_total{command="status"}', 'scavenger_answers_total{result="correct"}',
+            'scavenger_answers_total{result="incorrect"}', 'scavenger_hints_total'
+        ]}
+        if list(deltas.values()) != [1, 2, 1, 1, 1, 1]:
+            print(f"❌ Unexpected counter changes: {deltas}")
+            return False
+        print("✅ Commands, answers and hints counted")
+        
+        response = client.get('/metrics')
+        text = response.get_data(as_text=True)
+        if response.status_code != 200 or not response.content_type.startswith("text/plain"):
+            print(f"❌ /metrics returned {response.status_code} {response.content_type}")
+            return False
+        for name in ['scavenger_webhook_seconds_count{webhook="sms"}', 'scavenger_answer_check_seconds_count{path="local"}',
+                     'scavenger_player_store_seconds_count{backend="memory",op="read"}',
+                     'scavenger_twiml_seconds_count{source="cached"}', 'scavenger_active_players']:
+            if name not in text:
+                print(f"❌ {name} missing from /metrics")
+                return False
+        print("✅ /metrics exposes webhook, answer-check, player-store and TwiML timings")
+        
+        game = app_module.engine.game_for(phone, "+15035550100")
+        game.quit_game(phone)
+        
+        print("✅ Metrics test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Metrics test failed: {e}")
+        return False
+
+def test_request_profiler():
+    """Test the sampling profiler and its admin endpoints."""
+    try:
+        import time
+        import app as app_module
+        from request_profiler import RequestProfiler
+        
+        print("\n🔥 Testing Request Profiler:")
+        
+        profiler = RequestProfiler(sample_rate=1.0, interval=0.001)
+        
+        def slow_step():
+            time.sleep(0.05)
+        
+        @profiler.sampled
+        def handler():
+            slow_step()
+            return "ok"
+        
+        for _ in range(3):
+            handler()
+        stacks = profiler.collapsed().splitlines()
+        if profiler.profiled_requests != 3 or not stacks:
+            print(f"❌ Nothing sampled: {profiler.stats()}")
+            return False
+        top_stack, count = stacks[0].rsplit(" ", 1)
+        if not top_stack.startswith("handler (") or "slow_step (" not in top_stack or int(count) < 10:
+            print(f"❌ Unexpected top stack: {stacks[0]}")
+            return False
+        print(f"✅ Collapsed stacks recorded: {stacks[0]}")
+        
+        profiler.sample_rate = 0
+        handler()
+        if profiler.profiled_requests != 3:
+            print("❌ Profiled a request while disabled")
+            return False
+        print("✅ Nothing profiled with a sample rate of 0")
+        
+        client = app_module.app.test_client()
+        if client.post('/profile', json={"sample_rate": 2}).status_code != 400:
+            print("❌ Invalid sample rate accepted")
+            return False
+        stats = client.post('/profile', json={"sample_rate": 1, "reset": True}).get_json()
+        try:
+            client.post('/webhook/sms', data={"From": "+1234567890prof", "To": "+15035550100", "Body": "HELP"})
+            stats = client.post('/profile').get_json()
+        finally:
+            client.post('/profile', json={"sample_rate": 0})
+        if stats["profiled_requests"] != 1:
+            print(f"❌ SMS webhook not profiled: {stats}")
+            return False
+        response = client.get('/profile?reset=true')
+        if response.status_code != 200 or "attachment" not in response.headers.get("Content-Disposition", ""):
+            print(f"❌ Profile download failed: {response.status_code}")
+            return False
+        if app_module.request_profiler.stats()["profiled_requests"] != 0:
+            print("❌ Profile not reset after download")
+            return False
+        print("✅ Profiling toggled and downloaded through /profile")
+        
+        print("✅ Request profiler test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Request profiler test failed: {e}")
+        return False
+
+def test_webhook_signatures():
+    """Test Twilio signature validation (token rotation, JSON payloads) on the webhooks."""
+    try:
+        import hashlib
+        import app as app_module
+        import webhook_validator
+        from twilio.request_validator import RequestValidator
+        from werkzeug.datastructures import MultiDict
+        from webhook_validator import TwilioSignatureValidator
+        
+        print("\n🔏 Testing Webhook Signatures:")
+        
+        url = "https://mycompany.com/myapp.php?foo=1&bar=2"
+        params = MultiDict([("CallSid", "CA1234567890ABCDE"), ("Caller", "+12349013030"), ("Digits", "1234"),
+                            ("From", "+12349013030"), ("To", "+18005551212"), ("Tag", "b"), ("Tag", "a")])
+        official = RequestValidator("12345")
+        signature = official.compute_signature(url, params)
+        validator = TwilioSignatureValidator(["12345"])
+        if validator.sign(url, params) != signature or not validator.validate(url, params, signature):
+            print("❌ Signature differs from the Twilio library's")
+            return False
+        if not validator.validate("https://mycompany.com:443/myapp.php?foo=1&bar=2", params, signature):
+            print("❌ URL with the default port not accepted")
+            return False
+        if validator.validate(url, {"Digits": "1235"}, signature) or validator.validate(url, params, "bogus"):
+            print("❌ Tampered request accepted")
+            return False
+        print("✅ Form signatures match the Twilio library and reject tampering")
+        
+        rotating = TwilioSignatureValidator(["new-token", "12345"])
+        if not rotating.validate(url, params, signature) or TwilioSignatureValidator(["new-token"]).validate(url, params, signature):
+            print("❌ Secondary auth token not honored during rotation")
+            return False
+        print("✅ Secondary auth tokens accepted during rotation")
+        
+        body = b'{"MessageSid": "SM123", "Body": "READY"}'
+        json_url = f"https://mycompany.com/hook?bodySHA256={hashlib.sha256(body).hexdigest()}"
+        json_signature = official.compute_signature(json_url, {})
+        if not validator.validate(json_url, None, json_signature, body) or \
+                validator.validate(json_url, None, json_signature, body.replace(b"READY", b"QUIT")):
+            print("❌ JSON bodySHA256 payloads not validated")
+            return False
+        unhashed_url = "https://mycompany.com/hook"
+        if validator.validate(unhashed_url, None, official.compute_signature(unhashed_url, {}), body):
+            print("❌ JSON payload without bodySHA256 accepted")
+            return False
+        print("✅ JSON payloads validated through bodySHA256, and rejected without it")
+        
+        client = app_module.app.test_client()
+        form = {"From": "+1234567890sig", "To": "+15035550100", "Body": "HELP"}
+        original = webhook_validator.validator
+        webhook_validator.validator = validator
+        try:
+            unsigned = client.post('/webhook/sms', data=form)
+            signed = client.post('/webhook/sms', data=form, headers={
+                "X-Twilio-Signature": validator.sign("http://localhost/webhook/sms", form)
+            })
+        finally:
+            webhook_validator.validator = original
+        if unsigned.status_code != 403 or signed.status_code != 200:
+            print(f"❌ Webhook returned {unsigned.status_code} unsigned, {signed.status_code} signed")
+            return False
+        print("✅ /webhook/sms rejects unsigned requests and accepts signed ones")
+        
+        costs = webhook_validator.benchmark(2000)
+        print(f"✅ Validation cost per request: {costs}")
+        
+        print("✅ Webhook signature test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Webhook signature test failed: {e}")
+        return False
+
+def test_structured_logging():
+    """Test JSON log lines written by the background listener, with sampling."""
+    try:
+        import io
+        import json
+        import logging
+        import queue
+        import threading
+        import app as app_module
+        from structured_logging import (AsyncQueueHandler, BatchingStreamHandler, JsonFormatter,
+                                        SamplingFilter, phone_hash)
+        
+        print("\n🪵 Testing Structured Logging:")
+        
+        if not isinstance(app_module.log_handler, AsyncQueueHandler):
+            print(f"❌ App logs synchronously: {app_module.log_handler}")
+            return False
+        
+        stream = io.StringIO()
+        writer = BatchingStreamHandler(stream, batch_size=10)
+        writer.setFormatter(JsonFormatter(phone_salt="salt"))
+        handler = AsyncQueueHandler(queue.Queue(), writer)
+        handler.addFilter(SamplingFilter({"sms_received": 0.0}))
+        test_logger = logging.getLogger("test_structured_logging")
+        test_logger.propagate = False
+        test_logger.addHandler(handler)
+        test_logger.setLevel(logging.INFO)
+        
+        formatted_on = []
+        
+        class Lazy:
+            def __str__(self):
+                formatted_on.append(threading.current_thread().name)
+                return "lazy"
+        
+        try:
+            test_logger.info("Reply %s to +15035550123", Lazy(), extra={
+                "event": "sms_reply", "phone": "+15035550123", "hunt": "portland", "clue": 2,
+                "verdict_source": "cache", "latency_ms": 1.5
+            })
+            test_logger.info("dropped", extra={"event": "sms_received", "phone": "+15035550123"})
+            try:
+                raise ValueError("boom")
+            except ValueError:
+                test_logger.exception("Error processing SMS webhook", extra={"event": "sms_error"})
+        finally:
+            handler.stop()
+            test_logger.removeHandler(handler)
+        
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        if [line["msg"] for line in lines] != [f"Reply lazy to {phone_hash('+15035550123', 'salt')}",
+                                              "Error processing SMS webhook"]:
+            print(f"❌ Unexpected log lines (sampled event should be dropped): {lines}")
+            return False
+        reply = lines[0]
+        if reply.get("phone_hash") != phone_hash("+15035550123", "salt") or "+15035550123" in stream.getvalue():
+            print(f"❌ Phone number not hashed: {reply}")
+            return False
+        if (reply["hunt"], reply["clue"], reply["verdict_source"], reply["latency_ms"]) != ("portland", 2, "cache", 1.5):
+            print(f"❌ Structured fields missing: {reply}")
+            return False
+        if "ValueError: boom" not in lines[1].get("exc", ""):
+            print(f"❌ Traceback missing: {lines[1]}")
+            return False
+        print("✅ JSON lines with hashed phone, hunt, clue, latency and verdict source")
+        
+        if not formatted_on or threading.current_thread().name in formatted_on:
+            print(f"❌ Message formatted on the logging thread: {formatted_on}")
+            return False
+        print("✅ Messages formatted by the background listener")
+        
+        # App log lines naming a number pass it as a field, so JSON logs can hash it
+        records = []
+        capture = logging.Handler()
+        capture.emit = records.append
+        app_module.logger.addHandler(capture)
+        try:
+            app_module.app.test_client().post('/webhook/voice', data={
+                "From": "+15035550124", "To": "+15035550100", "CallSid": "CA123", "CallStatus": "ringing"
+            })
+        finally:
+            app_module.logger.removeHandler(capture)
+        call = next((record for record in records if record.getMessage().startswith("Received call")), None)
+        if call is None or getattr(call, "phone", None) != "+15035550124" or "+15035550124" in call.msg:
+            print(f"❌ Call log doesn't carry the number as a field: {call and call.__dict__}")
+            return False
+        print("✅ Phone numbers logged as fields, not baked into the message")
+        
+        print("✅ Structured logging test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Structured logging test failed: {e}")
+        return False
+
+def test_production_server():
+    """Test the gunicorn settings and draining background work on shutdown."""
+    try:
+        import logging
+        import os
+        import runpy
+        import time
+        import app as app_module
+        from history_buffer import HistoryBuffer
+        from hunt_engine import HuntEngine
+        from llm_client import FakeChatClient
+        from player_store import InMemoryPlayerStore
+        from reply_dispatcher import ReplyDispatcher
+        from scavenger_game import ScavengerHuntGame
+        
+        print("\n🦄 Testing Production Server Settings:")
+        
+        validate_setting = os.environ.pop("TWILIO_VALIDATE_SIGNATURES", None)
+        try:
+            settings = runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "gunicorn.conf.py"))
+            validates = os.environ.get("TWILIO_VALIDATE_SIGNATURES")
+        finally:
+            os.environ.pop("TWILIO_VALIDATE_SIGNATURES", None)
+            if validate_setting is not None:
+                os.environ["TWILIO_VALIDATE_SIGNATURES"] = validate_setting
+        if validates != (validate_setting or "True"):
+            print(f"❌ gunicorn should check webhook signatures unless told not to, got {validates}")
+            return False
+        print("✅ gunicorn checks webhook signatures by default")
+        expected = {"worker_class": "gthread", "preload_app": True, "keepalive": 75, "backlog": 2048}
+        actual = {key: settings[key] for key in expected}
+        if actual != expected or settings["threads"] != (16 if settings["ai_matching"] else 4):
+            print(f"❌ Unexpected gunicorn settings: {actual}, {settings['threads']} threads")
+            return False
+        if settings["Config"].PLAYER_STORE == "memory" and settings["workers"] != 1:
+            print(f"❌ The in-memory player store needs one worker, got {settings['workers']}")
+            return False
+        print(f"✅ gunicorn: {settings['workers']} {settings['worker_class']} worker(s), "
+              f"{settings['threads']} threads, preloaded")
+        
+        # The drain gets what is left of graceful_timeout after the signal, less a margin
+        class Worker:
+            pass
+        
+        worker = Worker()
+        budgets = []
+        original_drain = app_module.drain
+        app_module.drain = lambda timeout=None: budgets.append(timeout)
+        try:
+            settings["worker_int"](worker)
+            worker.shutdown_started -= 10  # in-flight webhooks took 10s
+            settings["worker_exit"](None, worker)
+        finally:
+            app_module.drain = original_drain
+        expected_budget = settings["graceful_timeout"] - 10 - settings["drain_margin"]
+        if len(budgets) != 1 or abs(budgets[0] - expected_budget) > 0.5:
+            print(f"❌ Drain budget {budgets} should be about {expected_budget}s")
+            return False
+        print(f"✅ Drain budget measured from the shutdown signal ({budgets[0]:.1f}s left)")
+        
+        sent = []
+        
+        def slow_reply(body, from_number, to_number, message_sid):
+            time.sleep(0.02)
+            return f"reply to {body}"
+        
+        saved = {name: getattr(app_module, name) for name in
+                 ["reply_dispatcher", "sms_queue", "engine", "message_history", "call_history", "log_handler"]}
+        app_module.reply_dispatcher = ReplyDispatcher(
+            slow_reply, lambda to, frm, body: sent.append(body), workers=2
+        )
+        app_module.sms_queue = None
+        
+        class ClosingClient(FakeChatClient):
+            closes = 0
+            
+            def close(self):
+                self.closes += 1
+        
+        # Two hunts sharing the OpenAI client, answer batcher and player store
+        shared_client = ClosingClient()
+        first_hunt = ScavengerHuntGame(player_store=InMemoryPlayerStore(), openai_client=shared_client)
+        app_module.engine = HuntEngine(first_hunt)
+        app_module.engine.add_game(ScavengerHuntGame(
+            player_store=first_hunt.players, hunt=first_hunt.hunt._replace(hunt_id="drain2", join_code="DRAIN2"),
+            openai_client=shared_client, answer_batcher=first_hunt.answer_batcher
+        ))
+        app_module.message_history = HistoryBuffer(10)
+        app_module.call_history = HistoryBuffer(10)
+        app_module.log_handler = logging.NullHandler()
+        try:
+            for n in range(10):
+                app_module.reply_dispatcher.submit(f"msg {n}", "+15035550123", "+15035550100", f"SMdrain{n}")
+            started = time.monotonic()
+            app_module.drain(timeout=5)
+            drain_seconds = time.monotonic() - started
+        finally:
+            for name, value in saved.items():
+                setattr(app_module, name, value)
+        if len(sent) != 10:
+            print(f"❌ Only {len(sent)}/10 deferred replies sent before shutdown")
+            return False
+        print("✅ Deferred replies drained on shutdown")
+        
+        if shared_client.closes != 1 or drain_seconds > 5:
+            print(f"❌ Shared client closed {shared_client.closes} times, drain took {drain_seconds:.2f}s")
+            return False
+        print("✅ Shared OpenAI client closed once, within the drain budget")
+        
+        print("✅ Production server test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Production server test failed: {e}")
+        return False
+
+def test_load_harness():
+    """Test a small in-process run of the load-testing harness."""
+    try:
+        import app as app_module
+        from load_test import ISOLATED_STATE, LoadTest, in_process_sender, isolate_app
+        
+        print("\n📈 Testing Load Harness:")
+        
+        live = {name: getattr(app_module, name) for name in ISOLATED_STATE}
+        live_players = len(app_module.game.players)
+        try:
+            fake = isolate_app(app_module, 0.001, 8, 0.005)
+            load_test = LoadTest(in_process_sender(app_module.app, "+15035550100"), players=20, concurrency=4)
+            report = load_test.run(app_module.game.clues)
+            isolated_players = len(app_module.game.players)
+            app_module.game.answer_batcher.shutdown()
+        finally:
+            for name, value in live.items():
+                setattr(app_module, name, value)
+        
+        if len(app_module.game.players) != live_players or isolated_players != 20 or not fake.calls:
+            print(f"❌ Load test reached the live game ({isolated_players} isolated players)")
+            return False
+        print("✅ Load test ran against an isolated engine with a fake OpenAI backend")
+        
+        # READY plus at least one answer per clue for every player
+        if report["errors"] or report["requests"] < 20 * (1 + len(app_module.game.clues)):
+            print(f"❌ Unexpected load test report: {report}")
+            return False
+        latency = report["latency_ms"]
+        if not 0 < latency["p50"] <= latency["p95"] <= latency["p99"] <= latency["max"]:
+            print(f"❌ Latency percentiles out of order: {latency}")
+            return False
+        print(f"✅ {report['requests']} requests from 20 players at {report['throughput_rps']} requests/s")
+        
+        print("✅ Load harness test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Load harness test failed: {e}")
+        return False
+
+def test_deferred_replies():
+    """Test that deferred replies are computed and sent by background workers."""
+    try:
+        from app import build_sms_reply
+        from reply_dispatcher import ReplyDispatcher
+        
+        print("\n📨 Testing Deferred Replies:")
+        
+        sent = []
+        dispatcher = ReplyDispatcher(
+            build_sms_reply,
+            lambda to, from_, body: sent.append((to, from_, body)),
+            workers=2
+        )
+        
+        if not dispatcher.submit("READY", "+1234567893", "+15550001111", "SM_test_1"):
+            print("❌ Message was not queued")
+            return False
+        
+        dispatcher.join()
+        dispatcher.shutdown(timeout=1)
+        
+        if len(sent) == 1 and sent[0][0] == "+1234567893" and "Welcome" in sent[0][2]:
+            print("✅ Reply computed in the background and sent to the player")
+        else:
+            print(f"❌ Unexpected deferred sends: {sent}")
+            return False
+        
+        if dispatcher.submit("STATUS", "+1234567893", "+15550001111", "SM_test_2"):
+            print("❌ Dispatcher accepted a message after shutdown")
+            return False
+        
+        print("✅ Deferred reply test completed successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Deferred reply test failed: {e}")
+        return False
+
 def main():
     """Run all tests and provide a summary."""
     print("🎯 Portland Scavenger Hunt Game - Test Suite")
@@ -283,7 +1727,28 @@ def main():
         ("Game Flow", test_game_flow),
         ("Scoring System", test_scoring_system),
         ("Portland Locations", test_portland_locations),
-        ("Flask Integration", test_flask_integration)
+        ("Answer Matching", test_answer_matching),
+        ("Verdict Cache", test_verdict_cache),
+        ("Player Store", test_player_store),
+        ("Player Locking", test_player_locking),
+        ("Player Record", test_player_record),
+        ("Leaderboard", test_leaderboard),
+        ("Game Stats", test_game_stats),
+        ("History Buffer", test_history_buffer),
+        ("Hunt Loading", test_hunt_loading),
+        ("Message Templates", test_message_templates),
+        ("SMS Segments", test_sms_segments),
+        ("Hunt Engine", test_hunt_engine),
+        ("Flask Integration", test_flask_integration),
+        ("Duplicate Webhooks", test_duplicate_webhooks),
+        ("Twilio Data Snapshot", test_twilio_snapshot),
+        ("Deferred Replies", test_deferred_replies),
+        ("Metrics", test_metrics),
+        ("Request Profiler", test_request_profiler),
+        ("Webhook Signatures", test_webhook_signatures),
+        ("Structured Logging", test_structured_logging),
+        ("Production Server", test_production_server),
+        ("Load Harness", test_load_harness)
     ]
     
     results = []
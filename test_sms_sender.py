@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Test script for the outbound SMS send queue.
+Runs a local stub of the Twilio Messages API, so no credentials or network are needed.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# Add the current directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+class StubTwilioHandler(BaseHTTPRequestHandler):
+    """Accepts POST .../Messages.json, answering from the server's script of statuses first."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode())
+        server = self.server
+        with server.lock:
+            status = server.script.pop(0) if server.script else 201
+            if status == 201:
+                server.delivered.append((form["To"][0], form["From"][0], form["Body"][0]))
+            sid = f"SM{len(server.delivered):032d}"
+
+        if status == 201:
+            payload = {"sid": sid, "status": "queued", "to": form["To"][0], "body": form["Body"][0]}
+        else:
+            payload = {"code": 20429 if status == 429 else 20500, "message": "stubbed failure", "status": status}
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_twilio(script=None):
+    """Start the stub on a free port and return (server, Twilio client pointed at it)."""
+    from twilio.rest import Client
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubTwilioHandler)
+    server.script = list(script or [])
+    server.delivered = []
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    client = Client("AC" + "0" * 32, "stub-token")
+    client.api.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    return server, client
+
+
+def twilio_sender(client):
+    return lambda to, from_, body: client.messages.create(body=body, from_=from_, to=to)
+
+
+def test_token_bucket():
+    """Test that the token bucket paces events at its rate after the burst."""
+    try:
+        from sms_sender import TokenBucket
+
+        bucket = TokenBucket(rate=50, burst=5)
+        started = time.monotonic()
+        for _ in range(15):
+            bucket.take()
+        elapsed = time.monotonic() - started
+
+        # 5 free tokens, then 10 more at 50/s
+        if 0.15 <= elapsed < 0.5:
+            print(f"✅ 15 tokens taken in {elapsed:.2f}s at 50/s with a burst of 5")
+            return True
+        print(f"❌ Unexpected pacing: {elapsed:.2f}s")
+        return False
+
+    except Exception as e:
+        print(f"❌ Token bucket test failed: {e}")
+        return False
+
+
+def test_retry_on_rate_limit():
+    """Test that 429 and 5xx responses are retried and 4xx are not."""
+    try:
+        from sms_sender import SendQueue
+
+        server, client = start_stub_twilio([429, 503])
+        sends = SendQueue(twilio_sender(client), default_from="+15035550100", backoff=0.01, number_rate=100)
+
+        message = sends.send("+15035550111", "Hunt starts in 10 minutes!")
+        if not message.sid or len(server.delivered) != 1 or sends.retried != 2:
+            print(f"❌ Expected one delivery after two retries, got {sends.stats()}")
+            return False
+        print("✅ 429 and 503 retried until the message was accepted")
+
+        server.script = [400]
+        try:
+            sends.send("+15035550111", "Bad request")
+            print("❌ A 400 should not be retried")
+            return False
+        except Exception:
+            pass
+        server.shutdown()
+
+        if sends.failed == 1 and sends.retried == 2:
+            print("✅ Client errors fail without retrying")
+            return True
+        print(f"❌ Unexpected counters: {sends.stats()}")
+        return False
+
+    except Exception as e:
+        print(f"❌ Retry test failed: {e}")
+        return False
+
+
+def test_broadcast():
+    """Test broadcasting to every active player through the /broadcast endpoint."""
+    try:
+        import app as app_module
+        from sms_sender import SendQueue
+
+        server, client = start_stub_twilio([429])
+        original_queue = app_module.sms_queue
+        app_module.sms_queue = SendQueue(
+            twilio_sender(client), default_from="+15035550100", workers=4,
+            account_rate=200, number_rate=200, backoff=0.01
+        )
+        game = app_module.engine.default_game
+
+        players = [f"+1503555{n:04d}" for n in range(40)]
+        for phone_number in players:
+            game.start_game(phone_number)
+        game.get_player_data("+15035559999")  # joined but never started
+
+        try:
+            response = app_module.app.test_client().post(
+                '/broadcast', json={"message": "Hunt starts in 10 minutes!"}
+            )
+            app_module.sms_queue.join()
+            stats = app_module.sms_queue.stats()
+            app_module.sms_queue.shutdown(timeout=1)
+        finally:
+            app_module.sms_queue = original_queue
+            for phone_number in players + ["+15035559999"]:
+                game.quit_game(phone_number)
+        server.shutdown()
+
+        delivered_to = {to for to, _, _ in server.delivered}
+        if response.status_code != 202 or not set(players) <= delivered_to:
+            print(f"❌ Broadcast missed players: {response.get_json()}")
+            return False
+        if "+15035559999" in delivered_to:
+            print("❌ Broadcast reached a player who never started")
+            return False
+        if stats["retried"] != 1 or stats["failed"] != 0:
+            print(f"❌ Unexpected send stats: {stats}")
+            return False
+        print(f"✅ Broadcast delivered to {len(players)} active players with one retried 429")
+        return True
+
+    except Exception as e:
+        print(f"❌ Broadcast test failed: {e}")
+        return False
+
+
+def test_shutdown_with_full_queue():
+    """Test that shutdown keeps to its timeout when the queue is full."""
+    try:
+        from sms_sender import SendQueue
+
+        release = threading.Event()
+        send_queue = SendQueue(lambda to, frm, body: release.wait(), workers=1, queue_size=2,
+                               account_rate=1000, number_rate=1000)
+        for n in range(3):
+            send_queue.enqueue(f"+1503555{n:04d}", "Still there?")
+        time.sleep(0.05)  # the worker is stuck on the first message, two more wait
+
+        started = time.monotonic()
+        send_queue.shutdown(timeout=0.2)
+        waited = time.monotonic() - started
+        release.set()
+        if waited > 0.5:
+            print(f"❌ Shutdown took {waited:.2f}s with a 0.2s timeout")
+            return False
+        print(f"✅ Shutdown with a full queue returned after {waited:.2f}s")
+        return True
+
+    except Exception as e:
+        print(f"❌ Shutdown test failed: {e}")
+        return False
+
+
+def main():
+    """Run all tests and provide a summary."""
+    print("📤 SMS Send Queue - Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Token Bucket", test_token_bucket),
+        ("Retry on Rate Limit", test_retry_on_rate_limit),
+        ("Broadcast", test_broadcast),
+        ("Shutdown with Full Queue", test_shutdown_with_full_queue)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        print(f"\n🧪 Running {test_name} Test...")
+        results.append((test_name, test_func()))
+
+    print("\n" + "=" * 50)
+    passed = sum(1 for _, result in results if result)
+    for test_name, result in results:
+        print(f"{'✅ PASS' if result else '❌ FAIL'} - {test_name}")
+    print(f"\nResults: {passed}/{len(results)} tests passed")
+
+    return 0 if passed == len(results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
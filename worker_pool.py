@@ -0,0 +1,99 @@
+"""
+Background worker threads draining a bounded queue.
+Shared by the deferred reply dispatcher and the outbound SMS send queue:
+items are queued without blocking the caller, handled by a fixed pool of
+daemon threads, and drained on shutdown within one overall deadline.
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    """Bounded queue of work items handled by background worker threads.
+
+    Subclasses implement _handle(item) and queue items with _put(item).
+    """
+
+    def __init__(self, workers: int, queue_size: int, name: str):
+        """
+        Args:
+            workers: number of worker threads
+            queue_size: maximum number of items waiting for a worker
+            name: thread name prefix
+        """
+        self.workers = workers
+        self.name = name
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._lock = threading.Lock()
+        self._stopping = False
+
+    def pending(self) -> int:
+        """Number of items waiting for a worker."""
+        return self._queue.qsize()
+
+    def join(self) -> None:
+        """Block until every queued item has been handled."""
+        self._queue.join()
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        """Stop accepting items, let workers drain the queue and exit.
+
+        `timeout` bounds the whole drain, not each worker.
+        """
+        self._stopping = True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for _ in self._threads:
+            # The stop markers queue behind the backlog; a full queue may not
+            # make room for them before the deadline
+            try:
+                self._queue.put(None, timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+        self._threads = []
+
+    def _put(self, item) -> bool:
+        """Queue an item; returns False if the queue is full or shutting down."""
+        if self._stopping:
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            return False
+
+    def _handle(self, item) -> None:
+        raise NotImplementedError
+
+    def _ensure_started(self) -> None:
+        # Threads are started lazily so they are created after a gunicorn fork
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for n in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"{self.name}-{n}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._handle(item)
+            except Exception:
+                logger.exception("Unhandled error in %s worker", self.name)
+            finally:
+                self._queue.task_done()